@@ -13,6 +13,8 @@ from routers import (
 from routers import user_ingredients as user_ingredients_router
 from routers.chat import router as chat_router
 from routers import search_ingredients
+from services.ingredient_kb import start_ingredient_kb
+from services.event_ingest import start_event_ingest, stop_event_ingest
 
 app = FastAPI()
 
@@ -22,6 +24,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # ----- 특정 라우터 개별 prefix/alias -----
@@ -74,6 +77,24 @@ app.include_router(events.router, prefix="/api")
 app.include_router(analytics.router)
 
 
+@app.on_event("startup")
+def load_ingredient_kb():
+    # 성분 사전(in-memory) 로드 + 주기 갱신 시작
+    start_ingredient_kb()
+
+
+@app.on_event("startup")
+def start_event_writer():
+    # 이벤트 버퍼 writer 시작 (+ 이전 실행에서 남은 spill 재적재)
+    start_event_ingest()
+
+
+@app.on_event("shutdown")
+def flush_event_writer():
+    # 큐에 남은 이벤트 적재 후 종료
+    stop_event_ingest()
+
+
 @app.get("/healthz")
 def healthz():
     return {"ok": True}
@@ -1,5 +1,5 @@
 # backend/models.py
-from sqlalchemy import Column, BigInteger, Integer, String, Date, Text, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, BigInteger, Integer, String, Date, Text, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db import Base
@@ -154,3 +154,18 @@ class RecommendationFeedback(Base):
     favorited_count = Column(Integer, nullable=False, default=0)
     impression_time_ms = Column(Integer, nullable=True)
     created_at = Column(DateTime, nullable=False)
+
+
+class ProductReviewHistoryWeekly(Base):
+    """주간 리뷰 수 이력 (product_review_history_weekly_v 물리화, services/review_history.py에서 적재)"""
+    __tablename__ = "product_review_history_weekly"
+
+    period_start = Column(Date, primary_key=True)
+    product_pid = Column(BigInteger, primary_key=True)
+    review_count = Column(Integer)
+    loaded_at = Column(DateTime)
+
+    __table_args__ = (
+        # 제품별 시계열 조회를 테이블 접근 없이 인덱스만으로 처리
+        Index("idx_prhw_pid_period_cnt", "product_pid", "period_start", "review_count"),
+    )
@@ -3,16 +3,31 @@ import json
 import math
 import os
 from collections import defaultdict
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session, declarative_base
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, Index, text, DateTime, Enum, BigInteger, func
+from sqlalchemy import create_engine, Column, Integer, String, Float, Text, Index, text, DateTime, Enum, BigInteger, func, or_
 from sqlalchemy.dialects.mysql import JSON as MySQL_JSON
 from db import get_db
+from services.ingredient_kb import get_kb, normalize_name
+from services.ingredient_matcher import (
+    OCR_JOIN_SEP,
+    extract_ingredient_names,
+    join_ocr_names,
+    split_ingredient_tokens,
+)
+from services import ocr_pipeline
+from services.analysis_cache import analysis_cache, content_hash, weights_signature
+from services import catalog_facets
+from services.http_cache import conditional_json, make_etag
+from services.fit_score_np import (
+    KEYWORDS, apply_soft_caps, ratios_to_matrix, score_matrix, weights_to_arrays,
+)
 from typing import List
-from google.cloud import vision
 import io
 import re
+import time
+import numpy as np
 
 # --- SQLAlchemy Models (기존과 동일) ---
 Base = declarative_base()
@@ -91,12 +106,59 @@ class UserIngredients(Base):
         Index('idx_user_korname', 'user_id', 'korean_name'),
     )
 
+# [신규] 제품 × 피부타입 적합도 사전 계산 테이블 (services/fit_scores.py에서 갱신)
+class ProductFitScores(Base):
+    __tablename__ = "product_fit_scores"
+    pid = Column(Integer, primary_key=True)
+    skin_type = Column(String(10), primary_key=True)
+    product_name = Column(Text)
+    category = Column(String(100))
+    score = Column(Integer)            # 소프트 캡 적용 후 (사용자 주의 감점 전)
+    score_before = Column(Integer)     # 소프트 캡 적용 전
+    ratios = Column(MySQL_JSON)
+    breakdown = Column(MySQL_JSON)
+    reliability = Column(String(20))
+    total_keyword_hits = Column(Integer)
+    matched_count = Column(Integer)
+    input_sig = Column(String(40))     # p_ingredients + 성분 keyword 지문
+    weights_sig = Column(String(40))   # baumann_weights(skin_type) 지문
+    updated_at = Column(DateTime)
+    __table_args__ = (
+        Index('idx_fit_skin_cat_score', 'skin_type', 'category', 'score'),
+        Index('idx_fit_skin_score', 'skin_type', 'score'),
+    )
+
+# [신규] 제품별 성분 keyword 프로필 (services/keyword_profiles.py에서 일괄 갱신)
+class ProductKeywordProfile(Base):
+    __tablename__ = "product_keyword_profiles"
+    pid = Column(Integer, primary_key=True)
+    kw_counts = Column(String(64))       # KEYWORDS 순서 6개 매칭 수, 쉼표 구분 ("3,1,0,2,0,1")
+    total_keyword_hits = Column(Integer)
+    matched_count = Column(Integer)      # keyword 매칭 고유 성분 수
+    matched_ids = Column(MySQL_JSON)     # keyword 매칭 [토큰 위치, ingredients.id] (성분표 순서, 중복 포함)
+    reliability = Column(String(20))
+    ing_hash = Column(String(40))        # p_ingredients 해시
+    kb_sig = Column(String(40))          # 프로필 지문 (profile_sig: 성분 사전 keyword 지문 + 프로필 형식)
+    updated_at = Column(DateTime)
+
 # --- Pydantic Models ---
 class AnalysisRequest(BaseModel):
     product_name: str
     skin_type: str
     user_id: int | None = None  # [신규] 사용자 주의 성분 조회용
 
+class AllTypesRequest(BaseModel):
+    product_name: str
+    user_id: int | None = None
+
+ANALYZE_BATCH_MAX = int(os.getenv("ANALYZE_BATCH_MAX", "20"))  # 한 번에 비교 분석할 최대 제품 수
+
+class BatchAnalysisRequest(BaseModel):
+    skin_type: str
+    user_id: int | None = None
+    product_names: List[str] = []
+    pids: List[int] = []
+
 class ProductResponse(BaseModel):
     product_name: str
     
@@ -109,14 +171,11 @@ KEYWORD_KOR_TO_ENG = {
 }
 KEYWORD_ENG_TO_KOR = {v: k for k, v in KEYWORD_KOR_TO_ENG.items()}
 
-def normalize_name(name):
-    if not name: return None
-    return name.strip().lower().replace(' ', '').replace('-', '')
 
 def get_product_from_db(product_name: str, db: Session):
     try:
         query = text("""
-            SELECT product_name, category, p_ingredients
+            SELECT pid, product_name, category, p_ingredients
             FROM product_data
             WHERE product_name = :name
         """)
@@ -129,76 +188,103 @@ def get_product_from_db(product_name: str, db: Session):
         print(f"❌ DB 조회 오류 (get_product_from_db): {e}")
         raise HTTPException(status_code=500, detail=f"Database query error: {e}")
 
+def get_products_batch_from_db(product_names: List[str], pids: List[int], db: Session) -> List[dict]:
+    """제품명/pid 목록을 한 번의 쿼리로 조회 (pid, product_name, category, p_ingredients)"""
+    conds = []
+    if product_names:
+        conds.append(ProductData.product_name.in_(product_names))
+    if pids:
+        conds.append(ProductData.pid.in_(pids))
+    if not conds:
+        return []
+    try:
+        rows = db.query(
+            ProductData.pid, ProductData.product_name, ProductData.category, ProductData.p_ingredients
+        ).filter(or_(*conds)).all()
+        return [dict(r._mapping) for r in rows]
+    except Exception as e:
+        print(f"❌ DB 조회 오류 (get_products_batch_from_db): {e}")
+        raise HTTPException(status_code=500, detail=f"Database query error: {e}")
+
 # --- [신규] 전체 성분 매칭 함수 ---
-def match_all_ingredients(ingredients_str: str, db: Session):
+def select_known_ingredients(tokens: List[str], kb=None) -> List[str]:
     """
-    '실제 전체 성분'을 더 정확히 세기 위해
-    - KCIA.name_normalized와 정규화 일치 OR
-    - ingredients.korean_name과 원문 정확 일치
-    를 만족하는 원소들을 수집하여 반환한다.
+    KCIA 정규화 일치 OR ingredients 국문 정확 일치 토큰만 원문 표기로 반환 (중복 제거).
+    DB 대신 프로세스 공용 성분 사전(services/ingredient_kb.py) 사용.
     """
-    if not ingredients_str:
-        return []
-
-    # 원문 토큰 & 정규화
-    ingredients_list = [ing.strip().strip('"') for ing in ingredients_str.split(',') if ing.strip()]
-    norm_list = [normalize_name(ing) for ing in ingredients_list if normalize_name(ing)]
-    norm_set = set(norm_list)
-    orig_set = set(ingredients_list)
-
-    # KCIA 정규화 매칭
-    kcia_rows = db.query(KCIAIngredients.name_normalized).filter(
-        KCIAIngredients.name_normalized.in_(norm_set)
-    ).all()
-    kcia_norm_set = {r[0] for r in kcia_rows}
-
-    # ingredients 국문 정확 일치
-    ing_rows = db.query(Ingredients.korean_name).filter(
-        Ingredients.korean_name.in_(orig_set)
-    ).all()
-    ing_exact_set = {r[0] for r in ing_rows}
-
-    # 두 기준을 만족하는 원문 표기만 반환(중복 제거)
+    kb = kb or get_kb()
     matched = []
     seen = set()
-    for ing in ingredients_list:
+    for ing in tokens:
         n = normalize_name(ing)
-        if (n in kcia_norm_set) or (ing in ing_exact_set):
-            key = n if (n in kcia_norm_set) else f"EXACT::{ing}"
+        in_kcia = kb.in_kcia(n)
+        if in_kcia or kb.has_ingredient(ing):
+            key = n if in_kcia else f"EXACT::{ing}"
             if key not in seen:
                 matched.append(ing)
                 seen.add(key)
-
     return matched
 
+def match_all_ingredients(ingredients_str: str, db: Session, sep: str = ","):
+    """
+    '실제 전체 성분'을 더 정확히 세기 위해
+    - KCIA.name_normalized와 정규화 일치 OR
+    - ingredients.korean_name과 원문 정확 일치
+    를 만족하는 원소들을 수집하여 반환한다.
+    """
+    if not ingredients_str:
+        return []
+
+    # 원문 토큰 → 두 기준을 만족하는 원문 표기만 반환(중복 제거)
+    return select_known_ingredients(split_ingredient_tokens(ingredients_str, sep))
+
 # --- [신규] 주의 성분 조회 함수 (시스템 DB) ---
 def query_caution_ingredients(ingredients_list: List[str], db: Session):
     """
-    caution_ingredients 테이블에서 주의 성분 조회
+    caution_ingredients 테이블에서 주의 성분 조회 (성분 사전 경유)
     """
     if not ingredients_list:
         return []
 
     try:
-        caution_results = db.query(
-            CautionIngredients.korean_name,
-            CautionIngredients.caution_grade
-        ).filter(
-            CautionIngredients.korean_name.in_(ingredients_list)
-        ).all()
-
-        return [
-            {
-                'korean_name': row[0],
-                'caution_grade': row[1]
-            }
-            for row in caution_results
-        ]
+        kb = get_kb()
+        results = []
+        seen = set()
+        for name in ingredients_list:
+            e = kb.official_caution(name)
+            if e and e.korean_name not in seen:   # 기존 IN 조회처럼 사전 항목당 1번
+                seen.add(e.korean_name)
+                results.append({
+                    'korean_name': e.korean_name,
+                    'caution_grade': e.official_grade
+                })
+        return results
     except Exception as e:
         print(f"❌ 주의 성분 조회 오류: {e}")
         return []
 
 # --- [신규] 사용자 주의 성분 조회 (정규화 교집합) ---
+def fetch_user_caution_names(user_id: int | None, db: Session) -> List[str]:
+    """user_ingredients에서 (user_id, ing_type='caution') 성분명 전체 조회"""
+    if not user_id:
+        return []
+    rows = db.query(UserIngredients.korean_name).filter(
+        UserIngredients.user_id == user_id,
+        UserIngredients.ing_type == 'caution'
+    ).all()
+    return [kor_name for (kor_name,) in rows]
+
+def match_user_caution_names(caution_names: List[str], product_tokens: List[str]) -> List[str]:
+    """사용자 주의 성분명 중 제품 성분과 정규화 기준으로 겹치는 것 (DB 조회 없음)"""
+    product_norm_set = {normalize_name(t) for t in product_tokens if normalize_name(t)}
+    hits = []
+    for kor_name in caution_names:
+        if not kor_name:
+            continue
+        if normalize_name(kor_name) in product_norm_set:
+            hits.append(kor_name)
+    return hits
+
 def query_user_caution_ingredients(user_id: int | None, product_tokens: List[str], db: Session) -> List[str]:
     """
     user_ingredients에서 (user_id, ing_type='caution') 전체를 읽어 정규화 교집합으로 매칭.
@@ -207,20 +293,8 @@ def query_user_caution_ingredients(user_id: int | None, product_tokens: List[str
     if not user_id or not product_tokens:
         return []
 
-    product_norm_set = {normalize_name(t) for t in product_tokens if normalize_name(t)}
-
     try:
-        rows = db.query(UserIngredients.korean_name).filter(
-            UserIngredients.user_id == user_id,
-            UserIngredients.ing_type == 'caution'
-        ).all()
-
-        hits = []
-        for (kor_name,) in rows:
-            if not kor_name:
-                continue
-            if normalize_name(kor_name) in product_norm_set:
-                hits.append(kor_name)
+        hits = match_user_caution_names(fetch_user_caution_names(user_id, db), product_tokens)
         # 디버깅 도움:
         if hits:
             print(f"[USER_CAUTION] user_id={user_id}, hits={hits}")
@@ -231,41 +305,22 @@ def query_user_caution_ingredients(user_id: int | None, product_tokens: List[str
 
 # --- Matching Logic ---
 # [수정] ingredients 테이블의 keyword 컬럼 사용 (영문 키워드: moisturizing, soothing 등)
-def match_ingredients(ingredients_str: str, db: Session):
-    if not ingredients_str:
-        return [], {}, [], 0
-    ingredients_list = [ing.strip().strip('"') for ing in ingredients_str.split(',') if ing.strip()]
+# split_ingredient_tokens: services/ingredient_matcher.py (카탈로그 ',' / OCR 결과 OCR_JOIN_SEP)
+def resolve_keyword_purpose_maps(orig_names, normalized_names, kb=None):
+    """
+    원문 성분명 → keyword(ingredients), 정규화명 → purpose(KCIA) 맵 (성분 사전 조회).
+    - normalized_names가 None이면 purpose 맵은 생략
+    """
+    kb = kb or get_kb()
+    keyword_map = kb.keyword_map(orig_names)  # 이미 영문 키워드 (moisturizing 등)
+    purpose_map = kb.purpose_map(normalized_names) if normalized_names is not None else {}
+    return keyword_map, purpose_map
+
+def match_ingredients_with_maps(ingredients_list: List[str], keyword_map: dict, purpose_map: dict):
+    """match_ingredients의 순수 매칭 부분 (DB 조회 없음)"""
     matched_details = []
     matched_stats = defaultdict(list)
     unmatched = []
-    normalized_names = list(set(normalize_name(ing) for ing in ingredients_list if normalize_name(ing)))
-    
-    # 원문 성분명 집합
-    orig_set = set(ingredients_list)
-
-    # ingredients 테이블에서 keyword 조회 (korean_name 기준)
-    ing_keyword_results = db.query(
-        Ingredients.korean_name,
-        Ingredients.keyword
-    ).filter(
-        Ingredients.korean_name.in_(orig_set),
-        Ingredients.keyword.isnot(None)
-    ).all()
-    
-    # korean_name -> keyword 맵
-    keyword_map = {}
-    for kor_name, kw in ing_keyword_results:
-        if kw:
-            keyword_map[kor_name] = kw  # 이미 영문 키워드 (moisturizing 등)
-
-    # KCIA에서 purpose 조회 (정규화된 이름 기준)
-    kcia_results = db.query(
-        KCIAIngredients.name_normalized,
-        KCIAIngredients.purpose
-    ).filter(
-        KCIAIngredients.name_normalized.in_(normalized_names)
-    ).all()
-    purpose_map = {norm_name: purp for norm_name, purp in kcia_results}
 
     for ingredient in ingredients_list:
         normalized = normalize_name(ingredient)
@@ -292,6 +347,20 @@ def match_ingredients(ingredients_str: str, db: Session):
 
     return matched_details, dict(matched_stats), unmatched, len(ingredients_list)
 
+def match_ingredients(ingredients_str: str, db: Session, sep: str = ","):
+    if not ingredients_str:
+        return [], {}, [], 0
+    ingredients_list = split_ingredient_tokens(ingredients_str, sep)
+    normalized_names = list(set(normalize_name(ing) for ing in ingredients_list if normalize_name(ing)))
+
+    # 원문 성분명 집합
+    orig_set = set(ingredients_list)
+
+    # ingredients.keyword (korean_name 기준) + KCIA.purpose (정규화된 이름 기준)
+    keyword_map, purpose_map = resolve_keyword_purpose_maps(orig_set, normalized_names)
+
+    return match_ingredients_with_maps(ingredients_list, keyword_map, purpose_map)
+
 # --- Score Logic (기존과 동일 + 타겟 내부 0.90~0.97 보정 유지) ---
 def calculate_keyword_ratios(matched_stats, total_matched_count):
     if total_matched_count == 0: return {}
@@ -468,34 +537,441 @@ def generate_analysis_text(skin_type, final_score, breakdown, caution_count):
         "opinion": opinion
     }
 
+# --- [신규] 배치 스코어링 (top-products용) ---
+def load_user_weights_dict(skin_type: str, db: Session) -> dict:
+    """baumann_weights → {한글키워드: {importance, target_range}} (없으면 빈 dict)"""
+    weights = db.query(BaumannWeights).filter(BaumannWeights.skin_type == skin_type).all()
+    return {
+        w.keyword: {"importance": w.importance, "target_range": [w.target_min, w.target_max]}
+        for w in weights
+    }
+
+def load_all_weights(db: Session) -> dict:
+    """baumann_weights 전체 → {skin_type: {한글키워드: {importance, target_range}}}"""
+    by_type = defaultdict(dict)
+    for w in db.query(BaumannWeights).all():
+        by_type[w.skin_type][w.keyword] = {
+            "importance": w.importance,
+            "target_range": [w.target_min, w.target_max],
+        }
+    return dict(by_type)
+
+# --- [신규] 제품 keyword 프로필 (성분 문자열 매칭 없이 비율/히트/신뢰도 복원) ---
+def pack_kw_counts(counts) -> str:
+    return ",".join(str(int(c)) for c in counts)
+
+def unpack_kw_counts(packed: str | None) -> List[int]:
+    vals = [int(x) for x in (packed or "").split(",") if x != ""]
+    return vals if len(vals) == len(KEYWORDS) else [0] * len(KEYWORDS)
+
+PROFILE_FORMAT = "pos1"   # matched_ids 형식 ([토큰 위치, id]) — 바꾸면 저장된 프로필 전체 무효화
+
+def profile_sig(kb=None) -> str:
+    """저장 프로필 유효성 지문 (성분 사전 keyword 지문 + 프로필 형식)"""
+    kb = kb or get_kb()
+    return content_hash(f"{kb.keyword_sig}\x1f{PROFILE_FORMAT}")
+
+def build_keyword_profile(tokens: List[str], keyword_map: dict, kb=None) -> dict:
+    """성분 토큰 → 프로필 (match_ingredients_with_maps와 같은 매칭 결과를 압축)"""
+    kb = kb or get_kb()
+    matched_details, matched_stats, _, _ = match_ingredients_with_maps(tokens, keyword_map, {})
+    total_keyword_hits = len(matched_details)
+    # match_ingredients_with_maps의 매칭 조건 그대로, 토큰 위치로 기록 (복원 시 토큰 표기/미매칭 계산용)
+    matched_pos = [
+        [i, kb.get(t).id] for i, t in enumerate(tokens)
+        if normalize_name(t) and keyword_map.get(t)
+    ]
+    return {
+        "kw_counts": pack_kw_counts(len(matched_stats.get(kw, [])) for kw in KEYWORDS),
+        "total_keyword_hits": total_keyword_hits,
+        "matched_count": len(set(sum(matched_stats.values(), []))),
+        "matched_ids": matched_pos,
+        "reliability": classify_reliability(total_keyword_hits),
+    }
+
+def ratios_from_kw_counts(counts: List[int], total_keyword_hits: int) -> dict:
+    """calculate_keyword_ratios와 같은 결과 (매칭 성분 목록 대신 개수 사용)"""
+    if total_keyword_hits == 0: return {}
+    return {kw: round((c / total_keyword_hits) * 100, 2) for kw, c in zip(KEYWORDS, counts)}
+
+def load_keyword_profiles(ingredients_by_pid: dict, db: Session) -> dict:
+    """
+    {pid: p_ingredients} → {pid: ProductKeywordProfile} (유효한 것만).
+    성분 문자열 해시와 성분 사전 keyword 지문이 모두 같아야 유효. 테이블이 없으면 {}.
+    """
+    if not ingredients_by_pid:
+        return {}
+    try:
+        rows = db.query(ProductKeywordProfile).filter(
+            ProductKeywordProfile.pid.in_(list(ingredients_by_pid))
+        ).all()
+    except Exception as e:
+        print(f"⚠️ product_keyword_profiles 조회 불가 → 성분 매칭 사용: {e}")
+        db.rollback()
+        return {}
+    kb_sig = profile_sig()
+    return {
+        r.pid: r for r in rows
+        if r.kb_sig == kb_sig and r.ing_hash == content_hash(ingredients_by_pid[r.pid] or "")
+    }
+
+def score_products_batch(rows, skin_type: str, user_id: int | None, db: Session) -> List[dict]:
+    """
+    여러 제품을 한 번에 채점한다. (제품별 match_ingredients 반복과 결과 동일)
+    - 가중치 / 사용자 주의 목록: 요청당 1회 조회
+    - 성분 keyword: 전체 후보 성분의 합집합을 성분 사전에서 조회
+    rows: (pid, product_name, category, p_ingredients) 튜플 목록
+    반환: top-products item dict 목록 (입력 순서 유지, very_low & 히트 0 제외)
+    - 저장된 keyword 프로필이 유효한 제품은 성분 문자열 매칭을 건너뜀
+    """
+    user_weights_dict = load_user_weights_dict(skin_type, db)
+    if not user_weights_dict:
+        return []
+
+    try:
+        caution_names = fetch_user_caution_names(user_id, db)
+    except Exception as e:
+        print(f"❌ 사용자 주의 성분 정규화 매칭 오류: {e}")
+        caution_names = []
+
+    profiles = load_keyword_profiles({pid: ing_str for pid, _, _, ing_str in rows}, db)
+
+    # 프로필이 없는 제품 + (주의 목록이 있으면) 사용자 주의 매칭용으로만 토큰 분리
+    token_lists = [
+        split_ingredient_tokens(ing_str) if ing_str and (caution_names or pid not in profiles) else []
+        for pid, _, _, ing_str in rows
+    ]
+    union_names = set()
+    for (pid, _, _, _), tokens in zip(rows, token_lists):
+        if pid not in profiles:
+            union_names.update(tokens)
+    # 점수 계산에는 keyword만 쓰이므로 purpose 조회는 생략
+    keyword_map, _ = resolve_keyword_purpose_maps(union_names, None)
+
+    items = []
+    for (pid, name, cat, _), tokens in zip(rows, token_lists):
+        prof = profiles.get(pid)
+        if prof is not None:
+            total_keyword_hits = prof.total_keyword_hits
+            reliability = prof.reliability
+            matched_count = prof.matched_count
+            ratios = ratios_from_kw_counts(unpack_kw_counts(prof.kw_counts), total_keyword_hits)
+        else:
+            matched_details, matched_stats, _, _ = match_ingredients_with_maps(tokens, keyword_map, {})
+            total_keyword_hits = len(matched_details)
+            reliability = classify_reliability(total_keyword_hits)
+            matched_count = len(set(sum(matched_stats.values(), [])))
+            ratios = calculate_keyword_ratios(matched_stats, total_keyword_hits)
+
+        final_score, breakdown = calculate_score_final(ratios, user_weights_dict)
+        score_before = final_score
+
+        # === 점수 소프트 캡 적용 (히트/신뢰도 기반) ===
+        final_score = apply_soft_caps_by_hits(final_score, total_keyword_hits, reliability)
+
+        # 사용자 주의 감점
+        user_cautions = match_user_caution_names(caution_names, tokens) if tokens else []
+        if user_cautions:
+            final_score = max(0, final_score - 40)
+
+        # very_low(히트 0)은 제외, 1~2는 남겨서 ‘저신뢰’로 표기
+        if reliability == "very_low" and total_keyword_hits == 0:
+            continue
+
+        items.append({
+            "product_name": name,
+            "category": cat,
+            "final_score": max(final_score, 0),
+            "score_before": score_before,
+            "has_user_caution": bool(user_cautions),
+            "user_caution": [{"korean_name": n} for n in user_cautions],
+            "matched_count": matched_count,
+            "total_keyword_hits": total_keyword_hits,
+            "reliability": reliability
+        })
+
+    if user_id and any(it["has_user_caution"] for it in items):
+        print(f"[USER_CAUTION] user_id={user_id}, flagged={sum(it['has_user_caution'] for it in items)}/{len(items)}")
+    return items
+
+# --- [신규] 사전 계산 적합도 조회 (top-products용) ---
+FIT_READ_LIMIT = 500  # 카테고리별 점수 상위 N개만 읽어 사용자 감점 적용
+
+def read_top_fit_scores(category: str, skin_type: str, user_id: int | None, db: Session):
+    """
+    product_fit_scores에서 (skin_type, category) 점수 상위 제품을 인덱스 범위로 읽고
+    사용자 주의 감점(-40)만 요청 시점에 적용한다.
+    - 해당 skin_type이 아직 계산되지 않았거나 테이블이 없으면 None (배치 채점으로 대체)
+    """
+    try:
+        ready = db.query(ProductFitScores.pid).filter(
+            ProductFitScores.skin_type == skin_type
+        ).first()
+    except Exception as e:
+        print(f"⚠️ product_fit_scores 조회 불가 → 배치 채점 사용: {e}")
+        db.rollback()
+        return None
+    if not ready:
+        return None
+
+    def _range(cat_filter):
+        return db.query(ProductFitScores).filter(
+            ProductFitScores.skin_type == skin_type,
+            cat_filter,
+            ProductFitScores.total_keyword_hits > 0,  # very_low(히트 0) 제외
+        ).order_by(
+            ProductFitScores.score.desc(), ProductFitScores.pid.asc()
+        ).limit(FIT_READ_LIMIT).all()
+
+    rows = _range(ProductFitScores.category.ilike(category))
+    if not rows:
+        rows = _range(ProductFitScores.category.like(f"%{category.strip()}%"))
+
+    try:
+        caution_names = fetch_user_caution_names(user_id, db)
+    except Exception as e:
+        print(f"❌ 사용자 주의 성분 정규화 매칭 오류: {e}")
+        caution_names = []
+
+    # 주의 목록이 있는 사용자만 제품 성분 원문을 추가로 읽음
+    tokens_by_pid = {}
+    if caution_names and rows:
+        ing_rows = db.query(ProductData.pid, ProductData.p_ingredients).filter(
+            ProductData.pid.in_([r.pid for r in rows])
+        ).all()
+        tokens_by_pid = {pid: split_ingredient_tokens(ing or "") for pid, ing in ing_rows}
+
+    items = []
+    for r in rows:
+        final_score = r.score
+        user_cautions = []
+        if caution_names:
+            user_cautions = match_user_caution_names(caution_names, tokens_by_pid.get(r.pid, []))
+            if user_cautions:
+                final_score = max(0, final_score - 40)
+        items.append({
+            "product_name": r.product_name,
+            "category": r.category,
+            "final_score": max(final_score, 0),
+            "score_before": r.score_before,
+            "has_user_caution": bool(user_cautions),
+            "user_caution": [{"korean_name": n} for n in user_cautions],
+            "matched_count": r.matched_count,
+            "total_keyword_hits": r.total_keyword_hits,
+            "reliability": r.reliability
+        })
+    return items
+
 # --- API Router ---
 router = APIRouter()
 
+# 카테고리/제품 목록은 services/catalog_facets.py 캐시에서 제공 (버전 ETag → 변경 없으면 304)
 @router.get("/api/categories", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, db: Session = Depends(get_db)):
     try:
-        categories_query = db.query(ProductData.category).filter(
-            ProductData.p_ingredients.is_not(None),
-            ProductData.category.is_not(None)
-        ).distinct().order_by(ProductData.category)
-        categories = [row[0] for row in categories_query.all() if row[0]]
-        return categories
+        version, categories = catalog_facets.get_categories(db)
+        return conditional_json(request, make_etag("categories", version), lambda: categories)
     except Exception as e:
         print(f"❌ /api/categories 서버 오류: {e}")
         raise HTTPException(status_code=500, detail="카테고리 조회 중 오류가 발생했습니다.")
 
+@router.get("/api/categories/counts")
+def get_category_counts(request: Request, db: Session = Depends(get_db)):
+    """카테고리별 분석 가능 제품 수 [{category, product_count}]"""
+    try:
+        version, counts = catalog_facets.get_category_counts(db)
+        return conditional_json(request, make_etag("category-counts", version), lambda: counts)
+    except Exception as e:
+        print(f"❌ /api/categories/counts 서버 오류: {e}")
+        raise HTTPException(status_code=500, detail="카테고리 조회 중 오류가 발생했습니다.")
+
 @router.get("/api/products-by-category", response_model=List[ProductResponse])
-def get_products_by_category(category: str, db: Session = Depends(get_db)):
+def get_products_by_category(
+    request: Request,
+    category: str,
+    cursor: str | None = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int | None = Query(None, ge=1, le=catalog_facets.PAGE_MAX, description="지정 시 keyset 페이지네이션"),
+    db: Session = Depends(get_db),
+):
     try:
-        products_query = db.query(ProductData.product_name).filter(
-            ProductData.category == category,
-            ProductData.p_ingredients.is_not(None)
-        ).order_by(ProductData.product_name)
-        products = [{"product_name": row[0]} for row in products_query.all()]
-        return products
+        version, names, next_cursor = catalog_facets.page_products(db, category, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor 형식이 올바르지 않습니다.")
     except Exception as e:
         print(f"❌ /api/products-by-category 서버 오류: {e}")
         raise HTTPException(status_code=500, detail="제품 목록 조회 중 오류가 발생했습니다.")
+    # 응답 형식(제품명 리스트)은 유지, 다음 페이지 커서는 헤더로
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return conditional_json(
+        request,
+        make_etag("products", version, category, cursor, limit),
+        lambda: [{"product_name": n} for n in names],
+        headers=headers,
+    )
+
+# --- [신규] /api/analyze 사용자 무관 분석 결과 (analysis_cache에 저장되는 부분) ---
+def matches_from_keyword_profile(profile, ingredients_str: str, kb=None):
+    """
+    저장된 keyword 프로필 → (matched_details, unmatched) 복원 (match_ingredients와 같은 결과).
+    매칭 토큰은 저장된 위치로, keyword는 ingredients.id로 바로 찾고, 나머지 토큰은 미분류로 표시.
+    """
+    kb = kb or get_kb()
+    tokens = split_ingredient_tokens(ingredients_str)
+    matched_details = []
+    matched_pos = set()
+    for pos, ing_id in profile.matched_ids or []:
+        t = tokens[pos]
+        e = kb.by_ingredient_id(ing_id)
+        matched_pos.add(pos)
+        matched_details.append({
+            '성분명': t,
+            '배합목적': kb.purpose(normalize_name(t), '미확인'),
+            '효능': KEYWORD_ENG_TO_KOR.get(e.keyword, e.keyword)
+        })
+    unmatched = [
+        {'성분명': t, '배합목적': kb.purpose(normalize_name(t), '미확인'), '효능': '미분류'}
+        for i, t in enumerate(tokens)
+        if normalize_name(t) and i not in matched_pos
+    ]
+    return matched_details, unmatched
+
+def build_analysis_base(ingredients_str: str, skin_type: str, user_weights_dict: dict, db: Session,
+                        maps: tuple | None = None, profile=None) -> dict:
+    """
+    성분 문자열 + 피부타입만으로 결정되는 분석 결과.
+    분석 불가(very_low / 가중치 없음)면 {"reject": (status, detail)}.
+    maps: 배치 분석에서 미리 만든 (keyword_map, purpose_map) — 없으면 제품 단위로 조회
+    profile: 유효한 ProductKeywordProfile이면 keyword 매칭/비율을 프로필에서 복원
+    """
+    # 2. 성분 매칭(키워드/목적용)
+    if profile is not None:
+        matched_details, unmatched = matches_from_keyword_profile(profile, ingredients_str)
+        total_keyword_hits = profile.total_keyword_hits
+        matched_count = profile.matched_count
+        ratios = ratios_from_kw_counts(unpack_kw_counts(profile.kw_counts), total_keyword_hits)
+    else:
+        if maps is not None:
+            matched_details, matched_stats, unmatched, total_count = match_ingredients_with_maps(
+                split_ingredient_tokens(ingredients_str), *maps
+            )
+        else:
+            matched_details, matched_stats, unmatched, total_count = match_ingredients(
+                ingredients_str, db
+            )
+        total_keyword_hits = len(matched_details)
+        # [신규] 고유 매칭 성분 수 계산
+        matched_count = len(set(sum(matched_stats.values(), [])))
+        # 3. 비율 계산
+        ratios = calculate_keyword_ratios(matched_stats, total_keyword_hits)
+
+    # ✅ 전체 성분(검증된 원문) 확보
+    all_matched_ingredients = match_all_ingredients(ingredients_str, db)
+
+    # 신뢰등급 결정
+    reliability = classify_reliability(total_keyword_hits)
+
+    # 하드-스탑: very_low(<3)
+    if reliability == "very_low":
+        return {"reject": (400, f"분석 중단: OCR 매칭 성분이 {total_keyword_hits}개로 매우 적습니다. 성분표를 더 선명하게 촬영해 다시 시도해주세요.")}
+
+    # 4. 가중치 (호출 측에서 조회)
+    if not user_weights_dict:
+        return {"reject": (404, "피부 타입 가중치를 DB에서 찾을 수 없습니다.")}
+
+    # 5. 점수 계산
+    final_score, breakdown = calculate_score_final(ratios, user_weights_dict)
+    # === 점수 소프트 캡 적용 (히트/신뢰도 기반) ===
+    final_score = apply_soft_caps_by_hits(final_score, total_keyword_hits, reliability)
+
+    # ✅ 6. 시스템 주의 성분 (검증된 원문 사용)
+    caution_ingredients = query_caution_ingredients(all_matched_ingredients, db)
+
+    return {
+        "total_count": len(all_matched_ingredients),  # 실제 성분 개수
+        "matched_count": matched_count,
+        "reliability": reliability,
+        "total_keyword_hits": total_keyword_hits,
+        "score": final_score,
+        "ratios": ratios,
+        "breakdown": breakdown,
+        "matched": matched_details,
+        "unmatched": unmatched,
+        "caution": caution_ingredients,
+        "all_matched_ingredients": all_matched_ingredients,
+    }
+
+def get_analysis_base(ingredients_str: str, skin_type: str, user_weights_dict: dict, db: Session,
+                      maps: tuple | None = None, pid: int | None = None, profiles: dict | None = None) -> dict:
+    """
+    (성분 해시, 피부타입, 가중치 지문, 성분 사전 버전) 키로 build_analysis_base 결과 캐시.
+    캐시 미스 시 pid의 keyword 프로필(profiles에 미리 읽어둔 것 또는 1건 조회)이 유효하면 사용.
+    """
+    cache_key = (
+        content_hash(ingredients_str),
+        skin_type,
+        weights_signature(user_weights_dict),
+        get_kb().version,
+    )
+    base = analysis_cache.get(cache_key)
+    if base is None:
+        t0 = time.perf_counter()
+        profile = None
+        if pid is not None:
+            if profiles is None:
+                profiles = load_keyword_profiles({pid: ingredients_str}, db)
+            profile = profiles.get(pid)
+        base = build_analysis_base(ingredients_str, skin_type, user_weights_dict, db,
+                                   maps=maps, profile=profile)
+        analysis_cache.put(cache_key, base, (time.perf_counter() - t0) * 1000)
+    return base
+
+def render_analysis_response(product: dict, skin_type: str, base: dict, user_cautions: List[str]) -> dict:
+    """사용자 무관 분석 결과 + 사용자 주의 성분(-40) → /api/analyze 응답 형식"""
+    reliability = base["reliability"]
+    final_score = base["score"]
+    score_before = final_score
+    has_user_caution = False
+    warning_message = None
+    modal_variant = None
+    if user_cautions:
+        has_user_caution = True
+        final_score = max(0, final_score - 40)
+        warning_message = "선택하신 주의 성분이 포함되어 있습니다."
+        modal_variant = "danger"
+
+    # 텍스트 분석 (주의 성분 개수 전달: 시스템 주의 기준)
+    analysis_texts = generate_analysis_text(skin_type, final_score, base["breakdown"], len(base["caution"]))
+    # 저신뢰 경고 문구를 종합 의견 앞에 덧붙임
+    if reliability == "low":
+        analysis_texts["opinion"] = prepend_low_reliability_warning(analysis_texts["opinion"])
+
+    return {
+        "product_info": {
+            "name": product.get('product_name', 'N/A'),
+            "category": product.get('category', 'N/A'),
+            "total_count": base["total_count"],  # 실제 성분 개수
+            "matched_count": base["matched_count"]
+        },
+        "meta": {
+            "reliability": reliability,
+            "total_keyword_hits": base["total_keyword_hits"]
+        },
+
+        "skin_type": skin_type,
+        "score_before": score_before,
+        "final_score": final_score,
+        "has_user_caution": has_user_caution,
+        "user_caution": [{"korean_name": n} for n in user_cautions],
+        "warning_message": warning_message,
+        "modal_variant": modal_variant,
+        "charts": { "ratios": base["ratios"], "breakdown": base["breakdown"] },
+        "analysis": analysis_texts,
+        "ingredients": {
+            "matched": base["matched"],
+            "unmatched": base["unmatched"],
+            "caution": base["caution"]  # 시스템 주의 성분
+        }
+    }
 
 # --- [수정] API - 기존 제품 분석 (주의 성분 + 사용자 주의 -40 적용) ---
 @router.post("/api/analyze")
@@ -511,107 +987,192 @@ def analyze_product_api(request: AnalysisRequest, db: Session = Depends(get_db))
         if not ingredients_str:
             raise HTTPException(status_code=400, detail="제품에 분석 가능한 성분 정보(p_ingredients)가 없습니다.")
 
-        # 2. 성분 매칭(키워드/목적용)
-        matched_details, matched_stats, unmatched, total_count = match_ingredients(
-            ingredients_str, db
+        # 2~6. 사용자 무관 분석 결과 (캐시)
+        user_weights_dict = load_user_weights_dict(request.skin_type, db)
+        base = get_analysis_base(ingredients_str, request.skin_type, user_weights_dict, db,
+                                 pid=product.get('pid'))
+
+        if "reject" in base:
+            status, detail = base["reject"]
+            raise HTTPException(status_code=status, detail=detail)
+
+        if base["reliability"] == "low":
+            print(f"[WARN] low reliability (product): hits={base['total_keyword_hits']}, product={product.get('product_name','N/A')}")
+
+        # ✅ 7. 사용자 주의 성분 매칭 (정규화 교집합, 검증된 원문 사용) 및 -40 즉시 감점
+        user_cautions = query_user_caution_ingredients(request.user_id, base["all_matched_ingredients"], db)
+
+        # 8~9. 텍스트 분석 + JSON 반환
+        return render_analysis_response(product, request.skin_type, base, user_cautions)
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"❌ /api/analyze 서버 오류: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+@router.get("/api/analyze/cache-stats")
+def analyze_cache_stats():
+    """/api/analyze 결과 캐시 적중률/크기/절감 시간"""
+    return {**analysis_cache.stats(), "ingredient_kb_version": get_kb().version}
+
+# --- [신규] API - 여러 제품 비교 분석 (한 번의 제품 조회 / 가중치·사용자 주의 성분 1회 조회) ---
+@router.post("/api/analyze/batch")
+def analyze_batch_api(request: BatchAnalysisRequest, db: Session = Depends(get_db)):
+    """
+    제품 최대 ANALYZE_BATCH_MAX개를 한 번에 분석.
+    results[i]는 요청 순서(product_names → pids)대로, 성공 시 /api/analyze와 같은 형식,
+    실패 시 {"product_name" | "pid", "error": {"status", "detail"}}.
+    """
+    print(f"[REQ] /api/analyze/batch user_id={request.user_id}, names={len(request.product_names)}, pids={len(request.pids)}")
+    # 요청 순서 유지 + 중복 제거
+    wanted = list(dict.fromkeys(
+        [("product_name", n) for n in request.product_names if n and n.strip()]
+        + [("pid", p) for p in request.pids]
+    ))
+    if not wanted:
+        raise HTTPException(status_code=400, detail="product_names 또는 pids를 하나 이상 입력해주세요.")
+    if len(wanted) > ANALYZE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {ANALYZE_BATCH_MAX}개 제품까지 분석할 수 있습니다.")
+
+    try:
+        # 1. 제품 일괄 조회 (1 쿼리)
+        rows = get_products_batch_from_db(
+            [v for k, v in wanted if k == "product_name"],
+            [v for k, v in wanted if k == "pid"],
+            db,
+        )
+        by_name, by_pid = {}, {}
+        for r in rows:
+            by_name.setdefault(r["product_name"], r)
+            by_pid[r["pid"]] = r
+
+        # 2. 가중치 / 사용자 주의 성분은 요청당 1회
+        user_weights_dict = load_user_weights_dict(request.skin_type, db)
+        caution_names = fetch_user_caution_names(request.user_id, db)
+
+        # 3. 저장된 keyword 프로필 일괄 조회 → 프로필이 없는 제품 성분의 합집합으로 keyword/purpose 맵 1회 구성
+        found = [(key, (by_name if key[0] == "product_name" else by_pid).get(key[1])) for key in wanted]
+        profiles = load_keyword_profiles(
+            {p["pid"]: p["p_ingredients"] for _, p in found if p and p.get("p_ingredients")}, db
         )
+        orig_set = set()
+        for _, product in found:
+            if product and product.get("p_ingredients") and product["pid"] not in profiles:
+                orig_set.update(split_ingredient_tokens(product["p_ingredients"]))
+        normalized_names = list({n for n in (normalize_name(x) for x in orig_set) if n})
+        maps = resolve_keyword_purpose_maps(orig_set, normalized_names)
+
+        # 4. 제품별 분석 (사용자 무관 결과는 /api/analyze와 같은 캐시 공유)
+        results = []
+        for (kind, value), product in found:
+            if not product:
+                results.append({kind: value, "error": {"status": 404, "detail": "제품을 찾을 수 없습니다."}})
+                continue
+            ingredients_str = product.get("p_ingredients")
+            if not ingredients_str:
+                results.append({kind: value, "error": {"status": 400, "detail": "제품에 분석 가능한 성분 정보(p_ingredients)가 없습니다."}})
+                continue
 
-        # ✅ 전체 성분(검증된 원문) 확보
-        all_matched_ingredients = match_all_ingredients(ingredients_str, db)
-        actual_total_count = len(all_matched_ingredients)
+            base = get_analysis_base(ingredients_str, request.skin_type, user_weights_dict, db,
+                                     maps=maps, pid=product["pid"], profiles=profiles)
+            if "reject" in base:
+                status, detail = base["reject"]
+                results.append({kind: value, "error": {"status": status, "detail": detail}})
+                continue
 
-        # [신규] 고유 매칭 성분 수 계산
-        unique_matched_set = set()
-        for ing_list in matched_stats.values():
-            unique_matched_set.update(ing_list)
-        unique_matched_count = len(unique_matched_set)
+            user_cautions = match_user_caution_names(caution_names, base["all_matched_ingredients"])
+            item = render_analysis_response(product, request.skin_type, base, user_cautions)
+            item["pid"] = product["pid"]
+            results.append(item)
+
+        return {"skin_type": request.skin_type, "count": len(results), "results": results}
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"❌ /api/analyze/batch 서버 오류: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+# --- [신규] API - 전체 피부타입(16종) 점수 한 번에 ---
+@router.post("/api/analyze/all-types")
+def analyze_all_types_api(request: AllTypesRequest, db: Session = Depends(get_db)):
+    """한 제품의 모든 바우만 타입 점수를 벡터화 계산으로 한 번에 반환 (사용자 주의 -40 포함)"""
+    try:
+        product = get_product_from_db(request.product_name, db)
+        if not product:
+            raise HTTPException(status_code=404, detail="제품을 찾을 수 없습니다.")
+        ingredients_str = product.get('p_ingredients')
+        if not ingredients_str:
+            raise HTTPException(status_code=400, detail="제품에 분석 가능한 성분 정보(p_ingredients)가 없습니다.")
+
+        matched_details, matched_stats, _, _ = match_ingredients(ingredients_str, db)
+        all_matched_ingredients = match_all_ingredients(ingredients_str, db)
 
-        # 비율 계산 + 신뢰등급 결정
         total_keyword_hits = len(matched_details)
         reliability = classify_reliability(total_keyword_hits)
-        if reliability == "low":
-            print(f"[WARN] low reliability (product): hits={total_keyword_hits}, product={product.get('product_name','N/A')}")
-
-        # 하드-스탑: very_low(<3)
         if reliability == "very_low":
             raise HTTPException(
                 status_code=400,
                 detail=f"분석 중단: OCR 매칭 성분이 {total_keyword_hits}개로 매우 적습니다. 성분표를 더 선명하게 촬영해 다시 시도해주세요."
             )
-
-        # 3. 비율 계산
         ratios = calculate_keyword_ratios(matched_stats, total_keyword_hits)
 
-        # 4. 가중치 조회
-        weights_from_db = db.query(BaumannWeights).filter(BaumannWeights.skin_type == request.skin_type).all()
-        if not weights_from_db:
+        weights_by_type = load_all_weights(db)
+        if not weights_by_type:
             raise HTTPException(status_code=404, detail="피부 타입 가중치를 DB에서 찾을 수 없습니다.")
-        user_weights_dict = {}
-        for w in weights_from_db:
-            user_weights_dict[w.keyword] = {
-                "importance": w.importance,
-                "target_range": [w.target_min, w.target_max]
-            }
-
-        # 5. 점수 계산
-        final_score, breakdown = calculate_score_final(ratios, user_weights_dict)
-        # === 점수 소프트 캡 적용 (히트/신뢰도 기반) ===
-        final_score = apply_soft_caps_by_hits(final_score, total_keyword_hits, reliability)
 
-        # ✅ 6. 시스템 주의 성분 (검증된 원문 사용)
-        caution_ingredients = query_caution_ingredients(all_matched_ingredients, db)
+        # (1 × 6) 비율 × (16 × 6) 가중치 → 16개 점수 한 번에
+        skin_types, imp, tmin, tmax = weights_to_arrays(weights_by_type)
+        result = score_matrix(ratios_to_matrix([ratios]), imp, tmin, tmax)
+        capped = apply_soft_caps(result["final"], np.array([total_keyword_hits]))
 
-        # ✅ 7. 사용자 주의 성분 매칭 (정규화 교집합, 검증된 원문 사용) 및 -40 즉시 감점
         user_cautions = query_user_caution_ingredients(request.user_id, all_matched_ingredients, db)
-        score_before = final_score
-        has_user_caution = False
-        warning_message = None
-        modal_variant = None
-        if user_cautions:
-            has_user_caution = True
-            final_score = max(0, final_score - 40)
-            warning_message = "선택하신 주의 성분이 포함되어 있습니다."
-            modal_variant = "danger"
+        penalty = 40 if user_cautions else 0
+
+        scores = []
+        for s, st in enumerate(skin_types):
+            score_before = int(capped[0, s])
+            scores.append({
+                "skin_type": st,
+                "score_before": score_before,
+                "final_score": max(0, score_before - penalty),
+                "contributions": {
+                    kw: round(float(result["contribution"][0, s, k]), 2) for k, kw in enumerate(KEYWORDS)
+                },
+            })
+        scores.sort(key=lambda x: x["final_score"], reverse=True)
 
-        # 8. 텍스트 분석 (주의 성분 개수 전달: 시스템 주의 기준)
-        analysis_texts = generate_analysis_text(request.skin_type, final_score, breakdown, len(caution_ingredients))
-        # 저신뢰 경고 문구를 종합 의견 앞에 덧붙임
-        if reliability == "low":
-            analysis_texts["opinion"] = prepend_low_reliability_warning(analysis_texts["opinion"])
+        unique_matched_set = set()
+        for ing_list in matched_stats.values():
+            unique_matched_set.update(ing_list)
 
-        # 9. JSON 반환
         return {
             "product_info": {
                 "name": product.get('product_name', 'N/A'),
                 "category": product.get('category', 'N/A'),
-                "total_count": actual_total_count,  # 실제 성분 개수
-                "matched_count": unique_matched_count
+                "total_count": len(all_matched_ingredients),
+                "matched_count": len(unique_matched_set)
             },
             "meta": {
                 "reliability": reliability,
                 "total_keyword_hits": total_keyword_hits
             },
-
-            "skin_type": request.skin_type,
-            "score_before": score_before,
-            "final_score": final_score,
-            "has_user_caution": has_user_caution,
+            "ratios": ratios,
+            "has_user_caution": bool(user_cautions),
             "user_caution": [{"korean_name": n} for n in user_cautions],
-            "warning_message": warning_message,
-            "modal_variant": modal_variant,
-            "charts": { "ratios": ratios, "breakdown": breakdown },
-            "analysis": analysis_texts,
-            "ingredients": {
-                "matched": matched_details,
-                "unmatched": unmatched,
-                "caution": caution_ingredients  # 시스템 주의 성분
-            }
+            "best_skin_type": scores[0]["skin_type"] if scores else None,
+            "scores": scores
         }
 
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ /api/analyze 서버 오류: {e}")
+        print(f"❌ /api/analyze/all-types 서버 오류: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
@@ -620,95 +1181,38 @@ def analyze_product_api(request: AnalysisRequest, db: Session = Depends(get_db))
 # [신규] OCR 기능 추가 (기존 기능과 독립적)
 # ============================================
 
-# Google Vision API 클라이언트 초기화
+# Google Vision API 클라이언트 (프로세스당 1개 재사용: services/ocr_pipeline.py)
 def get_vision_client():
-    """Google Vision API 클라이언트 생성"""
+    """Google Vision API 클라이언트 (싱글톤)"""
     try:
-        credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-        if not credentials_path:
-            raise Exception("GOOGLE_APPLICATION_CREDENTIALS가 설정되지 않았습니다.")
-
-        if not os.path.isabs(credentials_path):
-            base_dir = os.path.dirname(os.path.dirname(__file__))
-            credentials_path = os.path.join(base_dir, credentials_path)
-
-        return vision.ImageAnnotatorClient.from_service_account_json(credentials_path)
+        return ocr_pipeline.get_vision_client()
     except Exception as e:
         print(f"❌ Vision API 클라이언트 생성 실패: {e}")
         raise HTTPException(status_code=500, detail=f"Vision API 설정 오류: {e}")
 
 def extract_text_from_image_bytes(image_bytes: bytes) -> str:
-    """이미지 바이트에서 OCR 텍스트 추출 (Google Vision API)"""
+    """이미지 바이트에서 OCR 텍스트 추출 (Google Vision API, 블로킹 → executor에서 호출)"""
+    get_vision_client()
     try:
-        client = get_vision_client()
-        image = vision.Image(content=image_bytes)
-        response = client.text_detection(image=image)
-
-        if response.error.message:
-            raise Exception(f"Vision API 오류: {response.error.message}")
-
-        texts = response.text_annotations
-        if texts:
-            return texts[0].description
-        else:
-            return ""
+        return ocr_pipeline.detect_text(image_bytes)
     except Exception as e:
         print(f"❌ OCR 텍스트 추출 실패: {e}")
         raise HTTPException(status_code=500, detail=f"OCR 처리 오류: {e}")
 
 def extract_ingredients_from_ocr_with_db(full_text: str, db: Session) -> str:
     """
-    OCR 텍스트에서 '전체 성분 후보'를 최대한 보존한다.
-    - KCIA.name_normalized ∈ 정규화토큰집합 → 포함
-    - ingredients.korean_name ∈ 원문토큰집합 → 포함(국문 정확일치)
-    결과: 중복 제거한 원문 표기를 콤마로 반환
+    OCR 텍스트에서 '전체 성분 후보'를 최대한 보존한다. (DB 대신 성분 사전 사용)
+    - 여러 단어에 걸친 성분명("하이드롤라이즈드 콜라겐", "1,2-헥산다이올")까지
+      n-gram 최장 일치로 한 번에 추출 (services/ingredient_matcher.py)
+    - 대상: KCIA.name_normalized ∪ ingredients.korean_name (정규화 일치)
+    결과: 중복 제거한 성분명을 OCR_JOIN_SEP(', ')로 이어 반환 (성분명 안의 콤마 보존)
     """
     try:
-        # 1) 토큰화 & 전처리
-        words = re.findall(r'[가-힣a-zA-Z0-9\-]+', full_text)
-        words = [w for w in words if len(w) >= 2]
-        if not words:
-            return ""
-
-        normalized_words = []
-        original_map = {}
-        for w in words:
-            n = normalize_name(w)
-            if n:
-                normalized_words.append(n)
-                if n not in original_map:
-                    original_map[n] = w
-
-        if not normalized_words:
+        result = extract_ingredient_names(full_text)
+        if not result:
             return ""
 
-        unique_norm = list(set(normalized_words))
-        words_set = set(words)  # 국문 정확일치용
-
-        # 2) KCIA 정규화 매칭
-        kcia_rows = db.query(KCIAIngredients.name_normalized).filter(
-            KCIAIngredients.name_normalized.in_(unique_norm)
-        ).distinct().all()
-        kcia_norm_set = {row[0] for row in kcia_rows}
-
-        # 3) ingredients 국문 정확 일치
-        ing_rows = db.query(Ingredients.korean_name).filter(
-            Ingredients.korean_name.in_(words_set)
-        ).distinct().all()
-        ing_exact_set = {row[0] for row in ing_rows}
-
-        # 4) 최종 후보 구성: (KCIA 정규화) ∪ (ingredients 국문 정확일치)
-        result = []
-        seen = set()
-        for w in words:
-            n = normalize_name(w)
-            if (n in kcia_norm_set) or (w in ing_exact_set):
-                key = n if (n in kcia_norm_set) else f"EXACT::{w}"
-                if key not in seen:
-                    result.append(w)
-                    seen.add(key)
-
-        ingredients_str = ', '.join(result)
+        ingredients_str = join_ocr_names(result)
         print(f"[DEBUG] OCR 전체 성분 후보 포함: {len(result)}개")
         return ingredients_str
 
@@ -725,9 +1229,15 @@ def top_products_api(
     limit: int = 4,
     db: Session = Depends(get_db)
 ):
+    # 0) 사전 계산된 적합도 테이블 (점수 인덱스 범위 조회 + 사용자 감점)
+    items = read_top_fit_scores(category, skin_type, user_id, db)
+    if items is not None:
+        items.sort(key=lambda x: x["final_score"], reverse=True)
+        return {"items": items[:max(1, min(limit, 20))]}
+
     # 1) 카테고리 느슨 매칭 + p_ingredients 공란 제거
     rows = db.query(
-        ProductData.product_name, ProductData.category, ProductData.p_ingredients
+        ProductData.pid, ProductData.product_name, ProductData.category, ProductData.p_ingredients
     ).filter(
         func.length(func.trim(ProductData.p_ingredients)) > 0,
         ProductData.category.ilike(category)
@@ -736,62 +1246,120 @@ def top_products_api(
     if not rows:
         like_key = f"%{category.strip()}%"
         rows = db.query(
-            ProductData.product_name, ProductData.category, ProductData.p_ingredients
+            ProductData.pid, ProductData.product_name, ProductData.category, ProductData.p_ingredients
         ).filter(
             func.length(func.trim(ProductData.p_ingredients)) > 0,
             ProductData.category.like(like_key)
         ).limit(500).all()
 
-    items = []
-    for name, cat, ing_str in rows:
-        # 재사용: 기존 점수 계산 로직
-        matched_details, matched_stats, unmatched, _ = match_ingredients(ing_str, db)
-        total_keyword_hits = len(matched_details)
-        reliability = classify_reliability(total_keyword_hits)
-        ratios = calculate_keyword_ratios(matched_stats, total_keyword_hits)
+    # 2) 배치 채점 (가중치/사용자 주의/성분 keyword 조회는 요청당 1회)
+    items = score_products_batch(rows, skin_type, user_id, db)
 
-        weights = db.query(BaumannWeights).filter(
-            BaumannWeights.skin_type == skin_type
-        ).all()
-        if not weights:
-            continue
+    # 점수 내림차순 상위 N개
+    items.sort(key=lambda x: x["final_score"], reverse=True)
+    return {"items": items[:max(1, min(limit, 20))]}
 
-        user_weights_dict = {
-            w.keyword: {"importance": w.importance, "target_range": [w.target_min, w.target_max]}
-            for w in weights
-        }
+def analyze_ocr_text(full_text: str, skin_type: str, user_id: int | None, db: Session, filename: str = "N/A") -> dict:
+    """OCR 텍스트 → 분석 결과 (동기 DB 작업 포함, executor에서 호출)"""
+    ingredients_str = extract_ingredients_from_ocr_with_db(full_text, db)
 
-        final_score, breakdown = calculate_score_final(ratios, user_weights_dict)
-        score_before = final_score
+    if not ingredients_str:
+        raise HTTPException(status_code=400, detail="이미지에서 화장품 성분을 찾을 수 없습니다.")
 
-        # === 점수 소프트 캡 적용 (히트/신뢰도 기반) ===
-        final_score = apply_soft_caps_by_hits(final_score, total_keyword_hits, reliability)
+    print(f"[DEBUG] 추출된 성분: {ingredients_str[:100]}...")
 
-        # 사용자 주의 감점
-        ingredients_list = [s.strip().strip('"') for s in ing_str.split(',') if s.strip()]
-        user_cautions = query_user_caution_ingredients(user_id, ingredients_list, db)
-        if user_cautions:
-            final_score = max(0, final_score - 40)
+    # 키워드/목적 매칭
+    matched_details, matched_stats, unmatched, total_count = match_ingredients(
+        ingredients_str, db, sep=OCR_JOIN_SEP
+    )
 
-        # very_low(히트 0)은 제외, 1~2는 남겨서 ‘저신뢰’로 표기
-        if reliability == "very_low" and total_keyword_hits == 0:
-            continue
+    # ✅ OCR도 '검증된 원문' 사용
+    all_matched_ingredients = match_all_ingredients(ingredients_str, db, sep=OCR_JOIN_SEP)
+    actual_total_count = len(all_matched_ingredients)
 
-        items.append({
-            "product_name": name,
-            "category": cat,
-            "final_score": max(final_score, 0),
-            "score_before": score_before,
-            "has_user_caution": bool(user_cautions),
-            "user_caution": [{"korean_name": n} for n in user_cautions],
-            "matched_count": len(set(sum(matched_stats.values(), []))),
-            "total_keyword_hits": total_keyword_hits,
-            "reliability": reliability
-        })
+    total_keyword_hits = len(matched_details)
+    reliability = classify_reliability(total_keyword_hits)
+    if reliability == "low":
+        print(f"[WARN] low reliability (ocr): hits={total_keyword_hits}, file={filename}")
+
+    if reliability == "very_low":
+        raise HTTPException(
+            status_code=400,
+            detail=f"분석 중단: OCR 매칭 성분이 {total_keyword_hits}개로 매우 적습니다. 성분표를 더 선명하게 촬영해 다시 시도해주세요."
+        )
+
+    ratios = calculate_keyword_ratios(matched_stats, total_keyword_hits)
+
+    weights_from_db = db.query(BaumannWeights).filter(
+        BaumannWeights.skin_type == skin_type
+    ).all()
+
+    if not weights_from_db:
+        raise HTTPException(status_code=404, detail="피부 타입 가중치를 찾을 수 없습니다.")
+
+    user_weights_dict = {}
+    for w in weights_from_db:
+        user_weights_dict[w.keyword] = {
+            "importance": w.importance,
+            "target_range": [w.target_min, w.target_max]
+        }
+
+    final_score, breakdown = calculate_score_final(ratios, user_weights_dict)
+    # === 점수 소프트 캡 적용 (히트/신뢰도 기반) ===
+    final_score = apply_soft_caps_by_hits(final_score, total_keyword_hits, reliability)
+
+    # ✅ 시스템 주의 성분 (검증된 원문 사용)
+    caution_ingredients = query_caution_ingredients(all_matched_ingredients, db)
+
+    # ✅ 사용자 주의 성분(정규화 교집합, 검증된 원문 사용) 및 -40 즉시 감점
+    user_cautions = query_user_caution_ingredients(user_id, all_matched_ingredients, db)
+    score_before = final_score
+    has_user_caution = False
+    warning_message = None
+    modal_variant = None
+    if user_cautions:
+        has_user_caution = True
+        final_score = max(0, final_score - 40)
+        warning_message = "선택하신 주의 성분이 포함되어 있습니다."
+        modal_variant = "danger"
+
+    analysis_texts = generate_analysis_text(skin_type, final_score, breakdown, len(caution_ingredients))
+    if reliability == "low":
+        analysis_texts["opinion"] = prepend_low_reliability_warning(analysis_texts["opinion"])
+
+    unique_matched_set = set()
+    for ing_list in matched_stats.values():
+        unique_matched_set.update(ing_list)
+    unique_matched_count = len(unique_matched_set)
+
+    return {
+        "product_info": {
+            "name": "업로드한 이미지",
+            "category": "이미지 분석",
+            "total_count": actual_total_count,  # 실제 성분 개수
+            "matched_count": unique_matched_count
+        },
+        "meta": {
+            "reliability": reliability,
+            "total_keyword_hits": total_keyword_hits
+        },
+
+        "skin_type": skin_type,
+        "score_before": score_before,
+        "final_score": final_score,
+        "has_user_caution": has_user_caution,
+        "user_caution": [{"korean_name": n} for n in user_cautions],
+        "warning_message": warning_message,
+        "modal_variant": modal_variant,
+        "charts": { "ratios": ratios, "breakdown": breakdown },
+        "analysis": analysis_texts,
+        "ingredients": {
+            "matched": matched_details,
+            "unmatched": unmatched,
+            "caution": caution_ingredients  # 시스템 주의 성분
+        }
+    }
 
-    # 점수 내림차순 상위 N개
-    items.sort(key=lambda x: x["final_score"], reverse=True)
-    return {"items": items[:max(1, min(limit, 20))]}
 
 @router.post("/api/analyze-ocr")
 async def analyze_ocr_image(
@@ -801,114 +1369,27 @@ async def analyze_ocr_image(
     db: Session = Depends(get_db)
 ):
     """[신규] 이미지 OCR을 통한 제품 분석 (주의 성분 + 사용자 주의 감점)"""
+    timings = ocr_pipeline.StageTimer()
     try:
-        content = await file.read()
-        full_text = extract_text_from_image_bytes(content)
+        # Vision 호출은 동시 처리 상한 안에서, 블로킹 단계는 executor로 (이벤트 루프 비차단)
+        async with ocr_pipeline.ocr_slot(timings):
+            t0 = time.perf_counter()
+            content = await file.read()
+            timings.add("read", (time.perf_counter() - t0) * 1000)
+            full_text = await timings.run("ocr", extract_text_from_image_bytes, content)
 
         if not full_text or len(full_text.strip()) < 10:
             raise HTTPException(status_code=400, detail="이미지에서 텍스트를 찾을 수 없습니다.")
 
         print(f"[DEBUG] OCR 전체 텍스트 길이: {len(full_text)} 문자")
 
-        ingredients_str = extract_ingredients_from_ocr_with_db(full_text, db)
-
-        if not ingredients_str:
-            raise HTTPException(status_code=400, detail="이미지에서 화장품 성분을 찾을 수 없습니다.")
-
-        print(f"[DEBUG] 추출된 성분: {ingredients_str[:100]}...")
-
-        # 키워드/목적 매칭
-        matched_details, matched_stats, unmatched, total_count = match_ingredients(
-            ingredients_str, db
+        result = await timings.run(
+            "analyze", analyze_ocr_text, full_text, skin_type, user_id, db,
+            getattr(file, 'filename', 'N/A')
         )
-
-        # ✅ OCR도 '검증된 원문' 사용
-        all_matched_ingredients = match_all_ingredients(ingredients_str, db)
-        actual_total_count = len(all_matched_ingredients)
-
-        total_keyword_hits = len(matched_details)
-        reliability = classify_reliability(total_keyword_hits)
-        if reliability == "low":
-            print(f"[WARN] low reliability (ocr): hits={total_keyword_hits}, file={getattr(file,'filename', 'N/A')}")
-
-        if reliability == "very_low":
-            raise HTTPException(
-                status_code=400,
-                detail=f"분석 중단: OCR 매칭 성분이 {total_keyword_hits}개로 매우 적습니다. 성분표를 더 선명하게 촬영해 다시 시도해주세요."
-            )
-
-        ratios = calculate_keyword_ratios(matched_stats, total_keyword_hits)
-
-        weights_from_db = db.query(BaumannWeights).filter(
-            BaumannWeights.skin_type == skin_type
-        ).all()
-
-        if not weights_from_db:
-            raise HTTPException(status_code=404, detail="피부 타입 가중치를 찾을 수 없습니다.")
-
-        user_weights_dict = {}
-        for w in weights_from_db:
-            user_weights_dict[w.keyword] = {
-                "importance": w.importance,
-                "target_range": [w.target_min, w.target_max]
-            }
-
-        final_score, breakdown = calculate_score_final(ratios, user_weights_dict)
-        # === 점수 소프트 캡 적용 (히트/신뢰도 기반) ===
-        final_score = apply_soft_caps_by_hits(final_score, total_keyword_hits, reliability)
-
-        # ✅ 시스템 주의 성분 (검증된 원문 사용)
-        caution_ingredients = query_caution_ingredients(all_matched_ingredients, db)
-
-        # ✅ 사용자 주의 성분(정규화 교집합, 검증된 원문 사용) 및 -40 즉시 감점
-        user_cautions = query_user_caution_ingredients(user_id, all_matched_ingredients, db)
-        score_before = final_score
-        has_user_caution = False
-        warning_message = None
-        modal_variant = None
-        if user_cautions:
-            has_user_caution = True
-            final_score = max(0, final_score - 40)
-            warning_message = "선택하신 주의 성분이 포함되어 있습니다."
-            modal_variant = "danger"
-
-        analysis_texts = generate_analysis_text(skin_type, final_score, breakdown, len(caution_ingredients))
-        if reliability == "low":
-            analysis_texts["opinion"] = prepend_low_reliability_warning(analysis_texts["opinion"])
-
-        unique_matched_set = set()
-        for ing_list in matched_stats.values():
-            unique_matched_set.update(ing_list)
-        unique_matched_count = len(unique_matched_set)
-
-        return {
-            "product_info": {
-                "name": "업로드한 이미지",
-                "category": "이미지 분석",
-                "total_count": actual_total_count,  # 실제 성분 개수
-                "matched_count": unique_matched_count
-            },
-            "meta": {
-                "reliability": reliability,
-                "total_keyword_hits": total_keyword_hits
-            },
-
-            "skin_type": skin_type,
-            "score_before": score_before,
-            "final_score": final_score,
-            "has_user_caution": has_user_caution,
-            "user_caution": [{"korean_name": n} for n in user_cautions],
-            "warning_message": warning_message,
-            "modal_variant": modal_variant,
-            "charts": { "ratios": ratios, "breakdown": breakdown },
-            "analysis": analysis_texts,
-            "ingredients": {
-                "matched": matched_details,
-                "unmatched": unmatched,
-                "caution": caution_ingredients  # 시스템 주의 성분
-            }
-        }
-
+        result["meta"]["timings_ms"] = timings.as_dict()
+        print(f"[OCR_TIMING] /api/analyze-ocr {result['meta']['timings_ms']}")
+        return result
 
     except HTTPException as he:
         raise he
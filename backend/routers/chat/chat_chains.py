@@ -15,7 +15,12 @@ from .recommender_core import (
     generate_general_answer,
     build_presented,
     stream_finalize_from_rag_texts,
+    embed_query,
+    strict_category_from_query,
+    STRICT_CATEGORY_MODE,
 )
+from .semantic_cache import answer_with_semantic_cache
+from services.intent_classifier import classify_local
 
 
 # ─────────────────────────────────────────────────────
@@ -32,9 +37,34 @@ def _parse_query(state: Dict[str, Any]) -> Dict[str, Any]:
     반환: {"user_query": str, "intent": ..., "parsed": {...}}
     """
     q = state["user_query"]
-    analyzed = analyze_with_llm(q)  # { "intent": ..., "parsed": {...} }
 
-    log_event("intent_decided_by_chain", intent=analyzed["intent"], parsed=analyzed["parsed"])
+    # 1) 로컬 분류기가 GENERAL을 확신하면 LLM 라우터 호출 생략
+    local = classify_local(q)
+    if local is not None and local[0] == "GENERAL":
+        analyzed = {
+            "intent": "GENERAL",
+            "parsed": {
+                "brand": None,
+                "category": strict_category_from_query(q) if STRICT_CATEGORY_MODE else None,
+                "ingredients": [],
+                "features": [],
+                "price_range": (None, None),
+            },
+        }
+        decided_by = "local"
+    else:
+        # 2) 저신뢰 구간/PRODUCT_FIND 후보 → 기존 LLM 라우터가 의도+파싱 결정
+        analyzed = analyze_with_llm(q)  # { "intent": ..., "parsed": {...} }
+        decided_by = "llm"
+
+    log_event(
+        "intent_decided_by_chain",
+        query=q,
+        intent=analyzed["intent"],
+        parsed=analyzed["parsed"],
+        decided_by=decided_by,
+        p_general=round(local[1], 4) if local is not None else None,
+    )
     return {**state, **analyzed}
 
 
@@ -47,7 +77,7 @@ ParseQueryChain: RunnableSequence = RunnableLambda(_wrap_input) | RunnableLambda
 def _routing_retrieval(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     state: {"user_query": str, "intent": ..., "parsed": {...}}
-    반환: {"user_query", "intent", "parsed", "normalized", "results", "message"}
+    반환: {"user_query", "intent", "parsed", "normalized", "results", "candidates", "message"}
     """
     q = state["user_query"]
     parsed = state["parsed"]
@@ -60,6 +90,7 @@ def _routing_retrieval(state: Dict[str, Any]) -> Dict[str, Any]:
         "normalized": out.get("normalized"),
         "results": out.get("results") or [],
         "message": out.get("message"),
+        "candidates": out.get("candidates") or [],
     }
 
 
@@ -91,10 +122,11 @@ RetrievalChain: RunnableSequence = RoutingChain | BuildPresentedChain
 def _general_answer_chain(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     GENERAL 의도일 때: LLM 설명 텍스트 생성.
+    - 비슷한 질문의 이전 답변이 시맨틱 캐시에 있으면 LLM 호출 없이 재사용
     state: {"user_query": ..., "intent": "GENERAL", "parsed": {...}}
     """
     q = state["user_query"]
-    txt = generate_general_answer(q)
+    txt = answer_with_semantic_cache(q, embed_query, generate_general_answer, log_event)
 
     return {
         **state,
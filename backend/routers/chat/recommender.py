@@ -6,14 +6,30 @@
 """
 
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from .recommender_core import (
     log_event,
     stream_finalize_from_rag_texts,
+    search_pipeline_from_parsed,
+    build_presented,
+    hydrate_cards,
+    hydrate_rows,
+    parse_refinement,
+    merge_refinement,
+    filter_candidates,
+    sort_candidates,
+    Candidate,
+    PRESENTED_TOP_N,
 )
 from .chat_chains import MainChain  # ✅ 네가 만든 체인 import
 
+NO_RESULTS_MESSAGE = (
+    "죄송합니다. 조건에 맞는 제품을 찾을 수 없습니다.\n"
+    "입력 조건이 너무 좁거나 데이터베이스에 제품이 없을 수 있어요.\n"
+    "브랜드, 성분, 가격 등의 필터를 조금 완화해보세요."
+)
+
 
 def run_product_core(user_query: str) -> Dict[str, Any]:
     """
@@ -32,7 +48,8 @@ def run_product_core(user_query: str) -> Dict[str, Any]:
           "intent": "PRODUCT_FIND",
           "parsed": {...},
           "normalized": {...},
-          "rows": [...],       # RDB 결과 (디버깅/후속 질의용)
+          "rows": [...],       # 최종 top-N만 hydrate한 RDB 결과 (요약/디버깅용)
+          "candidates": [...], # 랭킹된 전체 후보 (경량 Candidate, 후속 질의/더 보기용)
           "presented": [...],  # 추천 카드용 상위 5개 구조
           "message": str | None
         }
@@ -58,6 +75,7 @@ def run_product_core(user_query: str) -> Dict[str, Any]:
             "parsed": state.get("parsed"),
             "normalized": None,
             "rows": [],
+            "candidates": [],
             "presented": [],
             "message": None,
         }
@@ -66,11 +84,12 @@ def run_product_core(user_query: str) -> Dict[str, Any]:
     # (2) PRODUCT_FIND → 검색 결과 사용
     # ---------------------------
     rows: List[Dict[str, Any]] = state.get("results") or []
+    candidates: List[Candidate] = state.get("candidates") or []
     presented: List[Dict[str, Any]] = state.get("presented") or []
 
     log_event(
         "search_done_by_chain",
-        result_count=len(rows),
+        result_count=len(candidates),
         presented_count=len(presented),
     )
 
@@ -84,12 +103,9 @@ def run_product_core(user_query: str) -> Dict[str, Any]:
             "parsed": state.get("parsed"),
             "normalized": state.get("normalized"),
             "rows": [],
+            "candidates": [],
             "presented": [],
-            "message": (
-                "죄송합니다. 조건에 맞는 제품을 찾을 수 없습니다.\n"
-                "입력 조건이 너무 좁거나 데이터베이스에 제품이 없을 수 있어요.\n"
-                "브랜드, 성분, 가격 등의 필터를 조금 완화해보세요."
-            ),
+            "message": NO_RESULTS_MESSAGE,
         }
 
     # Top5 디버깅용 로그 (기존과 동일)
@@ -114,11 +130,111 @@ def run_product_core(user_query: str) -> Dict[str, Any]:
         "parsed": state.get("parsed"),
         "normalized": state.get("normalized"),
         "rows": rows,
+        "candidates": candidates,
         "presented": presented,
         "message": state.get("message"),
     }
 
 
+def run_product_refine(user_query: str, cached: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    cache_key로 이전 PRODUCT_FIND 결과가 넘어온 후속 질의("더 저렴한 걸로", "무향으로") 처리.
+
+    - 질의가 가격/카테고리/제외 성분만 좁히면 캐시된 rows를 메모리에서 필터 + 가격 규칙 재정렬
+      (LLM 파싱, 임베딩, 벡터 검색 모두 생략)
+    - 후보군이 바닥나거나 카테고리가 바뀌면 합친 조건으로 search_pipeline_from_parsed 재실행
+    - refinement로 볼 수 없으면 None → 호출측에서 run_product_core로 새 검색
+
+    반환 형식은 run_product_core의 PRODUCT_FIND 결과와 같다.
+    """
+    if cached.get("intent") != "PRODUCT_FIND" or not cached.get("parsed"):
+        return None
+    refine = parse_refinement(user_query)
+    if refine is None:
+        return None
+
+    t0 = time.time()
+    merged, tightening = merge_refinement(cached["parsed"], refine, cached.get("presented"))
+    has_features = bool(merged.get("features"))
+    pool: List[Candidate] = cached.get("candidates") or []
+    normalized = {**(cached.get("normalized") or {}), "category": merged.get("category")}
+
+    cands: List[Candidate] = []
+    rows: List[Dict[str, Any]] = []
+    if tightening:
+        cands = filter_candidates(pool, merged)
+        sort_candidates(cands, merged.get("price_range"), has_features)
+        rows = hydrate_rows(cands[:PRESENTED_TOP_N])
+        log_event(
+            "refine_in_memory",
+            query=user_query,
+            pool=len(pool),
+            result_count=len(cands),
+            price_range=merged.get("price_range"),
+            category=merged.get("category"),
+            exclude=merged.get("exclude_ingredients"),
+        )
+
+    if not cands:
+        # 후보군 소진(또는 조건 이동) → 합친 조건으로 전체 검색 (의도 파싱 LLM 호출은 생략)
+        out = search_pipeline_from_parsed(merged, user_query)
+        cands = out.get("candidates") or []
+        rows = out.get("results") or []
+        normalized = out.get("normalized") or normalized
+        log_event(
+            "refine_fallback_search",
+            query=user_query,
+            tightening=tightening,
+            result_count=len(cands),
+        )
+
+    presented = build_presented(rows) if rows else []
+    log_event("refine_done", ms=int((time.time() - t0) * 1000))
+
+    return {
+        "intent": "PRODUCT_FIND",
+        "text": "",
+        "parsed": merged,
+        "normalized": normalized,
+        "rows": rows,
+        "candidates": cands,
+        "presented": presented,
+        "message": None if rows else NO_RESULTS_MESSAGE,
+    }
+
+
+def run_product_page(cached: Dict[str, Any], offset: int, size: int) -> List[Dict[str, Any]]:
+    """
+    캐시된 PRODUCT_FIND 결과의 랭킹 후보에서 [offset, offset+size) 구간을 카드로 반환.
+
+    - 첫 페이지(presented)는 recommend 시점에 이미 만들어져 있으므로 그대로 재사용
+    - 그 외 구간은 요청 시점에만 hydrate_rows + hydrate_cards
+      (상세 필드 1회 + 성분 등급 1회 조회, LLM/벡터 호출 없음)
+    - 한 번 만든 페이지는 캐시 항목의 "pages"에 보관해 재요청 시 비용 0
+    """
+    pool: List[Candidate] = cached.get("candidates") or []
+    end = min(offset + size, len(pool))
+    if offset >= end:
+        return []
+
+    presented: List[Dict[str, Any]] = cached.get("presented") or []
+    if end <= len(presented):
+        return presented[offset:end]
+
+    pages: Dict[Any, List[Dict[str, Any]]] = cached.setdefault("pages", {})
+    key = (offset, end)
+    if key not in pages:
+        t0 = time.time()
+        pages[key] = hydrate_cards(hydrate_rows(pool[offset:end]))
+        log_event(
+            "page_hydrated",
+            offset=offset,
+            size=end - offset,
+            ms=int((time.time() - t0) * 1000),
+        )
+    return pages[key]
+
+
 def run_product_finalize(user_query: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     요약 전용 엔트리 (동기 JSON 응답).
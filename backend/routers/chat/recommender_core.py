@@ -30,6 +30,7 @@ from db import (
     INGREDIENT_NAME_INDEX,      # "ingredients-name"
     BRAND_NAME_INDEX,           # "brand-name"
 )
+from services.ingredient_kb import get_kb
 
 # =============================================================================
 # Pinecone 인덱스
@@ -71,6 +72,10 @@ DEFAULT_TOPK_NO_FILTER    = 250   # feature-only
 DEFAULT_TOPK_WITH_FILTER  = 800   # feature + 필터
 MAX_TOPK                  = 1000
 
+# 검색 1회당 랭킹까지 마친 후보 rows 수 (캐시에 보관되어 "더 보기" 페이지네이션 대상이 됨)
+CANDIDATE_POOL_LIMIT      = 30
+PRESENTED_TOP_N           = 5
+
 def decide_top_k(has_features: bool, has_hardfilter: bool) -> int:
     if not has_features:
         return 0
@@ -351,25 +356,53 @@ def _normalize_ingredients(val) -> List[str]:
 
 
 def fetch_ingredient_grades(names: List[str]) -> Dict[str, Optional[str]]:
+    """ingredients.caution_grade (프로세스 공용 성분 사전 조회, DB 왕복 없음)"""
     if not names:
         return {}
-    sql = text(
-        """
-        SELECT korean_name, caution_grade
-        FROM ingredients
-        WHERE korean_name IN :names
-    """
-    ).bindparams(bindparam("names", expanding=True))
-    with engine.connect() as conn:
-        rows = conn.execute(
-            sql, {"names": tuple(sorted(set(names)))}
-        ).mappings().all()
-    return {r["korean_name"]: r["caution_grade"] for r in rows}
+    kb = get_kb()
+    return {n: kb.grade(n) for n in set(names) if kb.has_ingredient(n)}
 
 
 # =============================================================================
 # 3) RDB 유틸
 # =============================================================================
+class Candidate:
+    """
+    필터링/정렬 단계에서만 쓰는 경량 후보 레코드.
+    - rag_text/ingredients 같은 무거운 텍스트는 최종 top-N에서만 hydrate_rows로 조회
+    """
+    __slots__ = ("pid", "score", "price_krw", "review_count", "category")
+
+    def __init__(
+        self,
+        pid: int,
+        score: float = 0.0,
+        price_krw: Optional[int] = None,
+        review_count: Optional[int] = None,
+        category: Optional[str] = None,
+    ):
+        self.pid = int(pid)
+        self.score = float(score)
+        self.price_krw = int(price_krw) if price_krw is not None else None
+        self.review_count = int(review_count) if review_count is not None else None
+        self.category = category
+
+    def __repr__(self) -> str:
+        return f"Candidate(pid={self.pid}, score={self.score:.4f}, price={self.price_krw})"
+
+
+def _to_candidates(rows) -> List[Candidate]:
+    return [
+        Candidate(
+            r["pid"],
+            price_krw=r["price_krw"],
+            review_count=r["review_count"],
+            category=r["category"],
+        )
+        for r in rows
+    ]
+
+
 def rdb_filter(
     candidate_pids: Optional[List[int]],
     brand: Optional[str],
@@ -377,7 +410,7 @@ def rdb_filter(
     price_range: Optional[Tuple[Optional[int], Optional[int]]],
     category: Optional[str],
     limit: int = 30,
-) -> List[Dict]:
+) -> List[Candidate]:
     candidate_pids = candidate_pids or []
     ingredient_ids = ingredient_ids or []
     minp, maxp = price_range or (None, None)
@@ -412,24 +445,12 @@ def rdb_filter(
 
     where_sql = " AND ".join(where_clauses)
 
-    if minp is None and maxp is None:
-        # 가격 필터가 없으면 review_count DESC
-        order_sql = "ORDER BY p.review_count DESC, p.pid ASC"
-    else:
-        # 기존 기본 정렬 (가격 오름차순)
-        order_sql = "ORDER BY (p.price_krw IS NULL) ASC, p.price_krw ASC, p.pid"
-
+    # 후보 단계에서는 정렬/필터에 필요한 컬럼만 조회 (rag_text/ingredients는 hydrate_rows에서)
     sql = text(
         f"""
-        SELECT p.pid, 
-            MAX(p.brand) as brand,
-            MAX(p.product_name) as product_name,
+        SELECT p.pid,
             MAX(p.price_krw) as price_krw,
             MAX(p.category) as category,
-            MAX(p.rag_text) as rag_text,
-            MAX(p.image_url) as image_url,
-            MAX(p.product_url) as product_url,
-            MAX(p.ingredients) as ingredients,
             MAX(p.review_count) as review_count
         FROM product_data_chain AS p
         LEFT JOIN product_ingredient_map AS m ON m.product_pid = p.pid
@@ -448,17 +469,36 @@ def rdb_filter(
     try:
         with engine.connect() as conn:
             rows = conn.execute(sql, params).mappings().all()
-            items = []
-            for r in rows:
-                d = dict(r)
-                d["ingredients"] = _normalize_ingredients(d.pop("ingredients", None))
-                items.append(d)
-        return items
+        return _to_candidates(rows)
     except Exception as e:
         log_event("rdb_filter_error", error=str(e))
         return []
 
 
+def rdb_fetch_candidates(pids: List[int], limit: int = 30) -> List[Candidate]:
+    """pid 순서를 유지한 경량 후보 조회."""
+    if not pids:
+        return []
+    sql = text(
+        """
+        SELECT p.pid, p.price_krw, p.category, p.review_count
+        FROM product_data_chain AS p
+        WHERE p.pid IN :pids
+        LIMIT :limit
+    """
+    ).bindparams(bindparam("pids", expanding=True))
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                sql, {"pids": tuple(pids), "limit": limit}
+            ).mappings().all()
+        by_pid = {c.pid: c for c in _to_candidates(rows)}
+        return [by_pid[pid] for pid in pids if pid in by_pid][:limit]
+    except Exception as e:
+        log_event("rdb_fetch_candidates_error", error=str(e))
+        return []
+
+
 def rdb_fetch_by_pids(pids: List[int], limit: int = 30) -> List[Dict]:
     if not pids:
         return []
@@ -489,6 +529,40 @@ def rdb_fetch_by_pids(pids: List[int], limit: int = 30) -> List[Dict]:
         return []
 
 
+def rdb_fetch_ingredients(pids: List[int]) -> Dict[int, List[str]]:
+    """제외 성분 필터용: pid → 성분 리스트 (다른 텍스트 컬럼은 조회하지 않음)."""
+    if not pids:
+        return {}
+    sql = text(
+        """
+        SELECT p.pid, p.ingredients
+        FROM product_data_chain AS p
+        WHERE p.pid IN :pids
+    """
+    ).bindparams(bindparam("pids", expanding=True))
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(sql, {"pids": tuple(pids)}).mappings().all()
+        return {int(r["pid"]): _normalize_ingredients(r["ingredients"]) for r in rows}
+    except Exception as e:
+        log_event("rdb_fetch_ingredients_error", error=str(e))
+        return {}
+
+
+def hydrate_rows(cands: List[Candidate]) -> List[Dict[str, Any]]:
+    """
+    최종 top-N 후보에 대해서만 카드/요약용 전체 필드를 한 번의 쿼리로 조회.
+    반환 rows는 기존 rows와 같은 dict 구조 (+ score).
+    """
+    if not cands:
+        return []
+    rows = rdb_fetch_by_pids([c.pid for c in cands], limit=len(cands))
+    score_by_pid = {c.pid: c.score for c in cands}
+    for r in rows:
+        r["score"] = score_by_pid.get(int(r["pid"]), 0.0)
+    return rows
+
+
 def rdb_fetch_rag_texts(pids: List[int]) -> List[Dict]:
     if not pids:
         return []
@@ -529,7 +603,87 @@ def is_info_scarce(parsed: Dict) -> bool:
 def _price_key(v: Optional[int]) -> int:
     return v if v is not None else 10**12
 
- 
+
+def sort_candidates(
+    cands: List[Candidate],
+    price_range: Optional[Tuple[Optional[int], Optional[int]]],
+    has_features: bool = False,
+) -> List[Candidate]:
+    """
+    가격 필터 기반 2차 정렬 (in-place).
+    - search_pipeline_from_parsed와 후속 질의(refinement)가 같은 규칙을 쓴다.
+    - feature 점수는 Candidate.score 사용
+    """
+    minp, maxp = price_range or (None, None)
+
+    # ① feature가 있는 경우 → score + 가격을 같이 반영
+    if has_features:
+        if maxp is not None and (minp is None or minp == 0):
+            # "n원 이하" → 비싼 제품 우선 + 그 안에서 score 높은 순
+            cands.sort(
+                key=lambda c: (
+                    c.price_krw is None,
+                    -(c.price_krw or 0),
+                    -c.score,
+                    c.pid,
+                )
+            )
+        elif minp is not None and (maxp is None or maxp == 0):
+            # "n원 이상" → 싼 제품 우선 + 그 안에서 score 높은 순
+            cands.sort(
+                key=lambda c: (
+                    c.price_krw is None,
+                    (c.price_krw or 0),
+                    -c.score,
+                    c.pid,
+                )
+            )
+        elif minp is not None and maxp is not None:
+            # 구간 중앙값에 가까운 순 + 그 안에서 score 높은 순
+            mid = (minp + maxp) / 2
+            cands.sort(
+                key=lambda c: (
+                    c.price_krw is None,
+                    abs((c.price_krw or mid) - mid),
+                    -c.score,
+                    c.pid,
+                )
+            )
+
+    # ② feature가 없는 경우 → 가격 기준만 사용
+    else:
+        if maxp is not None and (minp is None or minp == 0):
+            # "n원 이하" → 비싼 제품 우선
+            cands.sort(
+                key=lambda c: (
+                    c.price_krw is None,
+                    -(c.price_krw or 0),
+                    c.pid,
+                )
+            )
+        elif minp is not None and (maxp is None or maxp == 0):
+            # "n원 이상" → 싼 제품 우선
+            cands.sort(
+                key=lambda c: (
+                    c.price_krw is None,
+                    (c.price_krw or 0),
+                    c.pid,
+                )
+            )
+        elif minp is not None and maxp is not None:
+            # 구간 중앙값에 가까운 순
+            mid = (minp + maxp) / 2
+            cands.sort(
+                key=lambda c: (
+                    c.price_krw is None,
+                    abs((c.price_krw or mid) - mid),
+                    c.pid,
+                )
+            )
+
+    return cands
+
+
 def search_pipeline_from_parsed(
     parsed: Dict[str, Any], user_query: str, use_raw_for_features: bool = True
 ) -> Dict[str, Any]:
@@ -551,6 +705,7 @@ def search_pipeline_from_parsed(
                 "category": None,
             },
             "results": [],
+            "candidates": [],
             "message": "조금만 더 구체적으로 말씀해 주세요. 예) ‘브랜드: 라네즈, 나이아신아마이드 포함’ / ‘선크림, 2만원대, 끈적임 없음’",
         }
 
@@ -575,7 +730,7 @@ def search_pipeline_from_parsed(
 
     top_k = decide_top_k(has_features, has_hardfilter)
 
-    rows: List[Dict] = []
+    cands: List[Candidate] = []
     score_map: Dict[int, float] = {}
 
     # feature 텍스트는 한 번만 구성
@@ -584,7 +739,7 @@ def search_pipeline_from_parsed(
     # 2-A) ✅ 강한 필터 케이스 → RDB-first → Vector-second
     if use_rdb_first_strong:
         # 1) 먼저 RDB에서 구조적 필터 전부 적용해서 후보군 확보
-        rows = rdb_filter(
+        cands = rdb_filter(
             candidate_pids=None,
             brand=brand_norm,
             ingredient_ids=ingredient_ids,
@@ -593,9 +748,9 @@ def search_pipeline_from_parsed(
             limit=50,
         )
 
-        if rows:
+        if cands:
             # 2) 후보 pid 서브셋에 대해서만 feature 임베딩 기반 점수 계산
-            pid_subset = [int(r["pid"]) for r in rows]
+            pid_subset = [c.pid for c in cands]
 
             # 로컬에서 코사인 유사도 계산 (벡터 길이가 다르면 0 처리)
             import math
@@ -648,6 +803,8 @@ def search_pipeline_from_parsed(
                     _cosine_similarity(qvec, vvals)
                 )
 
+            for c in cands:
+                c.score = score_map.get(c.pid, 0.0)
 
             log_event(
                 "rdb_first_vector_second",
@@ -669,123 +826,53 @@ def search_pipeline_from_parsed(
         candidate_pids, score_map = dedup_keep_best(candidate_pids_raw, score_map_raw)
 
         if has_hardfilter:
-            rows = rdb_filter(
+            cands = rdb_filter(
                 candidate_pids=candidate_pids,
                 brand=brand_norm,
                 ingredient_ids=ingredient_ids,
                 price_range=parsed.get("price_range"),
                 category=parsed.get("category"),
-                limit=30,
+                limit=CANDIDATE_POOL_LIMIT,
             )
-
-            if rows:
-                rows.sort(
-                    key=lambda r: (
-                        -(score_map.get(int(r["pid"]), 0.0)),
-                        _price_key(r.get("price_krw")),
-                        int(r["pid"]),
-                    )
-                )
         else:
             if candidate_pids:
                 candidate_pids = sorted(
                     candidate_pids,
                     key=lambda pid: -(score_map.get(int(pid), 0.0)),
                 )
-                rows = rdb_fetch_by_pids(candidate_pids[:30], limit=30)
-                if rows:
-                    rows.sort(
-                        key=lambda r: (
-                            -(score_map.get(int(r["pid"]), 0.0)),
-                            _price_key(r.get("price_krw")),
-                            int(r["pid"]),
-                        )
-                    )
+                cands = rdb_fetch_candidates(
+                    candidate_pids[:CANDIDATE_POOL_LIMIT], limit=CANDIDATE_POOL_LIMIT
+                )
             else:
-                rows = []
+                cands = []
+
+        if cands:
+            for c in cands:
+                c.score = score_map.get(c.pid, 0.0)
+            cands.sort(key=lambda c: (-c.score, _price_key(c.price_krw), c.pid))
 
     # 3) feature가 없는 경우 → RDB-first (필터만으로 검색)
     if not has_features:
-        rows = rdb_filter(
+        cands = rdb_filter(
             candidate_pids=None,
             brand=brand_norm,
             ingredient_ids=ingredient_ids,
             price_range=parsed.get("price_range"),
             category=parsed.get("category"),
-            limit=30,
+            limit=CANDIDATE_POOL_LIMIT,
         )
 
+    # (후속 질의에서 넘어온) 제외 성분 조건
+    if cands and parsed.get("exclude_ingredients"):
+        cands = filter_candidates(cands, {"exclude_ingredients": parsed["exclude_ingredients"]})
+
     # 4) 가격 필터 기반 2차 정렬
-    if rows:
-        minp, maxp = parsed.get("price_range") or (None, None)
-
-        # ① feature가 있는 경우 → score + 가격을 같이 반영
-        if has_features:
-            def _score(pid: int) -> float:
-                return score_map.get(int(pid), 0.0)
-
-            if maxp is not None and (minp is None or minp == 0):
-                # "n원 이하" → 비싼 제품 우선 + 그 안에서 score 높은 순
-                rows.sort(
-                    key=lambda r: (
-                        r.get("price_krw") is None,
-                        -(r.get("price_krw") or 0),
-                        -_score(r["pid"]),
-                        int(r["pid"]),
-                    )
-                )
-            elif minp is not None and (maxp is None or maxp == 0):
-                # "n원 이상" → 싼 제품 우선 + 그 안에서 score 높은 순
-                rows.sort(
-                    key=lambda r: (
-                        r.get("price_krw") is None,
-                        (r.get("price_krw") or 0),
-                        -_score(r["pid"]),
-                        int(r["pid"]),
-                    )
-                )
-            elif minp is not None and maxp is not None:
-                # 구간 중앙값에 가까운 순 + 그 안에서 score 높은 순
-                mid = (minp + maxp) / 2
-                rows.sort(
-                    key=lambda r: (
-                        r.get("price_krw") is None,
-                        abs((r.get("price_krw") or mid) - mid),
-                        -_score(r["pid"]),
-                        int(r["pid"]),
-                    )
-                )
+    if cands:
+        sort_candidates(cands, parsed.get("price_range"), has_features)
 
-        # ② feature가 없는 경우 → 가격 기준만 사용
-        else:
-            if maxp is not None and (minp is None or minp == 0):
-                # "n원 이하" → 비싼 제품 우선
-                rows.sort(
-                    key=lambda r: (
-                        r.get("price_krw") is None,
-                        -(r.get("price_krw") or 0),
-                        int(r["pid"]),
-                    )
-                )
-            elif minp is not None and (maxp is None or maxp == 0):
-                # "n원 이상" → 싼 제품 우선
-                rows.sort(
-                    key=lambda r: (
-                        r.get("price_krw") is None,
-                        (r.get("price_krw") or 0),
-                        int(r["pid"]),
-                    )
-                )
-            elif minp is not None and maxp is not None:
-                # 구간 중앙값에 가까운 순
-                mid = (minp + maxp) / 2
-                rows.sort(
-                    key=lambda r: (
-                        r.get("price_krw") is None,
-                        abs((r.get("price_krw") or mid) - mid),
-                        int(r["pid"]),
-                    )
-                )
+    # 5) 최종 top-N만 무거운 필드(rag_text, ingredients 등) 조회
+    rows = hydrate_rows(cands[:PRESENTED_TOP_N])
+    log_event("candidate_pool", candidates=len(cands), hydrated=len(rows))
 
     return {
         "parsed": parsed,
@@ -795,6 +882,7 @@ def search_pipeline_from_parsed(
             "category": parsed.get("category"),
         },
         "results": rows,
+        "candidates": cands,
     }
 
 
@@ -901,8 +989,15 @@ def build_presented(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     - 상위 5개에서 성분 등급을 조회하고
     - 프론트에서 쓰는 presented 카드 구조로 변환
     """
-    top_rows = rows[:5]
+    return hydrate_cards(rows[:PRESENTED_TOP_N])
+
 
+def hydrate_cards(top_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    rows 일부(한 페이지)를 카드 구조로 변환.
+    - 성분 등급 조회는 넘겨받은 rows에 대해서만 1회 수행 (LLM/벡터 호출 없음)
+    - build_presented(첫 페이지)와 "더 보기" 페이지네이션이 공용으로 사용
+    """
     # 1) 성분 이름 수집
     all_ings: List[str] = []
     for r in top_rows:
@@ -938,3 +1033,198 @@ def build_presented(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         )
 
     return presented
+
+
+# =============================================================================
+# 8) 대화형 후속 질의(refinement) — 캐시된 후보군 재정렬
+#    예) "더 저렴한 걸로", "무향으로", "2만원 이하로", "크림으로"
+# =============================================================================
+_CHEAPER_PAT = re.compile(r"(더\s*(저렴|싼|싸)|저렴한\s*걸|싼\s*걸|가격\s*(낮|내려))")
+_KRW_AMOUNT_PAT = re.compile(
+    r"(\d+(?:\.\d+)?)\s*만\s*(?:(\d+)\s*천)?\s*원?"
+    r"|(\d+(?:\.\d+)?)\s*천\s*원?"
+    r"|(\d[\d,]*)\s*원"
+)
+_EXCLUDE_PAT = re.compile(
+    r"([가-힣A-Za-z0-9\-]+)\s*(?:없는|없이|빼고|제외|프리|free)", re.IGNORECASE
+)
+
+# 자주 쓰는 "무OO" 표현 → 제외할 성분명 키워드
+EXCLUDE_ALIASES: Dict[str, List[str]] = {
+    "무향": ["향료", "fragrance", "퍼퓸", "리모넨", "리날룰", "시트로넬롤", "제라니올"],
+    "무알코올": ["에탄올", "알코올", "alcohol"],
+    "무알콜": ["에탄올", "알코올", "alcohol"],
+    "무실리콘": ["디메치콘", "디메티콘", "실록세인", "silicone"],
+    "무파라벤": ["파라벤", "paraben"],
+    "무오일": ["오일", "oil"],
+}
+_EXCLUDE_WORD_ALIASES: Dict[str, str] = {
+    "향": "무향", "향료": "무향", "알코올": "무알코올", "알콜": "무알코올",
+    "실리콘": "무실리콘", "파라벤": "무파라벤", "오일": "무오일",
+}
+# 후속 질의에서 "조건을 좁히는 말" 외에 허용되는 군더더기
+_REFINE_FILLER_PAT = re.compile(
+    r"(으로|로|걸로|것으로|제품|추천|해줘|해주세요|보여줘|주세요|찾아줘|말고|좀|다시|만|중에서?|"
+    r"이하|미만|까지|이상|부터|대|원|만원|천원|더|저렴한|저렴|싼|싸게|가격|낮은|[\s\d.,!?~]+)"
+)
+
+
+def _parse_krw(m: "re.Match") -> int:
+    man, man_cheon, cheon, won = m.groups()
+    if man is not None:
+        return int(float(man) * 10000) + (int(man_cheon) * 1000 if man_cheon else 0)
+    if cheon is not None:
+        return int(float(cheon) * 1000)
+    return int(won.replace(",", ""))
+
+
+def parse_refinement(user_query: str) -> Optional[Dict[str, Any]]:
+    """
+    LLM 없이 후속 질의가 '조건만 좁히는' 질의인지 규칙 기반으로 판별한다.
+
+    반환:
+      - None: refinement로 볼 수 없음 (새 검색 필요)
+      - {"cheaper": bool, "price_range": (min, max), "category": str|None,
+         "exclude": [성분 키워드...]}
+    """
+    q = unicodedata.normalize("NFKC", user_query or "").strip()
+    if not q:
+        return None
+
+    cheaper = bool(_CHEAPER_PAT.search(q))
+
+    minp: Optional[int] = None
+    maxp: Optional[int] = None
+    m = _KRW_AMOUNT_PAT.search(q)
+    if m:
+        amount = _parse_krw(m)
+        tail = q[m.end(): m.end() + 4]
+        if re.match(r"\s*대", tail):
+            minp, maxp = amount, amount + (9999 if amount >= 10000 else 999)
+        elif re.match(r"\s*(이상|부터|넘)", tail):
+            minp = amount
+        else:
+            # "n원 이하/미만/까지" 및 금액만 있는 경우 → 상한
+            maxp = amount
+
+    exclude: List[str] = []
+    for alias, terms in EXCLUDE_ALIASES.items():
+        if alias in q.replace(" ", ""):
+            exclude.extend(terms)
+    for word in _EXCLUDE_PAT.findall(q):
+        alias = _EXCLUDE_WORD_ALIASES.get(word)
+        exclude.extend(EXCLUDE_ALIASES[alias] if alias else [word])
+    exclude = list(dict.fromkeys(exclude))
+
+    category = strict_category_from_query(q)
+
+    if not (cheaper or minp is not None or maxp is not None or exclude or category):
+        return None
+
+    # 조건 표현을 모두 지우고도 의미 있는 말이 남으면 새로운 요구(피처/브랜드 등)가 섞인 것
+    rest = _EXCLUDE_PAT.sub(" ", q)
+    rest = _CHEAPER_PAT.sub(" ", rest)
+    rest = _KRW_AMOUNT_PAT.sub(" ", rest)
+    rest = re.sub(r"\s+", "", rest)
+    for alias in EXCLUDE_ALIASES:
+        rest = rest.replace(alias, " ")
+    for raw_key in _CATEGORY_KEYS_SORTED:
+        rest = rest.replace(re.sub(r"\s+", "", raw_key), " ")
+    rest = _REFINE_FILLER_PAT.sub("", rest)
+    if len(rest) >= 2:
+        return None
+
+    return {
+        "cheaper": cheaper,
+        "price_range": (minp, maxp),
+        "category": category,
+        "exclude": exclude,
+    }
+
+
+def merge_refinement(
+    base_parsed: Dict[str, Any],
+    refine: Dict[str, Any],
+    presented: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    이전 parsed에 refinement 조건을 합친다.
+    반환: (merged_parsed, is_tightening)
+      - is_tightening=False 이면 캐시 후보군 밖의 결과가 필요하다 (카테고리 변경 등).
+    """
+    old_min, old_max = base_parsed.get("price_range") or (None, None)
+    new_min, new_max = refine.get("price_range") or (None, None)
+
+    if refine.get("cheaper"):
+        prices = [
+            int(p["price_krw"]) for p in (presented or [])
+            if p.get("price_krw") is not None
+        ]
+        if prices:
+            cap = min(prices) - 1
+            new_max = cap if new_max is None else min(new_max, cap)
+
+    minp = old_min if new_min is None else (new_min if old_min is None else max(old_min, new_min))
+    maxp = old_max if new_max is None else (new_max if old_max is None else min(old_max, new_max))
+    tightening = True
+    # 새 하한이 기존 상한을 넘으면 범위가 좁혀지는 게 아니라 이동한 것
+    if minp is not None and maxp is not None and minp > maxp:
+        minp, maxp = new_min, new_max
+        tightening = False
+
+    category = base_parsed.get("category")
+    if refine.get("category"):
+        if category and refine["category"] != category:
+            tightening = False
+        category = refine["category"]
+
+    merged = {
+        **base_parsed,
+        "category": category,
+        "price_range": (minp, maxp),
+        "exclude_ingredients": list(
+            dict.fromkeys(
+                (base_parsed.get("exclude_ingredients") or []) + (refine.get("exclude") or [])
+            )
+        ),
+    }
+    return merged, tightening
+
+
+def _has_excluded_ingredient(ingredients: List[str], exclude_norm: List[str]) -> bool:
+    for name in ingredients or []:
+        n = _norm_text(name)
+        if any(term in n for term in exclude_norm):
+            return True
+    return False
+
+
+def filter_candidates(cands: List[Candidate], parsed: Dict[str, Any]) -> List[Candidate]:
+    """
+    후보에 가격/카테고리/제외 성분 조건을 적용 (원래 순서 유지).
+    - 가격/카테고리는 Candidate 필드로 메모리에서 처리
+    - 제외 성분이 있을 때만 남은 후보의 성분을 한 번에 조회
+    """
+    minp, maxp = parsed.get("price_range") or (None, None)
+    category = parsed.get("category")
+    exclude_norm = [_norm_text(t) for t in (parsed.get("exclude_ingredients") or []) if t]
+
+    out: List[Candidate] = []
+    for c in cands:
+        if (minp is not None or maxp is not None) and c.price_krw is None:
+            continue
+        if minp is not None and c.price_krw < minp:
+            continue
+        if maxp is not None and c.price_krw > maxp:
+            continue
+        if category and c.category != category:
+            continue
+        out.append(c)
+
+    if out and exclude_norm:
+        ing_map = rdb_fetch_ingredients([c.pid for c in out])
+        out = [
+            c for c in out
+            if not _has_excluded_ingredient(ing_map.get(c.pid) or [], exclude_norm)
+        ]
+    return out
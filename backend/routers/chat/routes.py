@@ -1,17 +1,23 @@
 # backend/routers/chat/routes.py
 # -*- coding: utf-8 -*-
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from uuid import uuid4
-import time, asyncio
+import base64, hmac, os, time, asyncio
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from db import get_db 
-from .recommender import run_product_core, stream_finalize_from_rag_texts  # ✅ 엔진 엔트리 함수 2개
+from .recommender import (  # ✅ 엔진 엔트리 함수
+    run_product_core,
+    run_product_refine,
+    run_product_page,
+    stream_finalize_from_rag_texts,
+)
+from .semantic_cache import general_answer_cache
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -19,7 +25,7 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 # Simple in-memory cache (향후 Redis 등으로 교체 가능)
 # ──────────────────────────────────────────────────────────────────────────────
 _CACHE: Dict[str, Dict[str, Any]] = {}
-_TTL_SEC = 60  # 초 단위 TTL
+_TTL_SEC = 300  # 초 단위 TTL (후속 질의/더 보기까지 후보군 유지)
 
 def _cache_set(key: str, data: Dict[str, Any]):
     _CACHE[key] = {"ts": time.time(), "data": data}
@@ -33,13 +39,33 @@ def _cache_get(key: str):
         return None
     return item["data"]
 
+
+# ──────────────────────────────────────────────────────────────────────────────
+# "더 보기" 커서: cache_key + offset을 불투명 토큰으로 인코딩
+# ──────────────────────────────────────────────────────────────────────────────
+def _encode_cursor(cache_key: str, offset: int) -> str:
+    raw = f"{cache_key}:{offset}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + pad).decode("utf-8")
+        key, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    return key, offset
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Schemas
 # ──────────────────────────────────────────────────────────────────────────────
 class RecommendReq(BaseModel):
     query: str
     top_k: Optional[int] = 12
-    cache_key: Optional[str] = None  # 기존 결과 재사용 시 선택적으로 전달 가능
+    cache_key: Optional[str] = None  # 기존 결과 재사용/후속 질의(refinement) 시 선택적으로 전달 가능
 
 
 class RecommendRes(BaseModel):
@@ -47,6 +73,19 @@ class RecommendRes(BaseModel):
     message: Optional[str] = None    # 안내 문구(결과 없음/GENERAL 응답 등)
     cache_key: Optional[str] = None  # PRODUCT_FIND일 때 rows 캐시 키
     products: List[Dict[str, Any]]   # 카드용 데이터
+    next_cursor: Optional[str] = None  # 캐시된 후보가 더 있으면 /recommend/more 커서
+
+
+class RecommendMoreReq(BaseModel):
+    cursor: str
+    page_size: Optional[int] = 5
+
+
+class RecommendMoreRes(BaseModel):
+    cache_key: str
+    products: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    total: int                       # 캐시된 전체 후보 수
 
 
 # class FinalizeReq(BaseModel):
@@ -63,6 +102,30 @@ class IngredientDetail(BaseModel):
 class FinalizeReq(BaseModel):
     query: str
     cache_key: Optional[str] = None
+
+
+def _card_item(r: Dict[str, Any]) -> Dict[str, Any]:
+    """presented 카드 → 응답용 카드 dict (값이 있는 필드만)."""
+    item: Dict[str, Any] = {
+        "pid": int(r["pid"]) if r.get("pid") is not None else None,
+        "brand": r.get("brand"),
+        "product_name": r.get("product_name"),
+        "category": r.get("category"),
+    }
+    if r.get("price_krw") is not None:
+        item["price_krw"] = int(r["price_krw"])
+    if r.get("rag_text"):
+        item["rag_text"] = r["rag_text"]
+    if r.get("image_url"):
+        item["image_url"] = r["image_url"]
+    if r.get("product_url"):
+        item["product_url"] = r["product_url"]
+    if r.get("ingredients"):
+        item["ingredients"] = r["ingredients"]
+    if r.get("ingredients_detail"):
+        item["ingredients_detail"] = r["ingredients_detail"]
+    return item
+
 # ──────────────────────────────────────────────────────────────────────────────
 # ✅ Recommend cards API
 #    역할: 검색 + intent 판별 + presented 카드 + cache_key 발급 (JSON 응답)
@@ -78,11 +141,16 @@ def recommend(req: RecommendReq):
     used_key: Optional[str] = None
 
     # 1) 전달된 cache_key가 있으면 우선 재사용 시도
+    #    - 같은 질의면 그대로 재사용
+    #    - "더 저렴한 걸로" 같은 후속 질의면 캐시된 후보군을 메모리에서 재정렬
     if req.cache_key:
         cached = _cache_get(req.cache_key)
         if cached is not None:
-            data = cached
-            used_key = req.cache_key
+            if (cached.get("query") or q) == q:
+                data = cached
+                used_key = req.cache_key
+            else:
+                data = run_product_refine(q, cached)
 
     # 2) 캐시가 없으면 새로 검색 실행
     if data is None:
@@ -104,40 +172,51 @@ def recommend(req: RecommendReq):
     # PRODUCT_FIND인 경우: rows/presented를 캐시에 저장하고 카드 빌드
     if used_key is None:
         used_key = uuid4().hex
-        _cache_set(used_key, data)
+        _cache_set(used_key, {**data, "query": q})
 
     products: List[Dict[str, Any]] = []
     top_k = req.top_k or 12
     rows = (data.get("presented") or [])[:top_k]
 
     for r in rows:
-        item: Dict[str, Any] = {
-            "pid": int(r["pid"]) if r.get("pid") is not None else None,
-            "brand": r.get("brand"),
-            "product_name": r.get("product_name"),
-            "category": r.get("category"),
-        }
-        if r.get("price_krw") is not None:
-            item["price_krw"] = int(r["price_krw"])
-        if r.get("rag_text"):
-            item["rag_text"] = r["rag_text"]
-        if r.get("image_url"):
-            item["image_url"] = r["image_url"]
-        if r.get("product_url"):
-            item["product_url"] = r["product_url"]
-        if r.get("ingredients"):
-            item["ingredients"] = r["ingredients"]
-        if r.get("ingredients_detail"):
-            item["ingredients_detail"] = r["ingredients_detail"]
-        products.append(item)
+        products.append(_card_item(r))
 
     msg = (data.get("message") or "").strip() or None
+    total = len(data.get("candidates") or [])
+    next_cursor = _encode_cursor(used_key, len(rows)) if len(rows) < total else None
 
     return RecommendRes(
         intent="PRODUCT_FIND",
         message=msg,
         cache_key=used_key,
         products=products,
+        next_cursor=next_cursor,
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# ✅ "더 보기" 페이지네이션
+#    역할: recommend에서 캐시한 전체 랭킹 후보를 커서 단위로 이어서 반환
+#          (해당 페이지만 카드 hydration, LLM/벡터 검색 없음)
+#    경로: POST /api/chat/recommend/more
+# ──────────────────────────────────────────────────────────────────────────────
+@router.post("/recommend/more", response_model=RecommendMoreRes)
+def recommend_more(req: RecommendMoreReq):
+    cache_key, offset = _decode_cursor(req.cursor)
+    data = _cache_get(cache_key)
+    if data is None:
+        raise HTTPException(status_code=404, detail="cache expired; run /recommend again")
+
+    size = max(1, min(req.page_size or 5, 30))
+    total = len(data.get("candidates") or [])
+    page = run_product_page(data, offset, size)
+    end = offset + len(page)
+
+    return RecommendMoreRes(
+        cache_key=cache_key,
+        products=[_card_item(r) for r in page],
+        next_cursor=_encode_cursor(cache_key, end) if page and end < total else None,
+        total=total,
     )
 
 @router.post("/finalize")
@@ -227,3 +306,26 @@ def get_ingredient_detail(name: str, db: Session = Depends(get_db)):
         description=row.description,
         caution_grade=_normalize_grade(row.caution_grade),
     )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# GENERAL 답변 시맨틱 캐시 관리
+#    경로: GET    /api/chat/general-cache/stats
+#          DELETE /api/chat/general-cache   (X-Admin-Token == CHAT_ADMIN_TOKEN, 미설정이면 비활성 404)
+# ──────────────────────────────────────────────────────────────────────────────
+def _require_admin(x_admin_token: Optional[str] = Header(None)):
+    expected = os.getenv("CHAT_ADMIN_TOKEN")
+    if not expected:
+        # 토큰이 설정되지 않은 배포에서는 관리 엔드포인트 자체를 닫아 둠
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="admin token required")
+
+@router.get("/general-cache/stats")
+def general_cache_stats():
+    return general_answer_cache.stats()
+
+@router.delete("/general-cache", dependencies=[Depends(_require_admin)])
+def general_cache_purge():
+    removed = general_answer_cache.purge()
+    return {"purged": removed}
@@ -0,0 +1,179 @@
+# backend/routers/chat/semantic_cache.py
+# -*- coding: utf-8 -*-
+"""
+GENERAL 의도 답변용 시맨틱 캐시.
+
+- 질문을 임베딩해서 로컬(프로세스 내) 벡터 저장소에서 이전 질문과 코사인 유사도 비교
+- 임계값 이상이면 저장된 답변을 즉시 반환 (LLM completion 생략)
+- TTL / 최대 용량(LRU 축출) / 관리자 purge / 적중률·절감 시간 지표 제공
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+SIMILARITY_THRESHOLD = 0.92   # 코사인 유사도 (text-embedding-3-large 기준)
+TTL_SEC = 6 * 60 * 60         # 답변 유효 시간 (6시간)
+MAX_ENTRIES = 2000            # 최대 보관 질문 수
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl_sec: int = TTL_SEC,
+        capacity: int = MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl_sec = ttl_sec
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._vecs: Optional[np.ndarray] = None       # (capacity, dim) 정규화 벡터
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "saved_ms": 0,        # 적중 시 생략된 LLM 생성 시간 합
+            "lookup_ms": 0.0,     # 유사도 검색 자체 시간 합
+        }
+
+    @staticmethod
+    def _normalize(vec: List[float]) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32)
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else v
+
+    def _live_mask(self, now: float) -> np.ndarray:
+        mask = np.zeros(self.capacity, dtype=bool)
+        for i, e in enumerate(self._entries):
+            if e is None:
+                continue
+            if now - e["ts"] > self.ttl_sec:
+                self._entries[i] = None
+                self._stats["expired"] += 1
+                continue
+            mask[i] = True
+        return mask
+
+    def lookup(self, vec: List[float]) -> Optional[Dict[str, Any]]:
+        """임계값 이상으로 가장 가까운 이전 질문의 항목(answer 포함)을 반환. 없으면 None."""
+        t0 = time.perf_counter()
+        q = self._normalize(vec)
+        with self._lock:
+            self._stats["lookups"] += 1
+            hit = None
+            if self._vecs is not None and self._vecs.shape[1] == q.shape[0]:
+                mask = self._live_mask(time.time())
+                if mask.any():
+                    sims = self._vecs @ q
+                    sims[~mask] = -1.0
+                    best = int(np.argmax(sims))
+                    if sims[best] >= self.threshold:
+                        hit = self._entries[best]
+                        hit["hits"] += 1
+                        hit["last_used"] = time.time()
+                        hit = {**hit, "similarity": float(sims[best])}
+            if hit:
+                self._stats["hits"] += 1
+                self._stats["saved_ms"] += int(hit.get("gen_ms") or 0)
+            else:
+                self._stats["misses"] += 1
+            self._stats["lookup_ms"] += (time.perf_counter() - t0) * 1000
+        return hit
+
+    def add(self, question: str, vec: List[float], answer: str, gen_ms: int = 0):
+        q = self._normalize(vec)
+        now = time.time()
+        with self._lock:
+            if self._vecs is None or self._vecs.shape[1] != q.shape[0]:
+                self._vecs = np.zeros((self.capacity, q.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.capacity
+
+            slot = next((i for i, e in enumerate(self._entries) if e is None), None)
+            if slot is None:
+                # 용량 초과 → 가장 오래 안 쓰인 항목 축출
+                slot = min(range(self.capacity), key=lambda i: self._entries[i]["last_used"])
+                self._stats["evictions"] += 1
+
+            self._vecs[slot] = q
+            self._entries[slot] = {
+                "question": question,
+                "answer": answer,
+                "ts": now,
+                "last_used": now,
+                "gen_ms": int(gen_ms),
+                "hits": 0,
+            }
+
+    def purge(self) -> int:
+        """전체 비우기. 제거된 항목 수 반환."""
+        with self._lock:
+            n = sum(1 for e in self._entries if e is not None)
+            self._entries = [None] * self.capacity
+            self._vecs = None
+            return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            size = sum(1 for e in self._entries if e is not None)
+        lookups = s["lookups"]
+        return {
+            **s,
+            "lookup_ms": round(s["lookup_ms"], 2),
+            "size": size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "ttl_sec": self.ttl_sec,
+            "hit_rate": round(s["hits"] / lookups, 4) if lookups else 0.0,
+            "avg_lookup_ms": round(s["lookup_ms"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+general_answer_cache = SemanticAnswerCache()
+
+
+def answer_with_semantic_cache(
+    user_query: str,
+    embed_fn: Callable[[str], List[float]],
+    generate_fn: Callable[[str], str],
+    log_fn: Optional[Callable[..., None]] = None,
+) -> str:
+    """
+    시맨틱 캐시를 거쳐 GENERAL 답변 생성.
+    - 임베딩 실패 시에는 캐시 없이 generate_fn으로 바로 진행
+    """
+    try:
+        vec = embed_fn(user_query)
+    except Exception as e:
+        if log_fn:
+            log_fn("general_cache_embed_error", error=str(e))
+        return generate_fn(user_query)
+
+    hit = general_answer_cache.lookup(vec)
+    if hit:
+        if log_fn:
+            log_fn(
+                "general_cache_hit",
+                similarity=round(hit["similarity"], 4),
+                cached_question=hit["question"],
+                saved_ms=hit.get("gen_ms"),
+            )
+        return hit["answer"]
+
+    t0 = time.time()
+    answer = generate_fn(user_query)
+    gen_ms = int((time.time() - t0) * 1000)
+    if answer:
+        general_answer_cache.add(user_query, vec, answer, gen_ms=gen_ms)
+    if log_fn:
+        log_fn("general_cache_miss", gen_ms=gen_ms)
+    return answer
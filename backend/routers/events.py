@@ -8,13 +8,16 @@
 - 추천 피드백 로깅
 """
 import re
+import time
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy import text
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from db import get_db
 from models import UserSession, EventLog, SearchQuery, ProductViewLog, RecommendationFeedback
+from services import event_ingest
 
 
 # ───────────────────────────────────────────────
@@ -48,6 +51,25 @@ def normalize_query_text(text: str) -> str:
 router = APIRouter(prefix="/events", tags=["events"])
 
 
+_ENSURE_SESSION_SQL = text("""
+    INSERT IGNORE INTO user_sessions
+        (session_id, user_id, device_type, started_at, page_view_count, event_count, is_bounce)
+    VALUES
+        (:session_id, :user_id, 'unknown', :started_at, 0, 0, 1)
+""")
+
+
+def _ensure_session(db: Session, session_id: str, user_id: Optional[int]):
+    """
+    세션이 없으면 생성 (SELECT + INSERT + 중복 재시도 대신 INSERT IGNORE 1회).
+    커밋은 호출 측, 커밋 후 event_ingest.mark_known_sessions로 등록하면 이후 요청은 쿼리 없음
+    """
+    if event_ingest.is_known_session(session_id):
+        return
+    db.execute(_ENSURE_SESSION_SQL, {"session_id": session_id, "user_id": user_id,
+                                     "started_at": datetime.utcnow()})
+
+
 # ───────────────────────────────────────────────
 # Pydantic 스키마 (요청 데이터 검증용)
 # ───────────────────────────────────────────────
@@ -77,14 +99,14 @@ class SessionUpdateRequest(BaseModel):
 
 
 class EventLogRequest(BaseModel):
-    """일반 이벤트 로깅 요청"""
-    session_id: str
+    """일반 이벤트 로깅 요청 (길이 제한 = event_logs 컬럼 크기, 넘치면 큐에 넣기 전에 422)"""
+    session_id: str = Field(..., max_length=36)
     user_id: Optional[int] = None
-    event_type: str = Field(..., description="click, page_view, preference_add, caution_add, etc.")
-    event_target: Optional[str] = None  # ingredient, product, etc.
-    target_id: Optional[str] = None     # 대상 ID
-    event_value: Optional[str] = None   # JSON string
-    page_url: Optional[str] = None
+    event_type: str = Field(..., max_length=50, description="click, page_view, preference_add, caution_add, etc.")
+    event_target: Optional[str] = Field(default=None, max_length=50)   # ingredient, product, etc.
+    target_id: Optional[str] = Field(default=None, max_length=100)     # 대상 ID
+    event_value: Optional[str] = Field(default=None, max_length=16383) # JSON string (TEXT 64KB / utf8mb4 4바이트)
+    page_url: Optional[str] = Field(default=None, max_length=255)
 
 
 class SearchEventRequest(BaseModel):
@@ -218,7 +240,37 @@ def update_session(request: SessionUpdateRequest, db: Session = Depends(get_db))
 def log_event(request: EventLogRequest, db: Session = Depends(get_db)):
     """
     일반 이벤트 기록 (클릭, 페이지뷰, 성분 추가 등)
+    - 기본: 이벤트 큐에 넣고 바로 응답 (services/event_ingest.py writer가 다중 행 INSERT)
+      → event_id는 응답 시점에 없음 (queued=True)
+    - EVENTS_ASYNC=0: 기존 동기 경로
     """
+    ingestor = event_ingest.get_ingestor()
+    if ingestor is None:
+        return _log_event_sync(request, db)
+    if not ingestor.submit(_event_row(request, datetime.utcnow())):
+        raise HTTPException(
+            status_code=503,
+            detail="이벤트 처리량이 많습니다. 잠시 후 다시 시도해주세요",
+            headers={"Retry-After": "1"},
+        )
+    return {"message": "이벤트 접수 완료", "event_id": None, "queued": True}
+
+
+def _event_row(request: EventLogRequest, created_at: datetime) -> dict:
+    return {
+        "session_id": request.session_id,
+        "user_id": request.user_id,
+        "event_type": request.event_type,
+        "event_target": request.event_target,
+        "target_id": request.target_id,
+        "event_value": request.event_value,
+        "page_url": request.page_url,
+        "created_at": created_at,
+    }
+
+
+def _log_event_sync(request: EventLogRequest, db: Session):
+    """이벤트 1건 동기 기록 (세션 조회/생성 + INSERT + 카운트 UPDATE + 커밋)"""
     from sqlalchemy.exc import IntegrityError
     
     # 세션이 없으면 자동 생성
@@ -270,26 +322,8 @@ def log_search(request: SearchEventRequest, db: Session = Depends(get_db)):
     """
     검색 이벤트 기록
     """
-    from sqlalchemy.exc import IntegrityError
-    
-    # 세션이 없으면 자동 생성
-    session = db.query(UserSession).filter_by(session_id=request.session_id).first()
-    if not session:
-        try:
-            session = UserSession(
-                session_id=request.session_id,
-                user_id=request.user_id,
-                device_type='unknown',
-                started_at=datetime.utcnow(),
-                page_view_count=0,
-                event_count=0,
-                is_bounce=1
-            )
-            db.add(session)
-            db.flush()
-        except IntegrityError:
-            db.rollback()
-            session = db.query(UserSession).filter_by(session_id=request.session_id).first()
+    # 세션이 없으면 자동 생성 (이미 확인된 세션은 조회 생략)
+    _ensure_session(db, request.session_id, request.user_id)
     
     search = SearchQuery(
         session_id=request.session_id,
@@ -304,6 +338,7 @@ def log_search(request: SearchEventRequest, db: Session = Depends(get_db)):
     )
     db.add(search)
     db.commit()
+    event_ingest.mark_known_sessions([request.session_id])
     
     return {"message": "검색 기록 완료", "query_id": search.query_id}
 
@@ -335,26 +370,8 @@ def log_product_view(request: ProductViewRequest, db: Session = Depends(get_db))
     """
     상품 상세페이지 조회 기록
     """
-    from sqlalchemy.exc import IntegrityError
-    
-    # 세션이 없으면 자동 생성
-    session = db.query(UserSession).filter_by(session_id=request.session_id).first()
-    if not session:
-        try:
-            session = UserSession(
-                session_id=request.session_id,
-                user_id=request.user_id,
-                device_type='unknown',
-                started_at=datetime.utcnow(),
-                page_view_count=0,
-                event_count=0,
-                is_bounce=1
-            )
-            db.add(session)
-            db.flush()
-        except IntegrityError:
-            db.rollback()
-            session = db.query(UserSession).filter_by(session_id=request.session_id).first()
+    # 세션이 없으면 자동 생성 (이미 확인된 세션은 조회 생략)
+    _ensure_session(db, request.session_id, request.user_id)
     
     view = ProductViewLog(
         session_id=request.session_id,
@@ -367,6 +384,7 @@ def log_product_view(request: ProductViewRequest, db: Session = Depends(get_db))
     )
     db.add(view)
     db.commit()
+    event_ingest.mark_known_sessions([request.session_id])
     
     return {"message": "상품 조회 기록 완료", "view_id": view.view_id}
 
@@ -498,31 +516,48 @@ def update_recommendation_feedback(request: RecommendationFeedbackUpdateRequest,
 
 class BatchEventRequest(BaseModel):
     """여러 이벤트를 한번에 전송"""
-    events: List[EventLogRequest]
+    events: List[EventLogRequest] = Field(..., max_length=event_ingest.BATCH_MAX_EVENTS)
+
+
+def _ms(t_start: float, t_end: float) -> float:
+    return round((t_end - t_start) * 1000, 2)
 
 
 @router.post("/batch")
 def log_batch_events(request: BatchEventRequest, db: Session = Depends(get_db)):
     """
     여러 이벤트를 한번에 기록 (네트워크 효율성)
+    - 세션 다중 행 upsert 1회 + event_logs 다중 행 INSERT (EVENTS_BATCH_CHUNK_ROWS행당 1문장)
+    - event_ids는 문장별 첫 id(LAST_INSERT_ID)에서 범위로 계산 (autoinc lock mode 2면 null)
+    - timing_ms: 배치 단계별 소요 시간
     """
-    event_ids = []
-    
-    for event_data in request.events:
-        event = EventLog(
-            session_id=event_data.session_id,
-            user_id=event_data.user_id,
-            event_type=event_data.event_type,
-            event_target=event_data.event_target,
-            target_id=event_data.target_id,
-            event_value=event_data.event_value,
-            page_url=event_data.page_url,
-            created_at=datetime.utcnow()
-        )
-        db.add(event)
-        db.flush()  # ID 생성을 위해
-        event_ids.append(event.event_id)
-    
+    t0 = time.perf_counter()
+    now = datetime.utcnow()
+    rows = [_event_row(e, now) for e in request.events]
+    if not rows:
+        return {"message": "0개 이벤트 기록 완료", "event_ids": [], "id_ranges": [], "statements": 0,
+                "timing_ms": {"total": 0.0}}
+
+    t_prep = time.perf_counter()
+    event_ingest.upsert_sessions(db, rows)
+    t_sessions = time.perf_counter()
+    ranges = event_ingest.insert_events_with_ids(db, rows)
+    t_insert = time.perf_counter()
     db.commit()
-    
-    return {"message": f"{len(event_ids)}개 이벤트 기록 완료", "event_ids": event_ids}
+    t_commit = time.perf_counter()
+    event_ingest.mark_known_sessions({r["session_id"] for r in rows})
+
+    consecutive = event_ingest.autoinc_ids_consecutive(db)
+    return {
+        "message": f"{len(rows)}개 이벤트 기록 완료",
+        "event_ids": [i for r in ranges for i in r] if consecutive else None,
+        "id_ranges": [[r.start, r.stop - 1] for r in ranges] if consecutive else None,
+        "statements": len(ranges),
+        "timing_ms": {
+            "prepare": _ms(t0, t_prep),
+            "sessions": _ms(t_prep, t_sessions),
+            "insert": _ms(t_sessions, t_insert),
+            "commit": _ms(t_insert, t_commit),
+            "total": _ms(t0, t_commit),
+        },
+    }
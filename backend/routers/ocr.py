@@ -11,22 +11,32 @@ import os
 import io
 import re
 import difflib
-import tempfile
+import time
 from typing import Dict, List, Optional, Any
 
 from dotenv import load_dotenv, find_dotenv
-from google.cloud import vision
 from PIL import Image  # 사용 가능성 대비
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 from urllib.parse import quote_plus
 
+from services import ocr_pipeline
+from services.ingredient_kb import caution_lookup
+
 router = APIRouter(prefix="/ocr", tags=["ocr"])
 
 # ============================================
-# DB 연결 (프로토 동일)
+# DB 연결 (프로토 동일, 엔진은 프로세스당 1개 재사용)
 # ============================================
+_ENGINE: Optional[Engine] = None
+
 def get_engine() -> Engine:
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = _create_engine()
+    return _ENGINE
+
+def _create_engine() -> Engine:
     load_dotenv()
     dialect = os.getenv("DB_DIALECT", "{DB_DIALECT}")
     host    = os.getenv("DB_HOST", "{DB_HOST}")
@@ -40,41 +50,22 @@ def get_engine() -> Engine:
 # ============================================
 # OCR + 검증 (프로토 동일)
 # ============================================
-def extract_text_from_image(image_path: str) -> Optional[str]:
+def extract_text_from_bytes(content: bytes) -> Optional[str]:
+    """이미지 바이트 → OCR 텍스트 (싱글톤 Vision 클라이언트, 블로킹)"""
     try:
-        # 1) .env 있으면 로드, 없어도 통과
-        base_dir = ""
-        try:
-            dotenv_path = find_dotenv()
-            if dotenv_path:
-                load_dotenv(dotenv_path)
-                base_dir = os.path.dirname(dotenv_path)
-        except Exception:
-            pass  # .env 강제 의존 제거
-
-        # 2) 환경변수 우선
-        json_path = (os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or "").strip()
-        if not json_path:
-            raise Exception("GOOGLE_APPLICATION_CREDENTIALS not set")
-
-        # 3) 상대경로면 .env 기준으로 보정
-        if not os.path.isabs(json_path) and base_dir:
-            json_path = os.path.join(base_dir, json_path)
-
-        if not os.path.exists(json_path):
-            raise Exception(f"서비스키 파일이 없습니다: {json_path}")
+        return ocr_pipeline.detect_text(content, document=True)
+    except Exception as e:
+        print(f"OCR 추출 오류: {e}")
+        return None
 
-        client = vision.ImageAnnotatorClient.from_service_account_json(json_path)
+def extract_text_from_image(image_path: str) -> Optional[str]:
+    try:
         with io.open(image_path, "rb") as f:
             content = f.read()
-        image = vision.Image(content=content)
-        resp = client.document_text_detection(image=image)
-        if resp.error.message:
-            raise Exception(f"Vision API 오류: {resp.error.message}")
-        return resp.full_text_annotation.text
     except Exception as e:
         print(f"OCR 추출 오류: {e}")
         return None
+    return extract_text_from_bytes(content)
 
 def validate_cosmetic_image(ocr_text: str) -> Dict[str, Any]:
     if not ocr_text or len(ocr_text.strip()) < 10:
@@ -258,38 +249,11 @@ class CosmeticAnalyzer:
             return None
 
     def _query_caution_ingredients(self, ingredients: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        # 공식(caution_ingredients) + ML 예측(ML_caution_ingredients) — 프로세스 공용 성분 사전 조회
         if not ingredients:
             return {"official": [], "ml_predicted": []}
         try:
-            with self.engine.connect() as conn:
-                ph = ",".join([":ing"+str(i) for i in range(len(ingredients))])
-                params = {f"ing{i}": ing.strip() for i, ing in enumerate(ingredients)}
-                q_off = text(f"""
-                    SELECT korean_name, caution_grade, description
-                    FROM caution_ingredients
-                    WHERE korean_name IN ({ph})
-                """)
-                off_rows = conn.execute(q_off, params).fetchall()
-                official = [{"korean_name":r[0],"caution_grade":r[1],"description":r[2]} for r in off_rows]
-
-                official_names = {x["korean_name"] for x in official}
-                remain = [ing for ing in ingredients if ing not in official_names]
-                ml_list: List[Dict[str, Any]] = []
-                if remain:
-                    ph2 = ",".join([":rem"+str(i) for i in range(len(remain))])
-                    params2 = {f"rem{i}": ing.strip() for i, ing in enumerate(remain)}
-                    q_ml = text(f"""
-                        SELECT korean_name, caution_grade, description
-                        FROM ML_caution_ingredients
-                        WHERE korean_name IN ({ph2})
-                    """)
-                    try:
-                        ml_rows = conn.execute(q_ml, params2).fetchall()
-                        ml_list = [{"korean_name":r[0],"caution_grade":r[1],"description":r[2]} for r in ml_rows]
-                    except Exception as e:
-                        print(f"ML 주의 성분 조회 오류 (ML_caution_ingredients): {e}")
-                        ml_list = []
-                return {"official": official, "ml_predicted": ml_list}
+            return caution_lookup(ingredients)
         except Exception as e:
             print(f"주의 성분 조회 오류: {e}")
             return {"official": [], "ml_predicted": []}
@@ -511,7 +475,9 @@ def format_analysis_for_chat(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
 # 메인 처리/검색 (프로토 동일)
 # ============================================
 def process_cosmetic_image(image_path: str) -> Dict[str, Any]:
-    txt = extract_text_from_image(image_path)
+    return analyze_ocr_text(extract_text_from_image(image_path))
+
+def analyze_ocr_text(txt: Optional[str]) -> Dict[str, Any]:
     if not txt:
         return {"success": False, "error": "OCR 텍스트 추출 실패", "data": None}
     analyzer = CosmeticAnalyzer()
@@ -535,23 +501,24 @@ def search_product_by_name(product_name: str) -> Dict[str, Any]:
 async def ocr_upload(image: UploadFile = File(...)):
     if not image.content_type or not image.content_type.startswith("image/"):
         raise HTTPException(400, "image 파일을 업로드해주세요.")
-    # 임시 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(image.filename or "")[-1]) as tmp:
+    # 임시 파일 없이 메모리 바이트로 처리, 블로킹 단계는 executor로
+    timings = ocr_pipeline.StageTimer()
+    async with ocr_pipeline.ocr_slot(timings):
+        t0 = time.perf_counter()
         content = await image.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-    try:
-        result = process_cosmetic_image(tmp_path)
-        formatted = format_analysis_for_chat(result)
-        return JSONResponse({
-            "success": result.get("success", False),
-            "markdown": formatted.get("text"),
-            "image_url": formatted.get("image_url"),
-            "raw": result
-        })
-    finally:
-        try: os.remove(tmp_path)
-        except: pass
+        timings.add("read", (time.perf_counter() - t0) * 1000)
+        txt = await timings.run("ocr", extract_text_from_bytes, content)
+    result = await timings.run("analyze", analyze_ocr_text, txt)
+    formatted = format_analysis_for_chat(result)
+    timing_ms = timings.as_dict()
+    print(f"[OCR_TIMING] /ocr/upload {timing_ms}")
+    return JSONResponse({
+        "success": result.get("success", False),
+        "markdown": formatted.get("text"),
+        "image_url": formatted.get("image_url"),
+        "raw": result,
+        "timings_ms": timing_ms
+    })
 
 @router.post("/by-name")
 async def ocr_by_name(
@@ -566,7 +533,7 @@ async def ocr_by_name(
     if not product_name or not product_name.strip():
         raise HTTPException(400, "product_name is required")
 
-    result = search_product_by_name(product_name.strip())
+    result = await ocr_pipeline.run_blocking(search_product_by_name, product_name.strip())
     formatted = format_analysis_for_chat(result)
     return JSONResponse({
         "success": result.get("success", False),
@@ -2,11 +2,13 @@
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
-from db import get_db  # 같은 프로젝트의 db.py
+from db import SessionLocal, get_db  # 같은 프로젝트의 db.py
+from services import catalog_facets, trend_cache, trend_matrix, trend_snapshot
+from services.http_cache import conditional_json, make_etag
 from datetime import date
 
 WEEKDAY_EN = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
@@ -26,8 +28,8 @@ def _weekday_note(d: date):
 # ---------------------------------------------
 ALLOWED_CATEGORIES = ["스킨/토너", "에센스/세럼/앰플", "크림", "선크림"]
 TBL_PRODUCT = "product_data"                # pid, brand, product_name, review_count, category, ...
-TBL_HISTORY = "product_review_history_weekly_v"  # product_pid, period_start(date), review_count
 TBL_CHAIN   = "product_data_chain"          # pid, rag_text
+SPARKLINE_MAX_PIDS = 200
 
 router = APIRouter(prefix="/api/trends", tags=["trends"])
 
@@ -36,57 +38,79 @@ router = APIRouter(prefix="/api/trends", tags=["trends"])
 # A/B 기준일 계산
 #  - B: 히스토리 테이블의 최신 날짜 (또는 <=b_date 중 최신)
 #  - A: B 이전의 가장 최근 날짜. 없으면 A=None (→ 쿼리에서 BASE로 폴백)
+#  주차 목록은 catalog_facets PeriodIndex (적재 후 갱신) → 요청마다 DISTINCT 스캔 없음
 # ---------------------------------------------
 def _get_latest_and_prev_weeks(db: Session, b_date: Optional[str]) -> Tuple[Optional[date], date]:
+    upto = None
     if b_date and b_date != "latest":
-        q = text(f"""
-            SELECT DISTINCT DATE(period_start) AS d
-            FROM {TBL_HISTORY}
-            WHERE DATE(period_start) <= :b
-            ORDER BY d
-        """)
-        rows = db.execute(q, {"b": b_date}).fetchall()
-    else:
-        q = text(f"""
-            SELECT DISTINCT DATE(period_start) AS d
-            FROM {TBL_HISTORY}
-            ORDER BY d
-        """)
-        rows = db.execute(q).fetchall()
-
-    days = [r[0] for r in rows]
-    if not days:
+        try:
+            upto = date.fromisoformat(b_date[:10])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="b 형식 오류 (YYYY-MM-DD)")
+
+    _, index = catalog_facets.get_period_index(db)
+    a, b = index.latest_and_prev(upto)
+    if b is None:
         raise HTTPException(status_code=404, detail="리뷰 이력(period_start)이 없습니다.")
-
-    b = days[-1]
-    a = days[-2] if len(days) >= 2 else None
     return a, b
 
 
+def _ab_snapshot(db: Session, category: str, b: Optional[str]) -> trend_snapshot.ABSnapshot:
+    """(category, A, B) 제품 단위 스냅샷 — 최신 period_start를 데이터 버전으로 캐시"""
+    a_date, b_date = _get_latest_and_prev_weeks(db, b)
+    _, periods = catalog_facets.get_periods(db)
+    version = periods[-1] if periods else ""
+    return trend_snapshot.get_snapshot(db, category, a_date, b_date, version)
+
+
+# ---------------------------------------------
+# 응답 캐시 (services/trend_cache.py)
+#  - 키: (엔드포인트, 정규화 파라미터), 버전: 최신 period_start
+#  - ETag/If-None-Match → 304, Cache-Control: public, max-age
+#  - 새 버전을 처음 본 요청에서 기본 화면 warm-up (백그라운드)
+# ---------------------------------------------
+def _trends_version(db: Session) -> str:
+    _, index = catalog_facets.get_period_index(db)
+    version = index.labels[-1] if len(index) else ""
+    trend_cache.warm_once(version, warm_trends_cache)
+    return version
+
+
+def _respond(request: Request, db: Session, endpoint: str, params: Dict[str, Any]):
+    version = _trends_version(db)
+    key = trend_cache.param_key(params)
+    build = _BUILDERS[endpoint]
+    return conditional_json(
+        request, trend_cache.etag_for(endpoint, version, key),
+        lambda: trend_cache.get_or_build(endpoint, key, version, lambda: build(db, **params)),
+        cache_control=trend_cache.CACHE_CONTROL,
+    )
+
+
+def _norm_b(b: Optional[str]) -> str:
+    return "latest" if not b or b == "latest" else b
+
+
 # ---------------------------------------------
 # 0) 기간 리스트
 # ---------------------------------------------
+# 주간 날짜 목록은 services/catalog_facets.py 캐시 (새 주차 적재 시에만 다시 조회)
 @router.get("/periods", response_model=List[str])
-def get_periods(db: Session = Depends(get_db)):
-    q = text(f"""
-        SELECT DISTINCT DATE(period_start) AS d
-        FROM {TBL_HISTORY}
-        ORDER BY d
-    """)
-    rows = db.execute(q).fetchall()
-    return [str(r[0]) for r in rows]
+def get_periods(request: Request, db: Session = Depends(get_db)):
+    version, periods = catalog_facets.get_periods(db)
+    return conditional_json(request, make_etag("periods", version), lambda: periods)
 
 @router.get("/weeks", response_model=List[str])
-def get_weeks(db: Session = Depends(get_db)):
-    return get_periods(db)
+def get_weeks(request: Request, db: Session = Depends(get_db)):
+    return get_periods(request, db)
 
 
 # ---------------------------------------------
 # 1) 카테고리 목록
 # ---------------------------------------------
 @router.get("/categories", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
-    return ALLOWED_CATEGORIES
+def get_categories(request: Request):
+    return conditional_json(request, make_etag("trend-categories", *ALLOWED_CATEGORIES), lambda: ALLOWED_CATEGORIES)
 
 
 # ---------------------------------------------
@@ -95,6 +119,7 @@ def get_categories(db: Session = Depends(get_db)):
 # ---------------------------------------------
 @router.get("/leaderboard")
 def get_leaderboard(
+    request: Request,
     category: str = Query(..., description="카테고리명"),
     sort: str = Query(
         "hot",
@@ -117,98 +142,22 @@ def get_leaderboard(
         "most": "most", "volume": "most", "리뷰많음": "most", "리뷰 많은 순": "most",
     }
     sort_norm = sort_map.get(sort, "hot")
+    return _respond(request, db, "leaderboard", dict(
+        category=category, sort_norm=sort_norm, limit=limit, min_base=min_base, b=_norm_b(b),
+        filter_outliers=filter_outliers, allow_negative=allow_negative, max_ratio=max_ratio, max_jump=max_jump,
+    ))
 
-    a_date, b_date = _get_latest_and_prev_weeks(db, b)
 
-    # A가 없을 수 있으니 COALESCE(BASE) 사용
-    q = text(f"""
-        SELECT
-            pd.pid, pd.product_name, pd.brand,
-            pd.image_url, pd.product_url, pd.price_krw,
-            COALESCE(pdc.rag_text, '') AS rag_text,
-            CAST(COALESCE(a.review_count, pd.review_count, 0) AS SIGNED) AS a_cnt,
-            CAST(b.review_count AS SIGNED) AS b_cnt
-        FROM {TBL_PRODUCT} AS pd
-        LEFT JOIN {TBL_HISTORY} AS a
-               ON a.product_pid = pd.pid
-              AND DATE(a.period_start) = :a_date
-        JOIN {TBL_HISTORY} AS b
-               ON b.product_pid = pd.pid
-              AND DATE(b.period_start) = :b_date
-        LEFT JOIN {TBL_CHAIN} AS pdc
-               ON pdc.pid = pd.pid
-        WHERE pd.category = :cat
-          AND b.review_count IS NOT NULL
-          AND COALESCE(a.review_count, pd.review_count, 0) >= :min_base
-    """)
-    rows = db.execute(q, {
-        "a_date": a_date,
-        "b_date": b_date,
-        "cat": category,
-        "min_base": min_base
-    }).fetchall()
-
-    import math
-    KHOT = 300.0
-    ALPHA = 0.35
-
-    items: List[Dict[str, Any]] = []
-    for (pid, name, brand, img, url, price, rag, a_cnt, b_cnt) in rows:
-        a_val = int(a_cnt or 0)
-        b_val = int(b_cnt or 0)
-        if a_val < 0: a_val = 0
-        if b_val < 0: b_val = 0
-
-        delta = b_val - a_val
-        ratio = (b_val / a_val) if a_val > 0 else (float('inf') if b_val > 0 else 1.0)
-
-        # 제품 outlier 필터 → 카드에서 제외
-        use = True
-        if filter_outliers:
-            if (not allow_negative) and (delta < 0):
-                use = False
-            if use and (a_val > 0) and (ratio > max_ratio):
-                use = False
-            if use and (abs(delta) > max_jump):
-                use = False
-        if not use:
-            continue
+def _leaderboard_body(db: Session, category: str, sort_norm: str, limit: int, min_base: int, b: str,
+                      filter_outliers: bool, allow_negative: bool, max_ratio: float, max_jump: int):
+    snap = _ab_snapshot(db, category, b)
+    a_date, b_date = snap.a_date, snap.b_date
 
-        pct_score = (math.log1p(b_val) - math.log1p(a_val)) if (a_val > 0 or b_val > 0) else 0.0
-        hot_score = (delta) / ((a_val + KHOT) ** ALPHA) if (a_val + KHOT) > 0 else 0.0
-        most_score = float(b_val)
-
-        pct_percent = (((b_val / a_val) - 1.0) * 100.0) if a_val > 0 else (100.0 if b_val > 0 else 0.0)
-        index_val = ((b_val / a_val) * 100.0) if a_val > 0 else (100.0 if b_val > 0 else 100.0)
-
-        items.append({
-            "pid": pid,
-            "product_name": name,
-            "brand": brand,
-            "image_url": img,
-            "product_url": url,
-            "price_krw": price,
-            "rag_text": rag or "요즘 후기에서 자주 보이는 제품이에요.",
-            "a_count": a_val,
-            "b_count": b_val,
-            "delta": delta,
-            "hot_score": round(hot_score, 6),
-            "pct_score": round(pct_score, 6),
-            "most_score": round(most_score, 6),
-            "pct": round(pct_percent, 1),
-            "index": round(index_val, 1),
-        })
-
-    # 정렬
-    if sort_norm == "hot":
-        for it in items: it["rank_score"] = it["hot_score"]
-        items.sort(key=lambda x: (x["rank_score"], x["b_count"], x["pct_score"], x["pid"]), reverse=True)
-    elif sort_norm == "pct":
-        for it in items: it["rank_score"] = it["pct_score"]
-        items.sort(key=lambda x: (x["rank_score"], x["delta"], x["b_count"], x["pid"]), reverse=True)
-    else:  # most
-        for it in items: it["rank_score"] = it["most_score"]
-        items.sort(key=lambda x: (x["rank_score"], x["delta"], x["pct_score"], x["pid"]), reverse=True)
+    # 제품 outlier 필터(카드에서 제외) + 정렬은 스냅샷 배열에서 벡터 연산
+    items, total = trend_snapshot.leaderboard(
+        snap, sort_norm, limit, min_base,
+        filter_outliers, allow_negative, max_ratio, max_jump,
+    )
 
     return {
         "meta": {
@@ -217,9 +166,9 @@ def get_leaderboard(
             "b_date": str(b_date),
             "sort": sort_norm,
             "min_base": min_base,
-            "count": min(len(items), limit)
+            "count": min(total, limit)
         },
-        "items": items[:limit]
+        "items": items
     }
 
 
@@ -228,10 +177,15 @@ def get_leaderboard(
 # ---------------------------------------------
 @router.get("/product_timeseries")
 def product_timeseries(
+    request: Request,
     pid: int = Query(..., description="product_data.pid"),
     weeks: int = Query(12, ge=4, le=52),
     db: Session = Depends(get_db),
 ):
+    return _respond(request, db, "product_timeseries", dict(pid=pid, weeks=weeks))
+
+
+def _product_timeseries_body(db: Session, pid: int, weeks: int):
     q_meta = text(f"""
         SELECT pid, product_name, brand, image_url, product_url, price_krw, category
         FROM {TBL_PRODUCT}
@@ -243,8 +197,8 @@ def product_timeseries(
         raise HTTPException(status_code=404, detail="제품을 찾을 수 없습니다.")
 
     q_ts = text(f"""
-        SELECT DATE(period_start) AS d, CAST(review_count AS SIGNED) AS c
-        FROM {TBL_HISTORY}
+        SELECT period_start AS d, CAST(review_count AS SIGNED) AS c
+        FROM {catalog_facets.history_source(db)} AS h
         WHERE product_pid = :pid
         ORDER BY d DESC
         LIMIT {int(weeks)}
@@ -304,6 +258,7 @@ def product_timeseries(
 # ---------------------------------------------
 @router.get("/category_summary")
 def category_summary(
+    request: Request,
     category: str = Query(...),
     db: Session = Depends(get_db),
     b: Optional[str] = Query(None, description="B(비교) 날짜 YYYY-MM-DD 또는 'latest'"),
@@ -317,57 +272,23 @@ def category_summary(
     # ▶ 추가: 합계 vs 평균(제품수 보정) 토글
     normalize: str = Query("sum", description="sum | avg"),
 ):
-    a_date, b_date = _get_latest_and_prev_weeks(db, b)
+    return _respond(request, db, "category_summary", dict(
+        category=category, b=_norm_b(b), min_base=min_base,
+        filter_outliers=filter_outliers, allow_negative=allow_negative, max_ratio=max_ratio, max_jump=max_jump,
+        normalize=normalize,
+    ))
 
-    # per-product A/B를 불러와서, B값을 보정(carry-forward/clamp) 후 합산
-    q = text(f"""
-        SELECT
-            CAST(COALESCE(a.review_count, pd.review_count, 0) AS SIGNED) AS a_cnt,
-            CAST(b.review_count AS SIGNED) AS b_cnt
-        FROM {TBL_PRODUCT} pd
-        LEFT JOIN {TBL_HISTORY} a
-               ON a.product_pid = pd.pid
-              AND DATE(a.period_start) = :a_date
-        JOIN {TBL_HISTORY} b
-               ON b.product_pid = pd.pid
-              AND DATE(b.period_start) = :b_date
-        WHERE pd.category = :cat
-          AND COALESCE(a.review_count, pd.review_count, 0) >= :min_base
-    """)
-    rows = db.execute(q, {"a_date": a_date, "b_date": b_date, "cat": category, "min_base": min_base}).fetchall()
-
-    a_sum = 0
-    b_sum = 0
-    a_n = 0      # ▶ 추가: A 제품수
-    b_n = 0      # ▶ 추가: B 제품수
-
-    for a_cnt, b_cnt in rows:
-        a_val = int(a_cnt or 0)
-        b_val = int(b_cnt or 0)
-        if a_val < 0: a_val = 0
-        if b_val < 0: b_val = 0
-
-        # 보정(감소/급증 방지)
-        delta = b_val - a_val
-        ratio = (b_val / a_val) if a_val > 0 else (float('inf') if b_val > 0 else 1.0)
-
-        if filter_outliers:
-            if (not allow_negative) and delta < 0:
-                b_eff = a_val  # carry-forward
-            else:
-                b_eff = b_val
-                if a_val > 0 and ratio > max_ratio:
-                    b_eff = int(a_val * max_ratio)
-                if abs(b_eff - a_val) > max_jump:
-                    # 절대 점프 상한
-                    b_eff = a_val + max_jump if (b_eff >= a_val) else a_val  # 감소는 허용 안 함
-        else:
-            b_eff = max(b_val, a_val) if not allow_negative else b_val
-
-        a_sum += a_val
-        b_sum += b_eff
-        a_n += 1
-        b_n += 1
+
+def _category_summary_body(db: Session, category: str, b: str, min_base: int,
+                           filter_outliers: bool, allow_negative: bool, max_ratio: float, max_jump: int,
+                           normalize: str):
+    snap = _ab_snapshot(db, category, b)
+    a_date, b_date = snap.a_date, snap.b_date
+
+    # per-product B값 보정(carry-forward/clamp) 후 합산 — 스냅샷 배열 벡터 연산
+    sums = trend_snapshot.category_summary(snap, min_base, filter_outliers, allow_negative, max_ratio, max_jump)
+    a_sum, b_sum = sums["a_sum"], sums["b_sum"]
+    a_n, b_n = sums["a_n"], sums["b_n"]
 
     # ▶ 합계/평균 선택
     if normalize == "avg":
@@ -403,6 +324,7 @@ def category_summary(
 # ---------------------------------------------
 @router.get("/category_timeseries")
 def category_timeseries(
+    request: Request,
     weeks: int = Query(8, ge=4, le=52),
     filter_outliers: bool = Query(True, description="전주 대비 급감/급증 보정"),
     allow_negative: bool = Query(False, description="감소 허용 여부"),
@@ -412,105 +334,20 @@ def category_timeseries(
     normalize: str = Query("sum", description="sum | avg"),
     db: Session = Depends(get_db),
 ):
-    placeholders = ", ".join([f":c{i}" for i, _ in enumerate(ALLOWED_CATEGORIES)])
-    q = text(f"""
-        SELECT DATE(prh.period_start) AS d,
-               prh.product_pid        AS pid,
-               pd.category            AS cat,
-               CAST(prh.review_count AS SIGNED) AS cnt
-        FROM {TBL_HISTORY} prh
-        JOIN {TBL_PRODUCT} pd ON pd.pid = prh.product_pid
-        WHERE pd.category IN ({placeholders})
-        ORDER BY pid, d
-    """)
-    params = {f"c{i}": cat for i, cat in enumerate(ALLOWED_CATEGORIES)}
-    rows = db.execute(q, params).fetchall()
-    if not rows:
-        return {"series": [], "categories": ALLOWED_CATEGORIES}
-
-    from collections import defaultdict
-    per_pid = defaultdict(list)  # pid -> list[(d, cat, cnt)]
-    all_days = set()
-    for d, pid, cat, cnt in rows:
-        all_days.add(d)
-        per_pid[int(pid)].append((d, cat, int(cnt or 0)))
-
-    for pid in per_pid:
-        per_pid[pid].sort(key=lambda x: x[0])
-
-    days_sorted = sorted(all_days)
-    if len(days_sorted) > weeks:
-        days_sorted = days_sorted[-weeks:]
-
-    # ▶ 합계와 제품수(분모) 동시 집계
-    per_day_cat_sum = {str(d): {c: 0 for c in ALLOWED_CATEGORIES} for d in days_sorted}
-    per_day_cat_n   = {str(d): {c: 0 for c in ALLOWED_CATEGORIES} for d in days_sorted}
-
-    for pid, seq in per_pid.items():
-        prev_cnt: Optional[int] = None
-
-        for (d, cat, cnt) in seq:
-            if d not in days_sorted:
-                prev_cnt = cnt
-                continue
-
-            a_val = prev_cnt if prev_cnt is not None else cnt
-            b_val = cnt
-
-            # 보정 로직
-            if prev_cnt is None:
-                eff = max(0, b_val)
-            else:
-                delta = b_val - a_val
-                ratio = (b_val / a_val) if a_val > 0 else (float('inf') if b_val > 0 else 1.0)
-
-                if filter_outliers:
-                    if (not allow_negative) and delta < 0:
-                        eff = a_val  # 감소 → carry-forward
-                    else:
-                        eff = b_val
-                        if a_val > 0 and ratio > max_ratio:
-                            eff = int(a_val * max_ratio)
-                        if abs(eff - a_val) > max_jump:
-                            eff = a_val + max_jump if (eff >= a_val) else a_val
-                else:
-                    eff = max(b_val, a_val) if not allow_negative else b_val
-
-            key = str(d)
-            per_day_cat_sum[key][cat] += max(0, eff)
-            per_day_cat_n[key][cat]   += 1          # ▶ 분모(제품수) 카운트
-
-            prev_cnt = eff  # eff를 다음 주의 기준으로 사용
-
-    days_final = [str(d) for d in days_sorted]
-    if not days_final:
-        return {"series": [], "categories": ALLOWED_CATEGORIES}
-
-    # ▶ 기준(첫 주) 값도 normalize에 맞춰 계산
-    def metric(day: str, c: str) -> float:
-        s = int(per_day_cat_sum[day].get(c, 0))
-        n = int(per_day_cat_n[day].get(c, 0))
-        if normalize == "avg":
-            return s / max(1, n)
-        return float(s)
-
-    base_vals = {c: max(1e-9, metric(days_final[0], c)) for c in ALLOWED_CATEGORIES}
+    return _respond(request, db, "category_timeseries", dict(
+        weeks=weeks, filter_outliers=filter_outliers, allow_negative=allow_negative,
+        max_ratio=max_ratio, max_jump=max_jump, normalize=normalize,
+    ))
 
-    series = []
-    for ds in days_final:
-        row = {"date": ds}
-        for c in ALLOWED_CATEGORIES:
-            v = metric(ds, c)
-            idx = round((v / base_vals[c]) * 100.0, 1) if base_vals[c] > 0 else 100.0
-            # 주의: 프런트 호환을 위해 키 이름은 유지하되 값만 토글 반영
-            row[c] = {"sum": (v if normalize == "sum" else round(v, 4)), "index": idx}
-        series.append(row)
 
-    return {
-        "series": series,
-        "categories": ALLOWED_CATEGORIES,
-        "normalize": normalize,  # 참고용 메타
-    }
+def _category_timeseries_body(db: Session, weeks: int, filter_outliers: bool, allow_negative: bool,
+                              max_ratio: float, max_jump: int, normalize: str):
+    # (pid × week) 행렬에서 주차 열 단위 벡터 연산 (새 주차는 열 추가로 반영)
+    m = trend_matrix.get_matrix(db)
+    return trend_matrix.category_timeseries(
+        m, ALLOWED_CATEGORIES, weeks,
+        filter_outliers, allow_negative, max_ratio, max_jump, normalize,
+    )
 
 
 # ---------------------------------------------
@@ -519,6 +356,7 @@ def category_timeseries(
 # ---------------------------------------------
 @router.get("/brand_positioning")
 def brand_positioning(
+    request: Request,
     category: str = Query(...),
     db: Session = Depends(get_db),
     b: Optional[str] = Query(None, description="B(비교) 날짜 YYYY-MM-DD 또는 'latest'"),
@@ -533,69 +371,23 @@ def brand_positioning(
 ):
     if category not in ALLOWED_CATEGORIES:
         raise HTTPException(status_code=400, detail="허용되지 않은 카테고리")
+    return _respond(request, db, "brand_positioning", dict(
+        category=category, b=_norm_b(b), min_base=min_base,
+        filter_outliers=filter_outliers, allow_negative=allow_negative, max_ratio=max_ratio, max_jump=max_jump,
+        topk=topk,
+    ))
 
-    a_date, b_date = _get_latest_and_prev_weeks(db, b)
 
-    q = text(f"""
-        SELECT
-            pd.brand,
-            CAST(COALESCE(a.review_count, pd.review_count, 0) AS SIGNED) AS a_cnt,
-            CAST(b.review_count AS SIGNED) AS b_cnt
-        FROM {TBL_PRODUCT} pd
-        LEFT JOIN {TBL_HISTORY} a
-               ON a.product_pid = pd.pid
-              AND DATE(a.period_start) = :a_date
-        JOIN {TBL_HISTORY} b
-               ON b.product_pid = pd.pid
-              AND DATE(b.period_start) = :b_date
-        WHERE pd.category = :cat
-          AND COALESCE(a.review_count, pd.review_count, 0) >= :min_base
-    """)
-    rows = db.execute(q, {"a_date": a_date, "b_date": b_date, "cat": category, "min_base": min_base}).fetchall()
-
-    from collections import defaultdict
-    agg_a = defaultdict(int)
-    agg_b = defaultdict(int)
-
-    for brand, a_cnt, b_cnt in rows:
-        a_val = int(a_cnt or 0);  b_val = int(b_cnt or 0)
-        if a_val < 0: a_val = 0
-        if b_val < 0: b_val = 0
-
-        delta = b_val - a_val
-        ratio = (b_val / a_val) if a_val > 0 else (float('inf') if b_val > 0 else 1.0)
-
-        if filter_outliers:
-            if (not allow_negative) and delta < 0:
-                b_eff = a_val
-            else:
-                b_eff = b_val
-                if a_val > 0 and ratio > max_ratio:
-                    b_eff = int(a_val * max_ratio)
-                if abs(b_eff - a_val) > max_jump:
-                    b_eff = a_val + max_jump if (b_eff >= a_val) else a_val
-        else:
-            b_eff = max(b_val, a_val) if not allow_negative else b_val
-
-        agg_a[brand] += a_val
-        agg_b[brand] += b_eff
-
-    items = []
-    for brand in agg_b.keys():
-        base_sum = int(agg_a[brand])
-        current_sum = int(agg_b[brand])
-        delta_sum = current_sum - base_sum
-        if base_sum <= 0 and current_sum <= 0:
-            continue
-        items.append({
-            "brand": brand,
-            "base_sum": base_sum,
-            "current_sum": current_sum,
-            "delta_sum": delta_sum,
-        })
+def _brand_positioning_body(db: Session, category: str, b: str, min_base: int,
+                            filter_outliers: bool, allow_negative: bool, max_ratio: float, max_jump: int,
+                            topk: int):
+    snap = _ab_snapshot(db, category, b)
+    a_date, b_date = snap.a_date, snap.b_date
 
-    items.sort(key=lambda x: (x["delta_sum"], x["current_sum"]), reverse=True)
-    items = items[:topk]
+    # per-product 보정 후 브랜드별 합계 (브랜드 코드 그룹 합계)
+    items = trend_snapshot.brand_positioning(
+        snap, min_base, filter_outliers, allow_negative, max_ratio, max_jump, topk,
+    )
 
     return {
         "meta": {"category": category, "a_date": ("BASE" if a_date is None else str(a_date)),
@@ -610,6 +402,7 @@ def brand_positioning(
 # ---------------------------------------------
 @router.get("/brand_contributors")
 def brand_contributors(
+    request: Request,
     category: str = Query(...),
     db: Session = Depends(get_db),
     b: Optional[str] = Query(None, description="B(비교) 날짜 YYYY-MM-DD 또는 'latest'"),
@@ -624,77 +417,23 @@ def brand_contributors(
 ):
     if category not in ALLOWED_CATEGORIES:
         raise HTTPException(status_code=400, detail="허용되지 않은 카테고리")
+    return _respond(request, db, "brand_contributors", dict(
+        category=category, b=_norm_b(b), min_base=min_base,
+        filter_outliers=filter_outliers, allow_negative=allow_negative, max_ratio=max_ratio, max_jump=max_jump,
+        topk=topk,
+    ))
 
-    a_date, b_date = _get_latest_and_prev_weeks(db, b)
 
-    q = text(f"""
-        SELECT
-            pd.brand,
-            pd.pid,
-            pd.product_name,
-            CAST(COALESCE(a.review_count, pd.review_count, 0) AS SIGNED) AS a_cnt,
-            CAST(b.review_count AS SIGNED) AS b_cnt
-        FROM {TBL_PRODUCT} pd
-        LEFT JOIN {TBL_HISTORY} a
-               ON a.product_pid = pd.pid
-              AND DATE(a.period_start) = :a_date
-        JOIN {TBL_HISTORY} b
-               ON b.product_pid = pd.pid
-              AND DATE(b.period_start) = :b_date
-        WHERE pd.category = :cat
-          AND COALESCE(a.review_count, pd.review_count, 0) >= :min_base
-    """)
-    rows = db.execute(q, {"a_date": a_date, "b_date": b_date, "cat": category, "min_base": min_base}).fetchall()
-
-    from collections import defaultdict
-    agg = defaultdict(lambda: {"a": 0, "b": 0})
-    top_prod_per_brand: Dict[str, Dict[str, Any]] = {}
-
-    for brand, pid, name, a_cnt, b_cnt in rows:
-        a_val = int(a_cnt or 0);  b_val = int(b_cnt or 0)
-        if a_val < 0: a_val = 0
-        if b_val < 0: b_val = 0
-
-        delta = b_val - a_val
-        ratio = (b_val / a_val) if a_val > 0 else (float('inf') if b_val > 0 else 1.0)
-
-        if filter_outliers:
-            if (not allow_negative) and delta < 0:
-                b_eff = a_val
-            else:
-                b_eff = b_val
-                if a_val > 0 and ratio > max_ratio:
-                    b_eff = int(a_val * max_ratio)
-                if abs(b_eff - a_val) > max_jump:
-                    b_eff = a_val + max_jump if (b_eff >= a_val) else a_val
-        else:
-            b_eff = max(b_val, a_val) if not allow_negative else b_val
-
-        agg[brand]["a"] += a_val
-        agg[brand]["b"] += b_eff
-
-        # 대표 제품(Δ 절대값 최대, 보정 기준)
-        d_eff = b_eff - a_val
-        best = top_prod_per_brand.get(brand)
-        if (best is None) or (abs(d_eff) > abs(best["delta"])):
-            top_prod_per_brand[brand] = {"pid": int(pid), "name": name, "delta": int(d_eff)}
-
-    items = []
-    for brand, sums in agg.items():
-        a_sum = int(sums["a"]); b_sum = int(sums["b"])
-        delta = b_sum - a_sum
-        pct = ((b_sum / a_sum) - 1.0) * 100.0 if a_sum > 0 else (100.0 if b_sum > 0 else 0.0)
-        items.append({
-            "brand": brand,
-            "base_sum": a_sum,
-            "curr_sum": b_sum,
-            "delta": delta,
-            "pct": round(pct, 1),
-            "top_product": top_prod_per_brand.get(brand),
-        })
+def _brand_contributors_body(db: Session, category: str, b: str, min_base: int,
+                             filter_outliers: bool, allow_negative: bool, max_ratio: float, max_jump: int,
+                             topk: int):
+    snap = _ab_snapshot(db, category, b)
+    a_date, b_date = snap.a_date, snap.b_date
 
-    top = sorted(items, key=lambda x: (x["delta"], x["curr_sum"]), reverse=True)[:topk]
-    bottom = sorted(items, key=lambda x: (x["delta"], -x["curr_sum"]))[:topk]
+    # per-product 보정 후 브랜드 집계 + 브랜드별 대표 제품(|Δ| 최대)
+    top, bottom = trend_snapshot.brand_contributors(
+        snap, min_base, filter_outliers, allow_negative, max_ratio, max_jump, topk,
+    )
 
     return {
         "meta": {"category": category, "a_date": ("BASE" if a_date is None else str(a_date)),
@@ -706,6 +445,7 @@ def brand_contributors(
 # --- (추가) 카드 썸네일용 미니 시계열 (그림자 영향 無, 원본 노출)
 @router.get("/product_mini_ts")
 def product_mini_ts(
+    request: Request,
     pids: str = Query(..., description="쉼표로 구분된 pid 목록, 예: 1,2,3"),
     window: int = Query(8, ge=4, le=24),
     db: Session = Depends(get_db),
@@ -718,48 +458,113 @@ def product_mini_ts(
         pid_list = [int(x) for x in pids.split(",") if x.strip().isdigit()]
     except Exception:
         raise HTTPException(status_code=400, detail="pids 형식 오류")
+    return _respond(request, db, "product_mini_ts", dict(pid_list=pid_list, window=window))
 
+
+def _product_mini_ts_body(db: Session, pid_list: List[int], window: int):
     if not pid_list:
         return {"items": []}
-
-    q_days = text(f"""
-        SELECT DISTINCT DATE(period_start) AS d
-        FROM {TBL_HISTORY}
-        ORDER BY d DESC
-        LIMIT :w
-    """)
-    days_rows = db.execute(q_days, {"w": window}).fetchall()
-    if not days_rows:
+    # 공용 (pid × week) 행렬에서 잘라냄 (pid/날짜 IN 목록 쿼리 없음)
+    sp = trend_matrix.sparklines(trend_matrix.get_matrix(db), pid_list, window)
+    if not sp["weeks"]:
         return {"items": []}
+    return {"items": [{"pid": pid, "series": seq} for pid, seq in zip(sp["pids"], sp["series"])]}
 
-    days = [str(r[0]) for r in days_rows][::-1]
-    placeholders_pid = ", ".join([f":p{i}" for i,_ in enumerate(pid_list)])
-    placeholders_day = ", ".join([f":d{i}" for i,_ in enumerate(days)])
 
-    q = text(f"""
-        SELECT product_pid, DATE(period_start) AS d, CAST(review_count AS SIGNED) AS c
-        FROM {TBL_HISTORY}
-        WHERE product_pid IN ({placeholders_pid})
-          AND DATE(period_start) IN ({placeholders_day})
-    """)
-    params = {**{f"p{i}": pid_list[i] for i in range(len(pid_list))},
-              **{f"d{i}": days[i] for i in range(len(days))}}
-    rows = db.execute(q, params).fetchall()
-
-    from collections import defaultdict
-    by_pid = defaultdict(dict)  # pid -> {day: count}
-    for pid, d, c in rows:
-        by_pid[int(pid)][str(d)] = int(c or 0)
-
-    items = []
-    for pid in pid_list:
-        seq = []
-        prev = None
-        for day in days:
-            v = int(by_pid.get(pid, {}).get(day, 0))
-            if prev is not None and v < prev:
-                v = prev  # 누적값 비감소 보장
-            seq.append(v)
-            prev = v
-        items.append({"pid": pid, "series": seq})
-    return {"items": items}
+# --- 카드 묶음 스파크라인 (리더보드/브랜드 화면 전체를 한 번에)
+@router.get("/sparklines")
+def sparklines(
+    request: Request,
+    pids: str = Query(..., description=f"쉼표로 구분된 pid 목록 (최대 {SPARKLINE_MAX_PIDS}개)"),
+    window: int = Query(8, ge=2, le=52),
+    encoding: str = Query("raw", description="raw | delta (첫 값 + 주차별 증가분)"),
+    db: Session = Depends(get_db),
+):
+    """
+    반환 (컬럼형):
+    { "weeks": ["2024-01-01", ...], "pids": [123, ...], "series": [[10,12,13,...], ...], "encoding": "raw" }
+    series[i]는 pids[i]의 weeks 축 값 (누적 비감소 보정, product_mini_ts와 동일 규칙)
+    """
+    pid_list, seen = [], set()
+    for x in pids.split(","):
+        x = x.strip()
+        if not x:
+            continue
+        if not x.isdigit():
+            raise HTTPException(status_code=400, detail="pids 형식 오류")
+        if int(x) not in seen:
+            seen.add(int(x))
+            pid_list.append(int(x))
+    if len(pid_list) > SPARKLINE_MAX_PIDS:
+        raise HTTPException(status_code=400, detail=f"pids는 최대 {SPARKLINE_MAX_PIDS}개까지 가능합니다.")
+    if encoding not in ("raw", "delta"):
+        raise HTTPException(status_code=400, detail="encoding은 raw | delta")
+    return _respond(request, db, "sparklines", dict(pid_list=pid_list, window=window, encoding=encoding))
+
+
+def _sparklines_body(db: Session, pid_list: List[int], window: int, encoding: str):
+    return trend_matrix.sparklines(trend_matrix.get_matrix(db), pid_list, window, delta=(encoding == "delta"))
+
+
+# ---------------------------------------------
+# 응답 캐시 빌더 / warm-up
+# ---------------------------------------------
+_BUILDERS = {
+    "leaderboard": _leaderboard_body,
+    "product_timeseries": _product_timeseries_body,
+    "category_summary": _category_summary_body,
+    "category_timeseries": _category_timeseries_body,
+    "brand_positioning": _brand_positioning_body,
+    "brand_contributors": _brand_contributors_body,
+    "product_mini_ts": _product_mini_ts_body,
+    "sparklines": _sparklines_body,
+}
+
+_AB_DEFAULTS = dict(b="latest", min_base=75, filter_outliers=True, allow_negative=False, max_ratio=3.0, max_jump=5000)
+_LEADERBOARD_DEFAULTS = dict(b="latest", filter_outliers=True, allow_negative=False, max_ratio=3.0, max_jump=500)
+
+
+def _default_views() -> List[Tuple[str, Dict[str, Any]]]:
+    """프런트 대시보드 기본 화면 파라미터 (카테고리별)"""
+    views: List[Tuple[str, Dict[str, Any]]] = []
+    for normalize in ("sum", "avg"):
+        views.append(("category_timeseries", dict(
+            weeks=8, filter_outliers=True, allow_negative=False, max_ratio=3.0, max_jump=5000, normalize=normalize,
+        )))
+    for category in ALLOWED_CATEGORIES:
+        for sort_norm in ("hot", "pct", "most"):
+            views.append(("leaderboard", dict(
+                category=category, sort_norm=sort_norm, limit=3, min_base=75, **_LEADERBOARD_DEFAULTS,
+            )))
+        views.append(("leaderboard", dict(
+            category=category, sort_norm="most", limit=30, min_base=1, **_LEADERBOARD_DEFAULTS,
+        )))
+        views.append(("category_summary", dict(category=category, normalize="sum", **_AB_DEFAULTS)))
+        views.append(("brand_positioning", dict(category=category, topk=50, **_AB_DEFAULTS)))
+        views.append(("brand_contributors", dict(category=category, topk=5, **_AB_DEFAULTS)))
+    return views
+
+
+def warm_trends_cache(db: Optional[Session] = None) -> int:
+    """최신 버전 기준 기본 화면을 응답 캐시에 미리 계산. 계산한 화면 수 반환."""
+    own = db is None
+    if own:
+        db = SessionLocal()
+    try:
+        _, index = catalog_facets.get_period_index(db)
+        version = index.labels[-1] if len(index) else ""
+        if not version:
+            return 0
+        n = 0
+        for endpoint, params in _default_views():
+            build = _BUILDERS[endpoint]
+            try:
+                trend_cache.get_or_build(endpoint, trend_cache.param_key(params), version,
+                                         lambda: build(db, **params))
+                n += 1
+            except HTTPException:
+                continue   # 데이터 없는 카테고리 등
+        return n
+    finally:
+        if own:
+            db.close()
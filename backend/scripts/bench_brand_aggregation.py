@@ -0,0 +1,155 @@
+# backend/scripts/bench_brand_aggregation.py
+# -*- coding: utf-8 -*-
+"""
+브랜드 집계(brand_positioning / brand_contributors) 성능 측정 — DB 없이 합성 데이터.
+
+- legacy    : 조인 행을 Python 루프로 돌며 dict에 브랜드 합계/대표 제품 누적 후 전체 정렬 (이전 방식)
+- vectorized: services/trend_snapshot.py (브랜드 코드 bincount + argpartition top-k)
+
+두 결과가 같은지 먼저 확인한 뒤 반복 실행 중앙값(ms)을 출력한다.
+
+사용 예 (backend 디렉터리에서):
+    python scripts/bench_brand_aggregation.py                      # 10k, 100k 제품
+    python scripts/bench_brand_aggregation.py --sizes 10000 100000 --brands-ratio 0.05 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.trend_snapshot import ABSnapshot, brand_contributors, brand_positioning  # noqa: E402
+
+PARAMS = dict(min_base=75, filter_outliers=True, allow_negative=False, max_ratio=3.0, max_jump=5000)
+
+
+def make_rows(n: int, n_brands: int, seed: int = 7):
+    """_fetch_rows와 같은 모양의 합성 행"""
+    rnd = random.Random(seed)
+    rows = []
+    for pid in range(1, n + 1):
+        a = int(rnd.paretovariate(1.2) * 40)
+        r = rnd.random()
+        if r < 0.1:
+            b = max(0, a - rnd.randint(0, 50))           # 감소
+        elif r < 0.12:
+            b = a * rnd.randint(4, 10) + 6000            # 급증
+        else:
+            b = a + rnd.randint(0, 120)
+        rows.append((pid, f"제품{pid}", f"브랜드{rnd.randrange(n_brands)}", None, None, None, "", a, b))
+    return rows
+
+
+# ============================================
+# legacy: 행 단위 Python 루프
+# ============================================
+def _legacy_b_eff(a_val, b_val, filter_outliers, allow_negative, max_ratio, max_jump):
+    delta = b_val - a_val
+    ratio = (b_val / a_val) if a_val > 0 else (float('inf') if b_val > 0 else 1.0)
+    if filter_outliers:
+        if (not allow_negative) and delta < 0:
+            return a_val
+        b_eff = b_val
+        if a_val > 0 and ratio > max_ratio:
+            b_eff = int(a_val * max_ratio)
+        if abs(b_eff - a_val) > max_jump:
+            b_eff = a_val + max_jump if (b_eff >= a_val) else a_val
+        return b_eff
+    return max(b_val, a_val) if not allow_negative else b_val
+
+
+def legacy_positioning(rows, min_base, filter_outliers, allow_negative, max_ratio, max_jump, topk):
+    agg_a, agg_b = defaultdict(int), defaultdict(int)
+    for _, _, brand, _, _, _, _, a_cnt, b_cnt in rows:
+        a_val = max(0, int(a_cnt or 0))
+        if a_val < min_base:
+            continue
+        b_val = max(0, int(b_cnt or 0))
+        agg_a[brand] += a_val
+        agg_b[brand] += _legacy_b_eff(a_val, b_val, filter_outliers, allow_negative, max_ratio, max_jump)
+    items = []
+    for brand in agg_b.keys():
+        base_sum, current_sum = int(agg_a[brand]), int(agg_b[brand])
+        if base_sum <= 0 and current_sum <= 0:
+            continue
+        items.append({"brand": brand, "base_sum": base_sum, "current_sum": current_sum,
+                      "delta_sum": current_sum - base_sum})
+    items.sort(key=lambda x: (x["delta_sum"], x["current_sum"]), reverse=True)
+    return items[:topk]
+
+
+def legacy_contributors(rows, min_base, filter_outliers, allow_negative, max_ratio, max_jump, topk):
+    agg = defaultdict(lambda: {"a": 0, "b": 0})
+    top_prod = {}
+    for pid, name, brand, _, _, _, _, a_cnt, b_cnt in rows:
+        a_val = max(0, int(a_cnt or 0))
+        if a_val < min_base:
+            continue
+        b_val = max(0, int(b_cnt or 0))
+        b_eff = _legacy_b_eff(a_val, b_val, filter_outliers, allow_negative, max_ratio, max_jump)
+        agg[brand]["a"] += a_val
+        agg[brand]["b"] += b_eff
+        d_eff = b_eff - a_val
+        best = top_prod.get(brand)
+        if best is None or abs(d_eff) > abs(best["delta"]):
+            top_prod[brand] = {"pid": int(pid), "name": name, "delta": int(d_eff)}
+    items = []
+    for brand, sums in agg.items():
+        a_sum, b_sum = int(sums["a"]), int(sums["b"])
+        pct = ((b_sum / a_sum) - 1.0) * 100.0 if a_sum > 0 else (100.0 if b_sum > 0 else 0.0)
+        items.append({"brand": brand, "base_sum": a_sum, "curr_sum": b_sum, "delta": b_sum - a_sum,
+                      "pct": round(pct, 1), "top_product": top_prod.get(brand)})
+    top = sorted(items, key=lambda x: (x["delta"], x["curr_sum"]), reverse=True)[:topk]
+    bottom = sorted(items, key=lambda x: (x["delta"], -x["curr_sum"]))[:topk]
+    return top, bottom
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--brands-ratio", type=float, default=0.05, help="브랜드 수 = 제품 수 × ratio")
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    print(f"{'products':>9} {'brands':>7} | {'endpoint':<19} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        n_brands = max(1, int(n * args.brands_ratio))
+        rows = make_rows(n, n_brands)
+        snap = ABSnapshot("bench", date(2024, 1, 1), date(2024, 1, 8), "bench", rows)
+
+        cases = [
+            ("brand_positioning",
+             lambda: legacy_positioning(rows, topk=50, **PARAMS),
+             lambda: brand_positioning(snap, topk=50, **PARAMS)),
+            ("brand_contributors",
+             lambda: legacy_contributors(rows, topk=5, **PARAMS),
+             lambda: brand_contributors(snap, topk=5, **PARAMS)),
+        ]
+        for name, legacy, vectorized in cases:
+            got, want = vectorized(), legacy()
+            if got != want:
+                print(f"❌ {name} 결과 불일치 (n={n})")
+                sys.exit(1)
+            t_legacy = _median_ms(legacy, args.repeat)
+            t_vec = _median_ms(vectorized, args.repeat)
+            print(f"{n:>9} {n_brands:>7} | {name:<19} {t_legacy:>10.2f} {t_vec:>10.2f} "
+                  f"{t_legacy / max(t_vec, 1e-9):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
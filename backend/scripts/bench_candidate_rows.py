@@ -0,0 +1,120 @@
+# backend/scripts/bench_candidate_rows.py
+# -*- coding: utf-8 -*-
+"""
+추천 후보 rows 경량화 효과 측정 (요청 1회 기준).
+
+- legacy : 후보 30개 전체에 rag_text/ingredients 등 모든 필드를 조회하던 방식
+- compact: 후보 30개는 (pid, price, category, review_count)만 조회하고
+           최종 top-N만 상세 필드를 한 번 더 조회하는 방식
+
+측정 항목: 응답 바이트(값 기준 근사치), tracemalloc peak, 소요 시간
+
+사용 예 (backend 디렉터리에서):
+    python scripts/bench_candidate_rows.py --category 크림 --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import engine  # noqa: E402
+
+LEGACY_SQL = text("""
+    SELECT p.pid, p.brand, p.product_name, p.price_krw, p.category,
+           p.rag_text, p.image_url, p.product_url, p.ingredients, p.review_count
+    FROM product_data_chain AS p
+    WHERE (:category IS NULL OR p.category = :category)
+    ORDER BY p.review_count DESC, p.pid ASC
+    LIMIT :limit
+""")
+
+COMPACT_SQL = text("""
+    SELECT p.pid, p.price_krw, p.category, p.review_count
+    FROM product_data_chain AS p
+    WHERE (:category IS NULL OR p.category = :category)
+    ORDER BY p.review_count DESC, p.pid ASC
+    LIMIT :limit
+""")
+
+HYDRATE_SQL = text("""
+    SELECT p.pid, p.brand, p.product_name, p.price_krw, p.category,
+           p.rag_text, p.image_url, p.product_url, p.ingredients
+    FROM product_data_chain AS p
+    WHERE p.pid IN :pids
+""").bindparams(bindparam("pids", expanding=True))
+
+
+def _payload_bytes(rows: List[Dict[str, Any]]) -> int:
+    total = 0
+    for r in rows:
+        for v in r.values():
+            if v is None:
+                continue
+            total += len(v.encode("utf-8")) if isinstance(v, str) else 8
+    return total
+
+
+def run_legacy(conn, category, limit, top_n):
+    rows = [dict(r) for r in conn.execute(LEGACY_SQL, {"category": category, "limit": limit}).mappings()]
+    # 기존 파이프라인은 정렬 과정에서 전체 rows를 여러 번 정렬
+    rows.sort(key=lambda r: (r.get("price_krw") is None, r.get("price_krw") or 0, r["pid"]))
+    return rows, _payload_bytes(rows)
+
+
+def run_compact(conn, category, limit, top_n):
+    cands = [dict(r) for r in conn.execute(COMPACT_SQL, {"category": category, "limit": limit}).mappings()]
+    cands.sort(key=lambda r: (r.get("price_krw") is None, r.get("price_krw") or 0, r["pid"]))
+    top = [c["pid"] for c in cands[:top_n]]
+    rows = [dict(r) for r in conn.execute(HYDRATE_SQL, {"pids": tuple(top)}).mappings()] if top else []
+    return rows, _payload_bytes(cands) + _payload_bytes(rows)
+
+
+def measure(fn, category, limit, top_n, repeat):
+    bytes_, peaks, ms = [], [], []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            _, b = fn(conn, category, limit, top_n)
+            ms.append((time.perf_counter() - t0) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            bytes_.append(b)
+    return {
+        "bytes": int(statistics.mean(bytes_)),
+        "peak_kb": round(statistics.mean(peaks) / 1024, 1),
+        "p50_ms": round(statistics.median(ms), 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--category", default=None)
+    ap.add_argument("--limit", type=int, default=30)
+    ap.add_argument("--top-n", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    legacy = measure(run_legacy, args.category, args.limit, args.top_n, args.repeat)
+    compact = measure(run_compact, args.category, args.limit, args.top_n, args.repeat)
+
+    print(f"category={args.category or '(all)'} limit={args.limit} top_n={args.top_n} repeat={args.repeat}")
+    print(f"{'':10}{'bytes':>12}{'peak KB':>12}{'p50 ms':>10}")
+    for name, m in (("legacy", legacy), ("compact", compact)):
+        print(f"{name:10}{m['bytes']:>12,}{m['peak_kb']:>12}{m['p50_ms']:>10}")
+    if legacy["bytes"]:
+        print(f"bytes  reduction: {100 * (1 - compact['bytes'] / legacy['bytes']):.1f}%")
+    if legacy["peak_kb"]:
+        print(f"memory reduction: {100 * (1 - compact['peak_kb'] / legacy['peak_kb']):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
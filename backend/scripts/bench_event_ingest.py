@@ -0,0 +1,144 @@
+# backend/scripts/bench_event_ingest.py
+# -*- coding: utf-8 -*-
+"""
+이벤트 적재 처리량 비교 — 실제 DB 사용 (bench_* 세션/이벤트를 쓰고 끝나면 삭제).
+
+- sync    : 기존 /events/log 경로 (요청마다 세션 조회/생성 + INSERT + 카운트 UPDATE + 커밋)
+- buffered: services/event_ingest.py (큐 접수 → writer가 다중 행 INSERT)
+            접수(응답) 처리량과 DB 반영 완료까지의 처리량을 따로 출력
+- batch   : /events/batch (--batch-size개씩 세션 upsert 1회 + 다중 행 INSERT, id 범위 계산)
+
+사용 예 (backend 디렉터리에서):
+    python scripts/bench_event_ingest.py --events 5000 --sessions 50 --threads 8
+    python scripts/bench_event_ingest.py --events 20000 --flush-events 1000 --keep   # 데이터 남김
+    python scripts/bench_event_ingest.py --events 20000 --batch-size 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import SessionLocal  # noqa: E402
+from routers.events import BatchEventRequest, EventLogRequest, _log_event_sync, log_batch_events  # noqa: E402
+from services.event_ingest import EventIngestor  # noqa: E402
+
+BENCH_EVENT_TYPE = "bench_ingest"
+
+
+def make_requests(n: int, sessions: int, prefix: str):
+    sids = [f"{prefix}{i:04d}"[:36] for i in range(sessions)]
+    return [
+        EventLogRequest(session_id=sids[i % sessions], event_type=BENCH_EVENT_TYPE,
+                        event_target="product", target_id=str(i), page_url="/bench")
+        for i in range(n)
+    ]
+
+
+def run_sync(reqs, threads: int) -> float:
+    def _one(r):
+        db = SessionLocal()
+        try:
+            _log_event_sync(r, db)
+        finally:
+            db.close()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(_one, reqs))
+    return time.perf_counter() - t0
+
+
+def run_buffered(reqs, threads: int, flush_ms: int, flush_events: int):
+    from datetime import datetime
+    from routers.events import _event_row
+
+    ing = EventIngestor(SessionLocal, spill_dir=tempfile.mkdtemp(prefix="event_spill_"),
+                        flush_ms=flush_ms, flush_events=flush_events, queue_max=max(len(reqs), 1))
+    ing.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        accepted = sum(ex.map(lambda r: ing.submit(_event_row(r, datetime.utcnow())), reqs))
+    t_ack = time.perf_counter() - t0
+    ing.stop(timeout=600)
+    t_done = time.perf_counter() - t0
+    return accepted, t_ack, t_done, ing.stats()
+
+
+def run_batch(reqs, threads: int, batch_size: int):
+    def _one(chunk):
+        db = SessionLocal()
+        try:
+            return log_batch_events(BatchEventRequest(events=chunk), db)["timing_ms"]["total"]
+        finally:
+            db.close()
+
+    chunks = [reqs[i:i + batch_size] for i in range(0, len(reqs), batch_size)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        per_batch_ms = list(ex.map(_one, chunks))
+    return time.perf_counter() - t0, per_batch_ms
+
+
+def cleanup(prefix: str):
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM event_logs WHERE event_type = :t AND session_id LIKE :p"),
+                   {"t": BENCH_EVENT_TYPE, "p": prefix + "%"})
+        db.execute(text("DELETE FROM user_sessions WHERE session_id LIKE :p"), {"p": prefix + "%"})
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--events", type=int, default=5000)
+    ap.add_argument("--sessions", type=int, default=50)
+    ap.add_argument("--threads", type=int, default=8, help="동시 요청 수 (요청 스레드 흉내)")
+    ap.add_argument("--flush-ms", type=int, default=200)
+    ap.add_argument("--flush-events", type=int, default=500)
+    ap.add_argument("--batch-size", type=int, default=100, help="/events/batch 1회 이벤트 수")
+    ap.add_argument("--keep", action="store_true", help="벤치 데이터 삭제하지 않음")
+    args = ap.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+    try:
+        prefix = f"bench-{run_id}-s-"
+        t = run_sync(make_requests(args.events, args.sessions, prefix), args.threads)
+        results.append(("sync (per event)", args.events / t, None, t))
+
+        prefix = f"bench-{run_id}-b-"
+        accepted, t_ack, t_done, stats = run_buffered(
+            make_requests(args.events, args.sessions, prefix), args.threads, args.flush_ms, args.flush_events
+        )
+        results.append(("buffered", accepted / t_done, accepted / t_ack, t_done))
+
+        prefix = f"bench-{run_id}-m-"
+        t, per_batch_ms = run_batch(make_requests(args.events, args.sessions, prefix), args.threads, args.batch_size)
+        results.append((f"batch x{args.batch_size}", args.events / t, None, t))
+    finally:
+        if not args.keep:
+            cleanup(f"bench-{run_id}-")
+
+    print(f"events={args.events}, sessions={args.sessions}, threads={args.threads}")
+    print(f"{'path':<18} {'durable ev/s':>13} {'ack ev/s':>10} {'total s':>8}")
+    for name, durable, ack, total in results:
+        print(f"{name:<18} {durable:>13.0f} {(ack or durable):>10.0f} {total:>8.2f}")
+    print(f"buffered writer: batches={stats['batches']}, last_batch={stats['last_batch']}, "
+          f"last_flush_ms={stats['last_flush_ms']}, rejected={stats['rejected']}")
+    per_batch_ms.sort()
+    print(f"/events/batch per batch ms: p50={per_batch_ms[len(per_batch_ms) // 2]:.1f}, "
+          f"max={per_batch_ms[-1]:.1f} ({len(per_batch_ms)} batches)")
+
+
+if __name__ == "__main__":
+    main()
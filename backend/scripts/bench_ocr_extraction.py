@@ -0,0 +1,119 @@
+# backend/scripts/bench_ocr_extraction.py
+# -*- coding: utf-8 -*-
+"""
+OCR 성분 추출 벤치마크: 기존 단어 단위 매칭 vs n-gram 최장 일치 매칭.
+
+코퍼스: scripts/ocr_corpus/ocr_dumps.jsonl  ({"id", "ocr_text", "expected": [...]})
+지표  : recall(정규화 이름 기준), precision, 샘플당 추출 지연(p50/p99)
+
+사용 예 (backend 디렉터리에서):
+    python scripts/bench_ocr_extraction.py              # 운영 DB 성분 사전 사용
+    python scripts/bench_ocr_extraction.py --offline    # DB 없이 코퍼스 정답만으로 사전 구성
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_corpus", "ocr_dumps.jsonl")
+
+
+def load_corpus(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_offline_kb(corpus: List[dict]):
+    """코퍼스 정답 성분명만으로 만든 성분 사전 (ingredients 테이블에 있는 것으로 취급)"""
+    from services import ingredient_kb
+    names = sorted({n for s in corpus for n in s["expected"]})
+    ing_rows = [(i + 1, n, None, None, None) for i, n in enumerate(names)]
+    return ingredient_kb._build(ing_rows, [], [], [], signature="offline", version=0)
+
+
+def legacy_extract(text: str, kb) -> List[str]:
+    """기존 방식: [가-힣a-zA-Z0-9-]+ 단어 하나씩 사전 비교"""
+    from services.ingredient_kb import normalize_name
+    words = [w for w in re.findall(r'[가-힣a-zA-Z0-9\-]+', text) if len(w) >= 2]
+    out, seen = [], set()
+    for w in words:
+        n = normalize_name(w)
+        in_kcia = kb.in_kcia(n)
+        if in_kcia or kb.has_ingredient(w):
+            key = n if in_kcia else f"EXACT::{w}"
+            if key not in seen:
+                out.append(w)
+                seen.add(key)
+    return out
+
+
+def evaluate(name: str, fn, corpus: List[dict], repeat: int) -> Dict[str, float]:
+    from services.ingredient_kb import normalize_name
+    tp = fp = fn_ = 0
+    lat_ms: List[float] = []
+    misses: Dict[str, List[str]] = {}
+    for s in corpus:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            got = fn(s["ocr_text"])
+            lat_ms.append((time.perf_counter() - t0) * 1000)
+        got_n = {normalize_name(re.sub(r"\s+", " ", g)) for g in got}
+        exp_n = {normalize_name(e) for e in s["expected"]}
+        tp += len(got_n & exp_n)
+        fp += len(got_n - exp_n)
+        fn_ += len(exp_n - got_n)
+        if exp_n - got_n:
+            misses[s["id"]] = sorted(exp_n - got_n)
+    lat_ms.sort()
+    return {
+        "method": name,
+        "recall": round(tp / max(1, tp + fn_), 4),
+        "precision": round(tp / max(1, tp + fp), 4),
+        "latency_p50_ms": round(statistics.median(lat_ms), 3),
+        "latency_p99_ms": round(lat_ms[min(len(lat_ms) - 1, int(len(lat_ms) * 0.99))], 3),
+        "misses": misses,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default=DEFAULT_CORPUS)
+    ap.add_argument("--offline", action="store_true", help="DB 없이 코퍼스 정답으로 사전 구성")
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--show-misses", action="store_true")
+    args = ap.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if args.offline:
+        kb = build_offline_kb(corpus)
+    else:
+        from services.ingredient_kb import get_kb
+        kb = get_kb()
+
+    from services.ingredient_matcher import extract_ingredient_names
+
+    results = [
+        evaluate("legacy_word", lambda t: legacy_extract(t, kb), corpus, args.repeat),
+        evaluate("ngram_longest", lambda t: extract_ingredient_names(t, kb), corpus, args.repeat),
+    ]
+
+    print(f"corpus={os.path.basename(args.corpus)} samples={len(corpus)} "
+          f"dict={'offline' if args.offline else 'kb v%s' % kb.version} repeat={args.repeat}")
+    print(f"{'method':16}{'recall':>8}{'precision':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in results:
+        print(f"{r['method']:16}{r['recall']:>8}{r['precision']:>11}{r['latency_p50_ms']:>9}{r['latency_p99_ms']:>9}")
+    if args.show_misses:
+        for r in results:
+            print(f"\n[{r['method']}] misses")
+            print(json.dumps(r["misses"], ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# backend/scripts/export_trends_store.py
+# -*- coding: utf-8 -*-
+"""
+트렌드 공유 스냅샷(services/trend_store.py) 생성.
+
+주간 이력 (pid × week) 리뷰 수 행렬, pid → 카테고리/브랜드, 제품 표시 정보를
+NumPy 파일로 내보내고 CURRENT 포인터를 원자적으로 교체한다.
+실행 중인 워커들은 TRENDS_STORE_CHECK_SEC 안에 새 버전을 mmap으로 연다.
+
+주간 적재(scripts/load_review_history.py incremental) 직후 실행한다.
+
+사용 예 (backend 디렉터리에서):
+    python scripts/export_trends_store.py              # 내보내기 (최근 3개 버전 유지)
+    python scripts/export_trends_store.py --keep 2
+    python scripts/export_trends_store.py --check      # 현재 버전 열어서 요약만 출력
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import trend_store  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--keep", type=int, default=trend_store.KEEP_VERSIONS, help="유지할 버전 수 (CURRENT 포함)")
+    ap.add_argument("--check", action="store_true", help="내보내지 않고 현재 버전만 확인")
+    args = ap.parse_args()
+
+    if args.check:
+        trend_store.current()
+        print(json.dumps(trend_store.stats(), ensure_ascii=False, indent=2))
+        return
+
+    from db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        stats = trend_store.export(db, keep=args.keep)
+    finally:
+        db.close()
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
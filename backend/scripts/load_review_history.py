@@ -0,0 +1,55 @@
+# backend/scripts/load_review_history.py
+# -*- coding: utf-8 -*-
+"""
+주간 리뷰 수 이력 테이블(product_review_history_weekly) 적재 / 검증.
+
+주간 리뷰 수집이 끝난 뒤 cron에서 incremental을 실행한다. 새 주차만 뷰에서 읽어 적재한다.
+
+배포 시 필수: 테이블 생성 후 backfill을 한 번 실행하고 verify로 확인한다.
+테이블이 없거나 비어 있는 동안 트렌드 API는 뷰를 직접 읽으므로(느림) 배포 직후 바로 실행할 것.
+backfill 도중에는 테이블에 행이 생기는 순간 테이블을 읽기 시작하므로 적재된 주차까지만 보일 수 있다.
+
+사용 예 (backend 디렉터리에서):
+    python scripts/load_review_history.py incremental                 # 마지막 주차 이후만
+    python scripts/load_review_history.py backfill                    # 뷰 전체 재적재
+    python scripts/load_review_history.py backfill --since 2024-01-01 --until 2024-06-30
+    python scripts/load_review_history.py verify --weeks 8            # 최근 8주 뷰와 비교
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import SessionLocal  # noqa: E402
+from services import review_history  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("mode", choices=["incremental", "backfill", "verify"])
+    ap.add_argument("--since", type=date.fromisoformat, help="backfill 시작 주차 (YYYY-MM-DD)")
+    ap.add_argument("--until", type=date.fromisoformat, help="backfill 마지막 주차 (YYYY-MM-DD)")
+    ap.add_argument("--weeks", type=int, default=None, help="verify 대상 최근 주차 수 (기본 전체)")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.mode == "incremental":
+            stats = review_history.load_new_weeks(db)
+        elif args.mode == "backfill":
+            stats = review_history.backfill(db, since=args.since, until=args.until)
+        else:
+            stats = review_history.verify(db, last_weeks=args.weeks)
+    finally:
+        db.close()
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    if args.mode == "verify" and not stats["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# backend/scripts/refresh_keyword_profiles.py
+# -*- coding: utf-8 -*-
+"""
+product_keyword_profiles(제품별 성분 keyword 프로필) 일괄 생성 / 증분 갱신.
+
+product_data.p_ingredients, ingredients.keyword 변경 후
+(또는 주기적으로 cron에서) 실행한다. 변경된 제품만 다시 쓴다.
+
+사용 예 (backend 디렉터리에서):
+    python scripts/refresh_keyword_profiles.py          # 증분 갱신
+    python scripts/refresh_keyword_profiles.py --full   # 전체 재계산
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import SessionLocal  # noqa: E402
+from services.keyword_profiles import refresh_keyword_profiles  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--full", action="store_true", help="지문 비교 없이 전체 재계산")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = refresh_keyword_profiles(db, full=args.full)
+    finally:
+        db.close()
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
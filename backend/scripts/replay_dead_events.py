@@ -0,0 +1,39 @@
+# backend/scripts/replay_dead_events.py
+# -*- coding: utf-8 -*-
+"""
+적재 불가로 분리된 이벤트(*.dead, 이전 버전의 *.failed) 재적재.
+
+writer는 IntegrityError/DataError로 실패한 행만 dead-letter 파일로 옮기고 자동 재시도하지 않음.
+원인(컬럼 길이, 누락된 FK 대상 등)을 고친 뒤 이 스크립트로 다시 넣는다.
+- 적재된 파일은 삭제, 여전히 적재 불가인 행은 새 *.dead로 분리
+- DB 연결 오류 등 일시 장애면 남은 행을 원래 파일에 두고 중단
+
+사용 예 (backend 디렉터리에서):
+    python scripts/replay_dead_events.py
+    python scripts/replay_dead_events.py --spill-dir /var/lib/app/event_spill
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import SessionLocal  # noqa: E402
+from services.event_ingest import SPILL_DIR, EventIngestor  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--spill-dir", default=SPILL_DIR, help="이벤트 spill 디렉터리 (기본: EVENTS_SPILL_DIR)")
+    args = ap.parse_args()
+
+    out = EventIngestor(SessionLocal, spill_dir=args.spill_dir).replay_dead()
+    print(f"files={out['files']}, written={out['written']}, dead={out['dead']}, pending={out['pending']}")
+    if out["pending"]:
+        print("⚠️ DB 오류로 일부 이벤트를 적재하지 못함 — 파일에 남겨 둠, 다시 실행 필요")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
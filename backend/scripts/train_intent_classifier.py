@@ -0,0 +1,146 @@
+# backend/scripts/train_intent_classifier.py
+# -*- coding: utf-8 -*-
+"""
+로컬 의도 분류기 오프라인 학습 + 정확도/지연 리포트.
+
+입력: 백엔드 로그 파일들 ("[BEAUTYBOT] {...}" 한 줄 JSON)
+  - intent_decided_by_chain 이벤트의 intent를 정답으로 사용 (LLM 라우터 판정)
+  - decided_by == "local" 인 이벤트는 자기 자신의 판정이므로 학습에서 제외
+  - query 필드가 없는 예전 로그는 직전 core_start 이벤트의 query와 짝지음
+
+사용 예 (backend 디렉터리에서):
+    python scripts/train_intent_classifier.py logs/app-*.log
+    python scripts/train_intent_classifier.py logs/*.log --out artifacts/intent_classifier.npz
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.intent_classifier import (  # noqa: E402
+    DEFAULT_MODEL_PATH,
+    GENERAL_THRESHOLD,
+    train_logistic,
+)
+
+MARK = "[BEAUTYBOT] "
+
+
+def load_samples(paths: List[str]) -> List[Tuple[str, int]]:
+    samples: Dict[str, int] = {}
+    for path in paths:
+        last_query = None
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                i = line.find(MARK)
+                if i < 0:
+                    continue
+                try:
+                    ev = json.loads(line[i + len(MARK):])
+                except Exception:
+                    continue
+                name = ev.get("event")
+                if name == "core_start":
+                    last_query = ev.get("query")
+                elif name == "intent_decided_by_chain":
+                    if ev.get("decided_by") == "local":
+                        continue
+                    q = (ev.get("query") or last_query or "").strip()
+                    if q:
+                        samples[q] = 1 if ev.get("intent") == "GENERAL" else 0
+                    last_query = None
+    return list(samples.items())
+
+
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
+
+
+def evaluate(model, test: List[Tuple[str, int]], threshold: float) -> Dict[str, float]:
+    tp = fp = fn = tn = 0
+    local_n = local_ok = 0
+    lat_ms: List[float] = []
+    for q, y in test:
+        t0 = time.perf_counter()
+        p = model.prob_general(q)
+        lat_ms.append((time.perf_counter() - t0) * 1000)
+        pred = 1 if p >= 0.5 else 0
+        if pred and y: tp += 1
+        elif pred and not y: fp += 1
+        elif not pred and y: fn += 1
+        else: tn += 1
+        if p >= threshold:
+            local_n += 1
+            local_ok += int(y == 1)
+    n = max(1, len(test))
+    return {
+        "n_test": len(test),
+        "accuracy": (tp + tn) / n,
+        "general_precision": tp / max(1, tp + fp),
+        "general_recall": tp / max(1, tp + fn),
+        "local_route_rate": local_n / n,               # LLM 호출 없이 처리되는 비율
+        "local_route_precision": local_ok / max(1, local_n),  # 그 중 실제 GENERAL 비율
+        "latency_p50_ms": _pct(lat_ms, 50),
+        "latency_p99_ms": _pct(lat_ms, 99),
+        "latency_max_ms": max(lat_ms) if lat_ms else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("logs", nargs="+", help="로그 파일 경로 (glob 허용)")
+    ap.add_argument("--out", default=DEFAULT_MODEL_PATH, help="모델 저장 경로 (.npz)")
+    ap.add_argument("--report", default=None, help="리포트 저장 경로 (.json, 기본: 모델 옆)")
+    ap.add_argument("--test-ratio", type=float, default=0.2)
+    ap.add_argument("--epochs", type=int, default=8)
+    ap.add_argument("--threshold", type=float, default=GENERAL_THRESHOLD)
+    args = ap.parse_args()
+
+    paths = sorted({p for pat in args.logs for p in glob.glob(pat)})
+    samples = load_samples(paths)
+    if len(samples) < 20:
+        sys.exit(f"학습 샘플이 부족합니다: {len(samples)}개 (로그 {len(paths)}개)")
+
+    random.Random(42).shuffle(samples)
+    n_test = max(1, int(len(samples) * args.test_ratio))
+    test, train = samples[:n_test], samples[n_test:]
+
+    t0 = time.time()
+    model = train_logistic(train, epochs=args.epochs)
+    train_sec = time.time() - t0
+
+    metrics = evaluate(model, test, args.threshold)
+    report = {
+        "n_samples": len(samples),
+        "n_train": len(train),
+        "general_ratio": sum(y for _, y in samples) / len(samples),
+        "threshold": args.threshold,
+        "train_sec": round(train_sec, 2),
+        **{k: round(v, 4) if isinstance(v, float) else v for k, v in metrics.items()},
+    }
+
+    # 배포용 모델은 전체 샘플로 재학습
+    final = train_logistic(samples, epochs=args.epochs)
+    final.save(args.out, n_samples=len(samples), accuracy=report["accuracy"])
+
+    report_path = args.report or os.path.splitext(args.out)[0] + "_report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"model  → {args.out}")
+    print(f"report → {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/services/analysis_cache.py
+# -*- coding: utf-8 -*-
+"""
+/api/analyze 결과 캐시 (content-addressed).
+
+- 키: (p_ingredients 해시, skin_type, baumann_weights 지문, 성분 사전 버전)
+  → 성분/가중치/성분 사전이 바뀌면 키 자체가 달라져 자연스럽게 무효화 (명시적 삭제 불필요)
+- 값: 사용자와 무관한 분석 결과 (점수/비율/breakdown/매칭 성분/시스템 주의 성분)
+  사용자 주의 성분 감점(-40)과 그에 따른 멘트는 요청 시점에 덧씌운다.
+- LRU 용량 제한 + 적중률/절감 시간 지표
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX", "5000"))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def weights_signature(weights_dict: dict) -> str:
+    return hashlib.sha1(
+        json.dumps(weights_dict, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+class AnalysisResultCache:
+    def __init__(self, capacity: int = MAX_ENTRIES):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "saved_ms": 0.0,      # 적중 시 생략된 계산 시간 합
+            "compute_ms": 0.0,    # 미스 시 실제 계산 시간 합
+        }
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats["saved_ms"] += entry["compute_ms"]
+            return entry["payload"]
+
+    def put(self, key: Tuple, payload: Dict[str, Any], compute_ms: float):
+        with self._lock:
+            self._stats["compute_ms"] += compute_ms
+            self._data[key] = {"payload": payload, "compute_ms": compute_ms}
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def purge(self) -> int:
+        with self._lock:
+            n = len(self._data)
+            self._data.clear()
+            return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            size = len(self._data)
+        lookups = s["lookups"]
+        misses = s["misses"]
+        return {
+            **s,
+            "saved_ms": round(s["saved_ms"], 1),
+            "compute_ms": round(s["compute_ms"], 1),
+            "size": size,
+            "capacity": self.capacity,
+            "hit_rate": round(s["hits"] / lookups, 4) if lookups else 0.0,
+            "avg_compute_ms": round(s["compute_ms"] / misses, 2) if misses else 0.0,
+        }
+
+
+analysis_cache = AnalysisResultCache()
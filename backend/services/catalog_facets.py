@@ -0,0 +1,267 @@
+# backend/services/catalog_facets.py
+# -*- coding: utf-8 -*-
+"""
+카탈로그 패싯 캐시 (프로세스 공용).
+
+- catalog : product_data 기준 카테고리 목록/제품 수, 카테고리별 제품명 목록 ((이름, pid) 정렬)
+- periods : 주간 리뷰 이력의 period_start 날짜 목록 (트렌드 기간 선택용)
+            PeriodIndex로 보관 → 트렌드 A/B 기준 주차를 DB 없이 bisect로 계산
+
+각 패싯은 지문 쿼리(건수 + 내용 체크섬)로 버전을 확인하고, 지문이 바뀔 때만 다시 만든다.
+(제품명 변경/카테고리 이동, 중간 주차 backfill처럼 건수·MIN/MAX가 그대로인 변경도 감지)
+지문 확인도 CATALOG_FACET_CHECK_SEC 간격으로만 수행 → 그 사이 요청은 DB를 전혀 타지 않음.
+버전은 ETag(services/http_cache.py)에 그대로 쓰인다.
+
+주간 리뷰 이력은 물리화 테이블(product_review_history_weekly)에서 읽는다.
+테이블이 없거나 비어 있으면(배포 후 backfill 전) 원본 뷰로 대체 — history_source() 참고.
+배포 시 backfill 필수: python scripts/load_review_history.py backfill
+"""
+
+import base64
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+FACET_CHECK_SEC = float(os.getenv("CATALOG_FACET_CHECK_SEC", "60"))
+PAGE_MAX = 500
+
+TBL_PRODUCT = "product_data"
+TBL_HISTORY = "product_review_history_weekly"   # 뷰 물리화 테이블 (services/review_history.py)
+HISTORY_VIEW = "product_review_history_weekly_v"
+# 뷰 대체 시 FROM 대상: period_start를 DATE로 맞춰 테이블과 같은 컬럼 모양으로 (파생 테이블이라 별칭 필수)
+HISTORY_VIEW_SRC = f"(SELECT product_pid, DATE(period_start) AS period_start, review_count FROM {HISTORY_VIEW})"
+
+
+class _Facet:
+    """지문(signature)이 바뀔 때만 다시 만드는 스냅샷 하나"""
+
+    def __init__(self, name: str, signature_fn: Callable[[Session], Any], build_fn: Callable[[Session], Any]):
+        self.name = name
+        self._signature_fn = signature_fn
+        self._build_fn = build_fn
+        self._lock = threading.Lock()
+        self._sig: Any = None
+        self._data: Any = None
+        self.version: Optional[str] = None
+        self.checked_at = 0.0
+        self.built_at = 0.0
+
+    def get(self, db: Session) -> Tuple[str, Any]:
+        now = time.time()
+        if self._data is not None and now - self.checked_at < FACET_CHECK_SEC:
+            return self.version, self._data
+        with self._lock:
+            if self._data is not None and time.time() - self.checked_at < FACET_CHECK_SEC:
+                return self.version, self._data
+            sig = self._signature_fn(db)
+            if self._data is None or sig != self._sig:
+                t0 = time.perf_counter()
+                data = self._build_fn(db)
+                self._sig, self._data = sig, data
+                self.version = hashlib.sha1(repr(sig).encode("utf-8")).hexdigest()[:12]
+                self.built_at = time.time()
+                print(f"[FACET] {self.name} 갱신 v={self.version} ({(time.perf_counter() - t0) * 1000:.1f}ms)")
+            self.checked_at = time.time()
+            return self.version, self._data
+
+    def invalidate(self):
+        """다음 요청에서 지문을 바로 다시 확인하도록 (적재 직후 호출)"""
+        with self._lock:
+            self.checked_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "built_at": self.built_at, "checked_at": self.checked_at}
+
+
+# ============================================
+# catalog: 카테고리 / 카테고리별 제품
+# ============================================
+def _catalog_signature(db: Session):
+    # _build_catalog가 읽는 값(pid, category, product_name, p_ingredients 유무) 전체의 체크섬
+    row = db.execute(text(f"""
+        SELECT COUNT(*),
+               SUM(CRC32(CONCAT_WS('|', pid, IFNULL(category, ''), IFNULL(product_name, ''),
+                                   p_ingredients IS NULL)))
+        FROM {TBL_PRODUCT}
+    """)).fetchone()
+    return tuple(str(v) for v in row)
+
+
+def _build_catalog(db: Session) -> Dict[str, Any]:
+    rows = db.execute(text(f"""
+        SELECT category, product_name, pid
+        FROM {TBL_PRODUCT}
+        WHERE p_ingredients IS NOT NULL
+          AND category IS NOT NULL
+    """)).fetchall()
+    products: Dict[str, List[Tuple[str, int]]] = {}
+    for cat, name, pid in rows:
+        if not cat:
+            continue
+        products.setdefault(cat, []).append((name or "", int(pid)))
+    for lst in products.values():
+        lst.sort()
+    categories = sorted(products)
+    return {
+        "categories": categories,
+        "counts": [{"category": c, "product_count": len(products[c])} for c in categories],
+        "products": products,
+    }
+
+
+# ============================================
+# periods: 트렌드 주간 날짜
+# ============================================
+_history_src = {"src": None, "checked_at": 0.0}
+
+
+def history_source(db: Session) -> str:
+    """
+    주간 리뷰 이력을 읽을 FROM 대상 (쿼리에서 반드시 별칭을 붙여 사용).
+    - product_review_history_weekly에 행이 있으면 테이블
+    - 테이블이 없거나 비어 있으면 원본 뷰 (HISTORY_VIEW_SRC, 기존과 같은 DATE(period_start) 기준)
+    판정은 FACET_CHECK_SEC 동안 재사용, invalidate("periods") 시 다시 확인.
+    """
+    now = time.time()
+    if _history_src["src"] is not None and now - _history_src["checked_at"] < FACET_CHECK_SEC:
+        return _history_src["src"]
+    try:
+        ready = db.execute(text(f"SELECT 1 FROM {TBL_HISTORY} LIMIT 1")).first()
+        reason = "비어 있음"
+    except Exception as e:
+        db.rollback()
+        ready, reason = None, f"조회 불가 ({e})"
+    src = TBL_HISTORY if ready else HISTORY_VIEW_SRC
+    if src != _history_src["src"] and not ready:
+        print(f"⚠️ {TBL_HISTORY} {reason} → {HISTORY_VIEW} 사용 (scripts/load_review_history.py backfill 필요)")
+    _history_src["src"] = src
+    _history_src["checked_at"] = now
+    return _history_src["src"]
+
+
+def _periods_signature(db: Session):
+    # 주차 목록 자체의 지문: 개수 + MIN/MAX + 날짜 체크섬 (PK 선두 컬럼이라 DISTINCT는 인덱스로 처리)
+    row = db.execute(text(f"""
+        SELECT COUNT(*), MIN(d), MAX(d), SUM(TO_DAYS(d)), BIT_XOR(CRC32(d))
+        FROM (SELECT DISTINCT h.period_start AS d FROM {history_source(db)} AS h) AS w
+    """)).fetchone()
+    return tuple(str(v) for v in row)
+
+
+class PeriodIndex:
+    """정렬된 주차 목록. 최신 / b 이하 최신 / 직전 주차를 bisect로 조회 (O(log n))"""
+
+    __slots__ = ("days", "labels")
+
+    def __init__(self, days: List[date]):
+        self.days = days                          # 오름차순 date
+        self.labels = [str(d) for d in days]      # "YYYY-MM-DD" (응답/버전용)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def latest(self, upto: Optional[date] = None) -> Optional[int]:
+        """upto 이하(없으면 전체) 최신 주차 위치. 없으면 None"""
+        i = len(self.days) if upto is None else bisect.bisect_right(self.days, upto)
+        return i - 1 if i > 0 else None
+
+    def latest_and_prev(self, upto: Optional[date] = None) -> Tuple[Optional[date], Optional[date]]:
+        """(직전 주차, 최신 주차). 최신이 없으면 (None, None), 직전이 없으면 (None, 최신)"""
+        i = self.latest(upto)
+        if i is None:
+            return None, None
+        return (self.days[i - 1] if i > 0 else None), self.days[i]
+
+
+def _build_periods(db: Session) -> PeriodIndex:
+    rows = db.execute(text(f"""
+        SELECT DISTINCT h.period_start AS d
+        FROM {history_source(db)} AS h
+        ORDER BY d
+    """)).fetchall()
+    days = [r[0] if type(r[0]) is date else date.fromisoformat(str(r[0])[:10]) for r in rows if r[0] is not None]
+    return PeriodIndex(sorted(set(days)))
+
+
+_catalog = _Facet("catalog", _catalog_signature, _build_catalog)
+_periods = _Facet("periods", _periods_signature, _build_periods)
+
+
+# ============================================
+# 공개 함수
+# ============================================
+def get_categories(db: Session) -> Tuple[str, List[str]]:
+    version, data = _catalog.get(db)
+    return version, data["categories"]
+
+
+def get_category_counts(db: Session) -> Tuple[str, List[dict]]:
+    version, data = _catalog.get(db)
+    return version, data["counts"]
+
+
+def encode_cursor(name: str, pid: int) -> str:
+    raw = json.dumps([name, pid], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """encode_cursor의 역. [이름(str), pid(int)] 형태가 아니면 ValueError"""
+    pad = "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(cursor + pad).decode("utf-8"))
+    if not (isinstance(payload, list) and len(payload) == 2
+            and isinstance(payload[0], str) and type(payload[1]) is int):
+        raise ValueError("cursor payload must be [name, pid]")
+    return payload[0], payload[1]
+
+
+def page_products(db: Session, category: str, cursor: Optional[str] = None,
+                  limit: Optional[int] = None) -> Tuple[str, List[str], Optional[str]]:
+    """
+    카테고리 제품명 (이름, pid) 순.
+    - limit 없음: 전체 (기존 응답과 동일)
+    - limit 있음: cursor(마지막으로 받은 (이름, pid)) 다음부터 limit개 + 다음 cursor (keyset)
+    cursor 형식이 틀리면 ValueError.
+    """
+    version, data = _catalog.get(db)
+    items = data["products"].get(category, [])
+    start = 0
+    if cursor:
+        start = bisect.bisect_right(items, decode_cursor(cursor))
+    if limit is None:
+        page = items[start:]
+        return version, [n for n, _ in page], None
+    limit = max(1, min(PAGE_MAX, limit))
+    page = items[start:start + limit]
+    next_cursor = encode_cursor(*page[-1]) if page and start + limit < len(items) else None
+    return version, [n for n, _ in page], next_cursor
+
+
+def get_periods(db: Session) -> Tuple[str, List[str]]:
+    version, index = _periods.get(db)
+    return version, index.labels
+
+
+def get_period_index(db: Session) -> Tuple[str, PeriodIndex]:
+    return _periods.get(db)
+
+
+def invalidate(name: Optional[str] = None):
+    """name: "catalog" | "periods" | None(전체). periods는 이력 테이블/뷰 판정도 다시 확인"""
+    if name is None or name == "periods":
+        _history_src["checked_at"] = 0.0
+    for f in (_catalog, _periods):
+        if name is None or f.name == name:
+            f.invalidate()
+
+
+def stats() -> Dict[str, Any]:
+    return {"catalog": _catalog.stats(), "periods": _periods.stats(), "check_sec": FACET_CHECK_SEC}
@@ -0,0 +1,488 @@
+# backend/services/event_ingest.py
+# -*- coding: utf-8 -*-
+"""
+이벤트 적재 파이프라인 (프로세스 공용, 버퍼링 + 백그라운드 다중 행 INSERT).
+
+- 요청 경로: 검증된 이벤트를 spill 세그먼트 파일에 한 줄 append → 메모리 큐에 넣고 바로 응답
+- writer 스레드: EVENTS_FLUSH_MS 마다 또는 EVENTS_FLUSH_EVENTS개가 쌓이면 큐를 통째로 가져와
+    1) user_sessions 다중 행 upsert (없으면 생성, 있으면 event_count += 세션별 건수)
+    2) event_logs 다중 행 INSERT (executemany)
+    3) 커밋 후 해당 spill 세그먼트 삭제
+- 큐가 가득 차면 EVENTS_ENQUEUE_TIMEOUT_MS 동안 기다리고, 그래도 차 있으면 거부 (호출 측 503)
+- 크래시/DB 장애: 커밋되지 않은 세그먼트는 파일로 남고 다음 시작 시(또는 재시도 주기마다) 다시 적재
+  (at-least-once: 커밋 직후 세그먼트 삭제 전에 죽으면 중복 가능)
+  연결 오류 등 일시 장애는 횟수 제한 없이 재시도 (간격은 RETRY_SEC부터 2배씩, 최대 EVENTS_RETRY_MAX_SEC)
+- 행 자체 오류(길이 초과, FK 위반 등 IntegrityError/DataError)로 배치가 실패하면 반으로 나눠 다시 쓰면서
+  문제 행만 골라 *.dead에 남김 → 같은 배치의 다른 이벤트는 그대로 적재
+  *.dead(이전 버전의 *.failed 포함)는 자동 재적재하지 않음 — 원인 수정 후 scripts/replay_dead_events.py
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+
+DEFAULT_SPILL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "artifacts", "event_spill")
+SPILL_DIR = os.getenv("EVENTS_SPILL_DIR", DEFAULT_SPILL_DIR)
+ASYNC_ENABLED = os.getenv("EVENTS_ASYNC", "1") == "1"
+FLUSH_MS = int(os.getenv("EVENTS_FLUSH_MS", "200"))
+FLUSH_EVENTS = int(os.getenv("EVENTS_FLUSH_EVENTS", "500"))
+QUEUE_MAX = int(os.getenv("EVENTS_QUEUE_MAX", "20000"))
+ENQUEUE_TIMEOUT_MS = int(os.getenv("EVENTS_ENQUEUE_TIMEOUT_MS", "50"))
+SPILL_FSYNC = os.getenv("EVENTS_SPILL_FSYNC", "0") == "1"
+RETRY_SEC = 5.0
+RETRY_MAX_SEC = float(os.getenv("EVENTS_RETRY_MAX_SEC", "300"))
+DEAD_SUFFIXES = (".dead", ".failed")   # 적재 불가 이벤트 파일 (.failed는 이전 버전 이름)
+KNOWN_SESSIONS_MAX = 50_000
+BATCH_MAX_EVENTS = int(os.getenv("EVENTS_BATCH_MAX", "50000"))          # /events/batch 1회 최대 건수
+BATCH_CHUNK_ROWS = int(os.getenv("EVENTS_BATCH_CHUNK_ROWS", "1000"))    # 다중 행 INSERT 1문장당 행 수
+
+EVENT_FIELDS = ("session_id", "user_id", "event_type", "event_target", "target_id",
+                "event_value", "page_url", "created_at")
+
+_UPSERT_SESSIONS_SQL = text("""
+    INSERT INTO user_sessions
+        (session_id, user_id, device_type, started_at, page_view_count, event_count, is_bounce)
+    VALUES
+        (:session_id, :user_id, 'unknown', :started_at, 0, :n, 1)
+    ON DUPLICATE KEY UPDATE
+        event_count = COALESCE(event_count, 0) + VALUES(event_count)
+""")
+
+_INSERT_EVENTS_SQL = text("""
+    INSERT INTO event_logs
+        (session_id, user_id, event_type, event_target, target_id, event_value, page_url, created_at)
+    VALUES
+        (:session_id, :user_id, :event_type, :event_target, :target_id, :event_value, :page_url, :created_at)
+""")
+
+
+# ============================================
+# 이미 존재가 확인된 세션 (동기 경로의 세션 조회 생략용)
+# ============================================
+_known: "OrderedDict[str, None]" = OrderedDict()
+_known_lock = threading.Lock()
+
+
+def is_known_session(session_id: str) -> bool:
+    with _known_lock:
+        if session_id in _known:
+            _known.move_to_end(session_id)
+            return True
+    return False
+
+
+def mark_known_sessions(session_ids):
+    with _known_lock:
+        for sid in session_ids:
+            _known[sid] = None
+            _known.move_to_end(sid)
+        while len(_known) > KNOWN_SESSIONS_MAX:
+            _known.popitem(last=False)
+
+
+# ============================================
+# 다중 행 쓰기 (writer / 재적재 / /events/batch / 벤치 공용)
+# ============================================
+def upsert_sessions(db, events: List[Dict[str, Any]]):
+    """세션별 건수로 user_sessions 다중 행 upsert (없으면 생성, 있으면 event_count += 건수)"""
+    per_session: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    for e in events:
+        s = per_session.get(e["session_id"])
+        if s is None:
+            per_session[e["session_id"]] = {"session_id": e["session_id"], "user_id": e["user_id"],
+                                            "started_at": e["created_at"], "n": 1}
+        else:
+            s["n"] += 1
+    db.execute(_UPSERT_SESSIONS_SQL, list(per_session.values()))
+
+
+def write_events(db, events: List[Dict[str, Any]]):
+    """세션 upsert + event_logs 다중 행 INSERT. 커밋은 호출 측."""
+    if not events:
+        return
+    upsert_sessions(db, events)
+    db.execute(_INSERT_EVENTS_SQL, events)
+
+
+@lru_cache(maxsize=16)
+def _multi_insert_sql(n: int):
+    rows = ",\n".join(
+        "(" + ", ".join(f":{f}_{j}" for f in EVENT_FIELDS) + ")" for j in range(n)
+    )
+    return text(f"INSERT INTO event_logs ({', '.join(EVENT_FIELDS)}) VALUES\n{rows}")
+
+
+def insert_events_with_ids(db, events: List[Dict[str, Any]], chunk_rows: int = BATCH_CHUNK_ROWS) -> List[range]:
+    """
+    event_logs에 chunk_rows개씩 다중 행 INSERT 1문장으로 넣고 문장별 event_id 범위 반환. 커밋은 호출 측.
+    한 문장의 LAST_INSERT_ID(= cursor.lastrowid)는 첫 행의 id이고, 행 수가 정해진 INSERT는
+    innodb_autoinc_lock_mode 0/1에서 연속 id를 받으므로 범위 = [first, first + 행 수)
+    (lock mode 2에서는 연속 보장 없음 → autoinc_ids_consecutive로 확인)
+    """
+    ranges = []
+    for i in range(0, len(events), chunk_rows):
+        chunk = events[i:i + chunk_rows]
+        params = {f"{f}_{j}": e[f] for j, e in enumerate(chunk) for f in EVENT_FIELDS}
+        first = int(db.execute(_multi_insert_sql(len(chunk)), params).lastrowid)
+        ranges.append(range(first, first + len(chunk)))
+    return ranges
+
+
+_autoinc_consecutive: Optional[bool] = None
+
+
+def autoinc_ids_consecutive(db) -> bool:
+    """다중 행 INSERT의 id 연속 여부 (@@innodb_autoinc_lock_mode 0/1), 프로세스당 1회 조회"""
+    global _autoinc_consecutive
+    if _autoinc_consecutive is None:
+        try:
+            mode = db.execute(text("SELECT @@innodb_autoinc_lock_mode")).scalar()
+            _autoinc_consecutive = int(mode) in (0, 1)
+            if not _autoinc_consecutive:
+                print(f"⚠️ innodb_autoinc_lock_mode={mode} → /events/batch는 event_ids를 반환하지 않습니다")
+        except Exception as e:
+            print(f"❌ innodb_autoinc_lock_mode 조회 실패 (배치 id 범위 미반환): {e}")
+            _autoinc_consecutive = False
+    return _autoinc_consecutive
+
+
+def _encode(e: Dict[str, Any]) -> str:
+    return json.dumps({**e, "created_at": str(e["created_at"])}, ensure_ascii=False)
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    e = json.loads(line)
+    e["created_at"] = datetime.fromisoformat(e["created_at"])
+    return {k: e.get(k) for k in EVENT_FIELDS}
+
+
+def _read_segment(path: str) -> List[Dict[str, Any]]:
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break   # 크래시로 잘린 마지막 줄
+            out.append(_decode(line))
+    return out
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class EventIngestor:
+    """bounded 큐 + spill 세그먼트 + 백그라운드 writer"""
+
+    def __init__(self, session_factory: Callable[[], Any], spill_dir: str = SPILL_DIR,
+                 flush_ms: int = FLUSH_MS, flush_events: int = FLUSH_EVENTS, queue_max: int = QUEUE_MAX,
+                 enqueue_timeout_ms: int = ENQUEUE_TIMEOUT_MS, fsync: bool = SPILL_FSYNC):
+        self.session_factory = session_factory
+        self.spill_dir = spill_dir
+        self.flush_ms = flush_ms
+        self.flush_events = flush_events
+        self.queue_max = queue_max
+        self.enqueue_timeout = enqueue_timeout_ms / 1000.0
+        self.fsync = fsync
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._space = threading.Condition(self._cond)   # 같은 락, 큐 여유 알림용
+        self._seg = None
+        self._seg_path: Optional[str] = None
+        self._seq = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._retry_at = 0.0
+        self._backoff = RETRY_SEC
+        self._orphans_left = True   # 종료된 프로세스의 세그먼트를 아직 다 못 가져옴
+        self._stats = {"accepted": 0, "rejected": 0, "written": 0, "batches": 0, "failed_batches": 0,
+                       "poisoned": 0, "replayed": 0, "last_batch": 0, "last_flush_ms": 0.0}
+
+    # ---- 요청 경로 ----
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """큐에 넣으면 True, 가득 차서 거부하면 False"""
+        deadline = time.monotonic() + self.enqueue_timeout
+        with self._cond:
+            while len(self._items) >= self.queue_max:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["rejected"] += 1
+                    return False
+                self._space.wait(remaining)
+            self._append_spill(event)
+            self._items.append(event)
+            self._stats["accepted"] += 1
+            if len(self._items) >= self.flush_events:
+                self._cond.notify()
+        return True
+
+    def _append_spill(self, event: Dict[str, Any]):
+        if self._seg is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._seq += 1
+            self._seg_path = os.path.join(self.spill_dir, f"events-{os.getpid()}-{int(time.time())}-{self._seq}.jsonl")
+            self._seg = open(self._seg_path, "a", encoding="utf-8")
+        self._seg.write(_encode(event) + "\n")
+        self._seg.flush()
+        if self.fsync:
+            os.fsync(self._seg.fileno())
+
+    # ---- writer ----
+    def _take_batch(self, wait: bool):
+        with self._cond:
+            if wait:
+                self._cond.wait_for(lambda: len(self._items) >= self.flush_events or self._stopping,
+                                    timeout=self.flush_ms / 1000.0)
+            if not self._items:
+                return [], None
+            batch = list(self._items)
+            self._items.clear()
+            path = self._seg_path
+            if self._seg is not None:
+                self._seg.close()
+            self._seg, self._seg_path = None, None
+            self._space.notify_all()
+            return batch, path
+
+    def _commit_rows(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            write_events(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write_rows(self, rows: List[Dict[str, Any]], pending: list, poison: list):
+        """
+        rows를 한 트랜잭션으로 적재. 행 자체 오류면 반으로 나눠 재귀 → 문제 행만 poison으로.
+        그 밖의 오류(DB 연결 등 일시 장애)는 pending에 남겨 재시도.
+        """
+        try:
+            self._commit_rows(rows)
+        except (IntegrityError, DataError) as e:
+            if len(rows) == 1:
+                print(f"❌ 이벤트 적재 불가 (session={rows[0]['session_id']}, type={rows[0]['event_type']}): "
+                      f"{getattr(e, 'orig', e)}")
+                poison.extend(rows)
+                return
+            mid = len(rows) // 2
+            self._write_rows(rows[:mid], pending, poison)
+            self._write_rows(rows[mid:], pending, poison)
+            return
+        except Exception as e:
+            print(f"❌ 이벤트 배치 적재 실패 ({len(rows)}건, spill 파일로 재시도): {e}")
+            pending.extend(rows)
+            return
+        mark_known_sessions({e["session_id"] for e in rows})
+        self._stats["written"] += len(rows)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """배치 적재 → (재시도할 이벤트, 적재 불가 이벤트)"""
+        t0 = time.perf_counter()
+        pending: List[Dict[str, Any]] = []
+        poison: List[Dict[str, Any]] = []
+        self._write_rows(batch, pending, poison)
+        if poison:
+            self._stats["poisoned"] += len(poison)
+            self._write_failed(poison)
+        if pending:
+            self._stats["failed_batches"] += 1
+        else:
+            self._stats["batches"] += 1
+            self._stats["last_batch"] = len(batch)
+            self._stats["last_flush_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return pending, poison
+
+    def _write_failed(self, events: List[Dict[str, Any]]):
+        """적재 불가 이벤트는 재시도 대상(*.jsonl)이 아닌 *.dead 파일로 보관"""
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+        path = os.path.join(self.spill_dir, f"events-{os.getpid()}-{int(time.time())}-p{seq}.dead")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(_encode(e) + "\n" for e in events)
+
+    @staticmethod
+    def _rewrite_segment(path: str, events: List[Dict[str, Any]]):
+        """일부만 적재된 세그먼트를 남은 이벤트로 교체 (원자적)"""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(_encode(e) + "\n" for e in events)
+        os.replace(tmp, path)
+
+    def flush(self, wait: bool = False) -> int:
+        batch, path = self._take_batch(wait)
+        if not batch:
+            return 0
+        pending, _ = self._write_batch(batch)
+        if not pending:
+            if path:
+                os.remove(path)
+        else:
+            if path and len(pending) < len(batch):
+                self._rewrite_segment(path, pending)
+            self._schedule_retry()
+        return len(batch)
+
+    def _schedule_retry(self):
+        """일시 장애: 세그먼트 재적재 예약. 실패가 이어질수록 간격 2배 (최대 RETRY_MAX_SEC)"""
+        self._retry_at = time.time() + self._backoff
+        self._backoff = min(self._backoff * 2, RETRY_MAX_SEC)
+
+    def replay_pending(self, startup: bool = False) -> int:
+        """
+        남아 있는 세그먼트 재적재.
+        - 이 프로세스가 실패로 남긴 세그먼트 (현재 쓰는 세그먼트 제외)
+        - startup: 이미 종료된 프로세스가 남긴 세그먼트
+        일시 장애로 다 못 쓰면 남은 이벤트만 세그먼트에 두고 재시도 예약 (dead-letter로 옮기지 않음)
+        """
+        if not os.path.isdir(self.spill_dir):
+            return 0
+        me = os.getpid()
+        n = 0
+        for name in sorted(os.listdir(self.spill_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            path = os.path.join(self.spill_dir, name)
+            if path == self._seg_path:
+                continue
+            try:
+                owner = int(name.split("-")[1])
+            except (IndexError, ValueError):
+                continue
+            if owner != me:
+                if not startup or _pid_alive(owner):
+                    continue
+                claimed = os.path.join(self.spill_dir, f"events-{me}-{int(time.time())}-r{name}")
+                try:
+                    os.rename(path, claimed)   # 다른 워커와 동시 재적재 방지
+                except FileNotFoundError:
+                    continue
+                path = claimed
+            batch = _read_segment(path)
+            pending, _ = self._write_batch(batch) if batch else ([], [])
+            if not pending:
+                os.remove(path)
+                n += len(batch)
+                continue
+            if len(pending) < len(batch):
+                self._rewrite_segment(path, pending)
+                n += len(batch) - len(pending)
+            # DB가 아직 안 되는 상태 → 남은 세그먼트는 다음 주기에
+            self._schedule_retry()
+            break
+        else:
+            self._backoff = RETRY_SEC
+            if startup:
+                self._orphans_left = False
+        self._stats["replayed"] += n
+        return n
+
+    def replay_dead(self) -> Dict[str, int]:
+        """
+        *.dead / *.failed 재적재 (원인 수정 후 수동 실행, scripts/replay_dead_events.py).
+        여전히 적재 불가인 행은 새 *.dead로, 일시 장애로 못 쓴 행은 원래 파일에 남김.
+        """
+        out = {"files": 0, "written": 0, "dead": 0, "pending": 0}
+        if not os.path.isdir(self.spill_dir):
+            return out
+        for name in sorted(os.listdir(self.spill_dir)):
+            if not name.endswith(DEAD_SUFFIXES):
+                continue
+            path = os.path.join(self.spill_dir, name)
+            batch = _read_segment(path)
+            pending, poison = self._write_batch(batch) if batch else ([], [])
+            out["files"] += 1
+            out["written"] += len(batch) - len(pending) - len(poison)
+            out["dead"] += len(poison)
+            if pending:
+                self._rewrite_segment(path, pending)
+                out["pending"] += len(pending)
+                break
+            os.remove(path)
+        return out
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                self.flush(wait=True)
+                if self._retry_at and time.time() >= self._retry_at:
+                    self._retry_at = 0.0
+                    self.replay_pending(startup=self._orphans_left)
+            except Exception as e:
+                print(f"❌ 이벤트 writer 오류: {e}")
+                self._schedule_retry()
+                time.sleep(1.0)
+        self.flush()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        try:
+            n = self.replay_pending(startup=True)
+            if n:
+                print(f"[EVENT_INGEST] 이전 실행에서 남은 이벤트 {n}건 재적재")
+        except Exception as e:
+            print(f"❌ 이벤트 spill 재적재 실패: {e}")
+            self._schedule_retry()
+        self._thread = threading.Thread(target=self._run, name="event-ingest-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """남은 이벤트를 적재하고 writer 종료"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = len(self._items)
+        return {**self._stats, "queued": queued, "queue_max": self.queue_max,
+                "flush_ms": self.flush_ms, "flush_events": self.flush_events}
+
+
+# ============================================
+# 프로세스 공용 인스턴스
+# ============================================
+_ingestor: Optional[EventIngestor] = None
+
+
+def start_event_ingest():
+    """앱 시작 시 writer 시작 (EVENTS_ASYNC=0이면 동기 경로 유지)"""
+    global _ingestor
+    if not ASYNC_ENABLED or _ingestor is not None:
+        return
+    from db import SessionLocal
+    _ingestor = EventIngestor(SessionLocal)
+    _ingestor.start()
+
+
+def stop_event_ingest():
+    if _ingestor is not None:
+        _ingestor.stop()
+
+
+def get_ingestor() -> Optional[EventIngestor]:
+    return _ingestor
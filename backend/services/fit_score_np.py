@@ -0,0 +1,179 @@
+# backend/services/fit_score_np.py
+# -*- coding: utf-8 -*-
+"""
+바우만 적합도 점수 NumPy 벡터화 버전.
+
+routers/analysis.py의 calculate_fit_score / calculate_contribution /
+calculate_score_final / apply_soft_caps_by_hits와 같은 공식을
+(제품 P × 6) 비율 행렬과 (피부타입 S × 6) 중요도/타겟 범위 배열에 한 번에 적용한다.
+- 타겟 범위 내부 0.90~0.97 보정 포함
+- 기여도 합산 순서도 스칼라 버전과 같게(키워드 순서대로) 유지
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+KEYWORDS = ("moisturizing", "soothing", "sebum_control", "anti_aging", "brightening", "protection")
+KEYWORDS_KOR = ("보습", "진정", "피지", "주름", "미백", "보호")
+
+_py_round = np.frompyfunc(round, 2, 1)
+
+
+def round_builtin(x: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    내장 round(v, ndigits)와 같은 결과.
+    np.round는 .5 경계 근처에서 내장 round와 다를 수 있어 그 원소만 내장 round로 다시 계산.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.round(x, ndigits)
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid="ignore"):
+        frac = np.abs(x * scale - np.floor(x * scale) - 0.5)
+    edge = frac < 1e-6
+    if edge.any():
+        out[edge] = _py_round(x[edge], ndigits).astype(np.float64)
+    return out
+
+
+def _round4(x: np.ndarray) -> np.ndarray:
+    return round_builtin(x, 4)
+
+
+def weights_to_arrays(weights_by_type: Dict[str, dict]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    {skin_type: {한글키워드: {importance, target_range}}} → (skin_types, importance, tmin, tmax)
+    키워드 설정이 없거나 형식이 틀리면 스칼라 버전과 같이 importance 0, 범위 [0, 100].
+    """
+    skin_types = sorted(weights_by_type)
+    S, K = len(skin_types), len(KEYWORDS)
+    imp = np.zeros((S, K), dtype=np.float64)
+    tmin = np.zeros((S, K), dtype=np.float64)
+    tmax = np.full((S, K), 100.0, dtype=np.float64)
+    for s, st in enumerate(skin_types):
+        w = weights_by_type[st] or {}
+        for k, kor in enumerate(KEYWORDS_KOR):
+            settings = w.get(kor)
+            if not isinstance(settings, dict):
+                continue
+            iv = settings.get("importance")
+            tr = settings.get("target_range")
+            if isinstance(iv, (int, float)):
+                imp[s, k] = iv
+            if isinstance(tr, list) and len(tr) == 2:
+                tmin[s, k], tmax[s, k] = tr
+    return skin_types, imp, tmin, tmax
+
+
+def ratios_to_matrix(ratios_list: List[dict]) -> np.ndarray:
+    """calculate_keyword_ratios 결과 dict 목록 → (P, 6) 행렬 (없는 키워드는 0)"""
+    m = np.zeros((len(ratios_list), len(KEYWORDS)), dtype=np.float64)
+    for p, r in enumerate(ratios_list):
+        for k, kw in enumerate(KEYWORDS):
+            m[p, k] = (r or {}).get(kw, 0)
+    return m
+
+
+def fit_scores(percent: np.ndarray, tmin: np.ndarray, tmax: np.ndarray, imp: np.ndarray) -> np.ndarray:
+    """calculate_fit_score 벡터화 (입력은 서로 broadcast 가능한 배열)"""
+    percent, tmin, tmax, imp = np.broadcast_arrays(percent, tmin, tmax, imp)
+    out = np.full(percent.shape, 0.5, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1) 범위 내부: 중앙 0.97 → 경계 0.90
+        inside = (tmin <= percent) & (percent <= tmax)
+        mid = (tmin + tmax) / 2.0
+        half = np.maximum(1.0, (tmax - tmin) / 2.0)
+        deviation = np.minimum(1.0, np.abs(percent - mid) / half)
+        in_fit = np.maximum(0.90, _round4(0.97 - deviation * 0.07))
+
+        # 2) 범위 미만
+        below = percent < tmin
+        below_fit = np.where(
+            tmin <= 0,
+            np.where(percent == 0, 1.0, 0.5),
+            np.maximum(0.0, percent / np.where(tmin == 0, 1.0, tmin)),
+        )
+
+        # 3) 범위 초과
+        above = percent > tmax
+        neg_fit = np.maximum(-0.5, 1.0 - (percent - tmax) / 100 * 5)
+        soft_max = tmax * 1.5
+        span = soft_max - tmax
+        ratio = np.where(span != 0, (percent - tmax) / np.where(span == 0, 1.0, span), 0.0)
+        soft_fit = np.maximum(0.2, 1.0 - ratio * 0.8)
+        divisor = np.where(tmax != 0, tmax, 1.0)
+        hard_fit = np.maximum(0.0, 0.2 - (percent - soft_max) / divisor * 0.2)
+        pos_fit = np.where(percent <= soft_max, soft_fit, hard_fit)
+        above_fit = np.where(imp < 0, neg_fit, pos_fit)
+
+    out = np.where(above, above_fit, out)
+    out = np.where(below, below_fit, out)
+    out = np.where(inside, in_fit, out)
+    return out
+
+
+def score_matrix(ratios: np.ndarray, imp: np.ndarray, tmin: np.ndarray, tmax: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    ratios (P, 6) × 피부타입 배열 (S, 6) → 전체 점수 한 번에 계산.
+    반환:
+      final        (P, S) int   calculate_score_final 점수 (소프트 캡 전)
+      fit          (P, S, 6)    키워드별 fit_score
+      contribution (P, S, 6)    키워드별 기여도
+    """
+    pct = ratios[:, None, :]                      # (P, 1, 6)
+    imp3, tmin3, tmax3 = imp[None], tmin[None], tmax[None]   # (1, S, 6)
+
+    fit = fit_scores(pct, tmin3, tmax3, imp3)
+    neg = imp3 < 0
+    within = pct <= tmax3
+    fit = np.where(neg & within, 1.0, fit)
+    contribution = np.where(
+        neg,
+        np.where(within, 0.0, (1.0 - fit) * imp3 * 0.75),
+        fit * imp3,
+    )
+
+    # 합산 순서를 스칼라 버전(키워드 순서대로 누적)과 동일하게
+    total = np.zeros(contribution.shape[:2], dtype=np.float64)
+    for k in range(contribution.shape[2]):
+        total = total + contribution[:, :, k]
+
+    max_possible = np.where(imp > 0, imp, 0.0).sum(axis=1)          # (S,)
+    max_possible = np.where(max_possible == 0, 1.0, max_possible)
+    min_possible = np.where(imp < 0, imp * 0.7, 0.0).sum(axis=1)    # (S,)
+    score_range = max_possible - min_possible
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = (total - min_possible[None]) / np.where(score_range == 0, 1.0, score_range)[None]
+    final = np.where(score_range[None] == 0, 50.0, 25 + normalized * 75)
+    final = np.clip(np.ceil(final), 0, 100).astype(np.int64)
+
+    return {"final": final, "fit": fit, "contribution": contribution}
+
+
+def apply_soft_caps(final: np.ndarray, hits: np.ndarray) -> np.ndarray:
+    """apply_soft_caps_by_hits 벡터화 (hits: (P,) 제품별 total_keyword_hits)"""
+    h = np.asarray(hits)[:, None]
+    capped = np.where((h >= 3) & (h < 7), np.minimum(final, 75), final)          # low
+    capped = np.where((h >= 7) & (h < 10), np.minimum(capped, 95), capped)       # normal & 히트 적음
+    return capped
+
+
+def breakdown_for(ratio_row: np.ndarray, fit_row: np.ndarray, contrib_row: np.ndarray,
+                  imp_row: np.ndarray, tmin_row: np.ndarray, tmax_row: np.ndarray) -> Dict[str, dict]:
+    """calculate_score_final과 같은 형식의 breakdown dict (한 제품 × 한 피부타입)"""
+    out = {}
+    for k, kw in enumerate(KEYWORDS):
+        imp = float(imp_row[k])
+        contribution = round(float(contrib_row[k]), 2)
+        if imp < 0 and ratio_row[k] <= tmax_row[k]:
+            contribution = 0  # 스칼라 버전과 같은 정수 0
+        out[kw] = {
+            "percent": round(float(ratio_row[k]), 1),
+            "target_range": [int(tmin_row[k]), int(tmax_row[k])],
+            "fit_score": round(float(fit_row[k]), 2),
+            "importance": imp,
+            "contribution": contribution,
+        }
+    return out
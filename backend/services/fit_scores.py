@@ -0,0 +1,175 @@
+# backend/services/fit_scores.py
+# -*- coding: utf-8 -*-
+"""
+제품 × 바우만 피부타입(16종) 적합도 사전 계산.
+
+- 점수(calculate_score_final + apply_soft_caps_by_hits)는 제품 성분 목록과
+  해당 피부타입의 baumann_weights에만 의존하므로 미리 계산해 product_fit_scores에 저장
+- 증분 갱신: 제품별 input_sig(p_ingredients + 성분 keyword + 이름/카테고리)와
+  피부타입별 weights_sig가 저장값과 다른 (pid, skin_type)만 다시 써서 반영
+  → product_data.p_ingredients / ingredients.keyword / baumann_weights 변경 모두 감지
+- 사용자 주의 감점(-40)은 사용자별이므로 저장하지 않고 조회 시점에 적용
+
+사용: python scripts/refresh_fit_scores.py [--full]
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.ingredient_kb import refresh_kb
+from services.fit_score_np import (
+    apply_soft_caps,
+    breakdown_for,
+    ratios_to_matrix,
+    score_matrix,
+    weights_to_arrays,
+)
+from routers.analysis import (
+    ProductFitScores,
+    calculate_keyword_ratios,
+    classify_reliability,
+    load_all_weights,
+    match_ingredients_with_maps,
+    resolve_keyword_purpose_maps,
+    split_ingredient_tokens,
+)
+
+UPSERT_CHUNK = 1000
+
+_UPSERT_SQL = text("""
+    INSERT INTO product_fit_scores
+        (pid, skin_type, product_name, category, score, score_before, ratios, breakdown,
+         reliability, total_keyword_hits, matched_count, input_sig, weights_sig, updated_at)
+    VALUES
+        (:pid, :skin_type, :product_name, :category, :score, :score_before, :ratios, :breakdown,
+         :reliability, :total_keyword_hits, :matched_count, :input_sig, :weights_sig, :updated_at)
+    ON DUPLICATE KEY UPDATE
+        product_name = VALUES(product_name), category = VALUES(category),
+        score = VALUES(score), score_before = VALUES(score_before),
+        ratios = VALUES(ratios), breakdown = VALUES(breakdown),
+        reliability = VALUES(reliability), total_keyword_hits = VALUES(total_keyword_hits),
+        matched_count = VALUES(matched_count), input_sig = VALUES(input_sig),
+        weights_sig = VALUES(weights_sig), updated_at = VALUES(updated_at)
+""")
+
+_DELETE_SQL = text("DELETE FROM product_fit_scores WHERE pid = :pid AND skin_type = :skin_type")
+
+
+def _sig(obj) -> str:
+    return hashlib.sha1(json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_products(db: Session) -> List[Tuple[int, str, str, str]]:
+    return db.execute(text("""
+        SELECT pid, product_name, category, p_ingredients
+        FROM product_data
+        WHERE LENGTH(TRIM(p_ingredients)) > 0
+    """)).fetchall()
+
+
+def refresh_fit_scores(db: Session, full: bool = False) -> dict:
+    """
+    product_fit_scores를 최신 상태로 맞춘다.
+    full=True면 지문 비교 없이 전체 재작성.
+    반환: 처리 통계
+    """
+    t0 = time.time()
+    ProductFitScores.__table__.create(bind=db.get_bind(), checkfirst=True)
+
+    weights = load_all_weights(db)
+    weights_sigs = {st: _sig(w) for st, w in weights.items()}
+
+    products = _load_products(db)
+    token_lists = [split_ingredient_tokens(ing_str) for _, _, _, ing_str in products]
+    union_names = set()
+    for tokens in token_lists:
+        union_names.update(tokens)
+    # 성분 keyword 변경을 놓치지 않도록 사전을 먼저 최신화
+    keyword_map, _ = resolve_keyword_purpose_maps(union_names, None, refresh_kb())
+
+    existing = {
+        (pid, st): (input_sig, weights_sig)
+        for pid, st, input_sig, weights_sig in db.execute(text(
+            "SELECT pid, skin_type, input_sig, weights_sig FROM product_fit_scores"
+        )).fetchall()
+    }
+
+    now = datetime.now()
+    live_keys = set()
+    todo = []   # (pid, name, cat, input_sig, tokens, pending skin_types)
+    for (pid, name, cat, ing_str), tokens in zip(products, token_lists):
+        input_sig = _sig([name, cat, ing_str, [keyword_map.get(t) for t in tokens]])
+        pending = []
+        for st, wsig in weights_sigs.items():
+            live_keys.add((pid, st))
+            if full or existing.get((pid, st)) != (input_sig, wsig):
+                pending.append(st)
+        if pending:
+            todo.append((pid, name, cat, input_sig, tokens, pending))
+
+    # 변경된 제품만 (P × 6) 비율 행렬로 모아 전체 피부타입 점수를 한 번에 계산
+    upserts: List[dict] = []
+    if todo and weights:
+        skin_types, imp, tmin, tmax = weights_to_arrays(weights)
+        st_index = {st: i for i, st in enumerate(skin_types)}
+        ratios_list, hits, matched_counts, reliabilities = [], [], [], []
+        for _, _, _, _, tokens, _ in todo:
+            matched_details, matched_stats, _, _ = match_ingredients_with_maps(tokens, keyword_map, {})
+            total_keyword_hits = len(matched_details)
+            hits.append(total_keyword_hits)
+            reliabilities.append(classify_reliability(total_keyword_hits))
+            ratios_list.append(calculate_keyword_ratios(matched_stats, total_keyword_hits))
+            matched_counts.append(len(set(sum(matched_stats.values(), []))))
+
+        R = ratios_to_matrix(ratios_list)
+        result = score_matrix(R, imp, tmin, tmax)
+        capped = apply_soft_caps(result["final"], np.array(hits))
+
+        for p, (pid, name, cat, input_sig, _, pending) in enumerate(todo):
+            for st in pending:
+                s = st_index[st]
+                upserts.append({
+                    "pid": pid,
+                    "skin_type": st,
+                    "product_name": name,
+                    "category": cat,
+                    "score": int(capped[p, s]),
+                    "score_before": int(result["final"][p, s]),
+                    "ratios": json.dumps(ratios_list[p], ensure_ascii=False),
+                    "breakdown": json.dumps(
+                        breakdown_for(R[p], result["fit"][p, s], result["contribution"][p, s],
+                                      imp[s], tmin[s], tmax[s]),
+                        ensure_ascii=False,
+                    ),
+                    "reliability": reliabilities[p],
+                    "total_keyword_hits": hits[p],
+                    "matched_count": matched_counts[p],
+                    "input_sig": input_sig,
+                    "weights_sig": weights_sigs[st],
+                    "updated_at": now,
+                })
+
+    stale = [{"pid": pid, "skin_type": st} for (pid, st) in existing.keys() - live_keys]
+
+    for i in range(0, len(upserts), UPSERT_CHUNK):
+        db.execute(_UPSERT_SQL, upserts[i:i + UPSERT_CHUNK])
+    for i in range(0, len(stale), UPSERT_CHUNK):
+        db.execute(_DELETE_SQL, stale[i:i + UPSERT_CHUNK])
+    db.commit()
+
+    return {
+        "products": len(products),
+        "skin_types": len(weights_sigs),
+        "pairs": len(live_keys),
+        "upserted": len(upserts),
+        "deleted": len(stale),
+        "full": full,
+        "elapsed_ms": int((time.time() - t0) * 1000),
+    }
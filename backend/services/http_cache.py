@@ -0,0 +1,50 @@
+# backend/services/http_cache.py
+# -*- coding: utf-8 -*-
+"""
+조건부 GET(ETag / If-None-Match) 공용 헬퍼.
+
+- ETag는 데이터 버전 + 요청 파라미터로 만든 weak 태그 → 버전이 같으면 본문을 만들지 않고 304
+- Cache-Control 기본값 "no-cache": 브라우저가 저장은 하되 매번 ETag로 재검증
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak 비교: W/ 접두어 무시
+    want = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == want:
+            return True
+    return False
+
+
+def conditional_json(
+    request: Request,
+    etag: str,
+    build: Callable[[], Any],
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """If-None-Match가 etag와 같으면 304, 아니면 build() 결과를 JSON으로 (ETag 헤더 포함)"""
+    base_headers = {"ETag": etag, "Cache-Control": cache_control, **(headers or {})}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=base_headers)
+    return JSONResponse(content=jsonable_encoder(build()), headers=base_headers)
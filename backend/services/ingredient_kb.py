@@ -0,0 +1,333 @@
+# backend/services/ingredient_kb.py
+# -*- coding: utf-8 -*-
+"""
+프로세스 공용 성분 사전 (in-memory, 버전 관리).
+
+- 소스 테이블: ingredients / KCIA_ingredients / caution_ingredients / ML_caution_ingredients
+- 원문 성분명(raw)과 normalize_name 결과(norm) 양쪽으로 조회 가능
+  → id, keyword, KCIA 배합목적, 주의 등급(공식/ML), 설명
+- 앱 시작 시 로드, 이후 주기적으로 다시 읽어 내용이 바뀌었을 때만 새 스냅샷으로 원자적 교체
+  (조회 측은 get_kb()로 받은 스냅샷 하나를 요청 내내 사용)
+
+매칭 규칙 (기존 조회와 동일):
+- keyword / 등급 / ingredients 존재 여부: 원문 성분명 정확 일치
+  (기존에도 DB 결과를 korean_name 키 dict/set으로 받아 Python에서 정확 비교)
+- 주의 성분(공식/ML): 기존 `korean_name IN (...)` 결과를 그대로 쓰던 경로라 MySQL 콜레이션처럼
+  대소문자와 끝 공백은 무시 (fold_name) — 정확히 같은 표기가 있으면 그 항목 우선
+- KCIA 배합목적 / KCIA 존재 여부: 정규화 이름 일치
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+REFRESH_SEC = int(os.getenv("INGREDIENT_KB_REFRESH_SEC", "600"))
+
+
+def normalize_name(name):
+    if not name: return None
+    return name.strip().lower().replace(' ', '').replace('-', '')
+
+
+def fold_name(name: str) -> str:
+    """원문 이름 비교 키 (_ci 콜레이션: 대소문자 무시, PAD SPACE: 끝 공백 무시)"""
+    return name.rstrip(" ").casefold()
+
+
+class IngredientEntry:
+    __slots__ = (
+        "korean_name",
+        "id",                    # ingredients.id (ingredients 테이블에 없으면 None)
+        "keyword",               # ingredients.keyword (영문 효능 키워드)
+        "description",           # ingredients.description
+        "grade",                 # ingredients.caution_grade
+        "in_kcia",               # KCIA_ingredients.name_normalized 존재 여부
+        "purpose",               # KCIA_ingredients.purpose
+        "official_grade",        # caution_ingredients
+        "official_description",
+        "ml_grade",              # ML_caution_ingredients
+        "ml_description",
+    )
+
+    def __init__(self, korean_name: Optional[str]):
+        self.korean_name = korean_name
+        self.id = None
+        self.keyword = None
+        self.description = None
+        self.grade = None
+        self.in_kcia = False
+        self.purpose = None
+        self.official_grade = None
+        self.official_description = None
+        self.ml_grade = None
+        self.ml_description = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class IngredientKB:
+    """읽기 전용 스냅샷. 갱신은 새 인스턴스를 만들어 통째로 교체한다."""
+
+    def __init__(self, by_raw: Dict[str, IngredientEntry], by_norm: Dict[str, IngredientEntry],
+                 official: set, ml: set, signature: str, version: int):
+        self.by_raw = by_raw
+        self.by_norm = by_norm
+        self._official = official
+        self._ml = ml
+        self.signature = signature
+        self.version = version
+        self.loaded_at = time.time()
+        self.max_norm_len = max(map(len, by_norm), default=0)   # OCR n-gram 매칭 상한
+        self.by_id = {e.id: e for e in by_raw.values() if e.id is not None}
+        # 주의 성분 콜레이션 동치 조회용 (같은 fold 키면 먼저 적재된 항목)
+        # (set 순회 순서는 해시 시드에 따라 달라지므로 by_raw 적재 순서로 순회)
+        self._official_fold = {}
+        self._ml_fold = {}
+        for name, e in by_raw.items():
+            if name in official:
+                self._official_fold.setdefault(fold_name(name), e)
+            if name in ml:
+                self._ml_fold.setdefault(fold_name(name), e)
+        # keyword 매칭 결과에만 영향을 주는 부분의 지문 (제품 keyword 프로필 유효성 확인용)
+        h = hashlib.sha1()
+        for name in sorted(n for n, e in by_raw.items() if e.keyword):
+            e = by_raw[name]
+            h.update(f"{name}\x1f{e.id}\x1f{e.keyword}\x1e".encode("utf-8"))
+        self.keyword_sig = h.hexdigest()
+
+    # ---- 원문 기준 (정확 일치) ----
+    def get(self, raw: str) -> Optional[IngredientEntry]:
+        return self.by_raw.get(raw)
+
+    def by_ingredient_id(self, id_: int) -> Optional[IngredientEntry]:
+        return self.by_id.get(id_)
+
+    def has_ingredient(self, raw: str) -> bool:
+        e = self.by_raw.get(raw)
+        return e is not None and e.id is not None
+
+    def keyword(self, raw: str) -> Optional[str]:
+        e = self.by_raw.get(raw)
+        return e.keyword if e else None
+
+    def grade(self, raw: str) -> Optional[str]:
+        e = self.by_raw.get(raw)
+        return e.grade if e else None
+
+    # ---- 주의 성분 (정확 일치 우선, 없으면 대소문자/끝 공백 무시) ----
+    def official_caution(self, raw: str) -> Optional[IngredientEntry]:
+        if raw in self._official:
+            return self.by_raw[raw]
+        return self._official_fold.get(fold_name(raw))
+
+    def ml_caution(self, raw: str) -> Optional[IngredientEntry]:
+        if raw in self._ml:
+            return self.by_raw[raw]
+        return self._ml_fold.get(fold_name(raw))
+
+    # ---- 정규화 기준 ----
+    def lookup(self, name: str) -> Optional[IngredientEntry]:
+        """원문 우선, 없으면 정규화 이름으로 조회"""
+        return self.by_raw.get(name) or self.by_norm.get(normalize_name(name) or "")
+
+    def in_kcia(self, norm: Optional[str]) -> bool:
+        e = self.by_norm.get(norm) if norm else None
+        return e is not None and e.in_kcia
+
+    def purpose(self, norm: Optional[str], default=None):
+        e = self.by_norm.get(norm) if norm else None
+        return e.purpose if (e is not None and e.in_kcia) else default
+
+    # ---- 배치 ----
+    def keyword_map(self, raw_names: Iterable[str]) -> Dict[str, str]:
+        out = {}
+        for n in raw_names:
+            kw = self.keyword(n)
+            if kw:
+                out[n] = kw
+        return out
+
+    def purpose_map(self, norm_names: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {n: self.by_norm[n].purpose for n in norm_names if self.in_kcia(n)}
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "version": self.version,
+            "signature": self.signature[:12],
+            "loaded_at": self.loaded_at,
+            "raw_names": len(self.by_raw),
+            "norm_names": len(self.by_norm),
+            "official_caution": len(self._official),
+            "ml_caution": len(self._ml),
+        }
+
+
+# ============================================
+# 로드
+# ============================================
+def _fetch_tables(conn):
+    ing = conn.execute(text(
+        "SELECT id, korean_name, keyword, description, caution_grade FROM ingredients ORDER BY id"
+    )).fetchall()
+    kcia = conn.execute(text(
+        "SELECT name_normalized, purpose FROM KCIA_ingredients ORDER BY id"
+    )).fetchall()
+    official = conn.execute(text(
+        "SELECT korean_name, caution_grade, description FROM caution_ingredients"
+    )).fetchall()
+    try:
+        ml = conn.execute(text(
+            "SELECT korean_name, caution_grade, description FROM ML_caution_ingredients"
+        )).fetchall()
+    except Exception as e:
+        print(f"⚠️ ML_caution_ingredients 로드 생략: {e}")
+        ml = []
+    return ing, kcia, official, ml
+
+
+def _signature(*tables) -> str:
+    h = hashlib.sha1()
+    for rows in tables:
+        for r in rows:
+            h.update(repr(tuple(r)).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+def _build(ing, kcia, official, ml, signature: str, version: int) -> IngredientKB:
+    by_raw: Dict[str, IngredientEntry] = {}
+
+    def _entry(name) -> IngredientEntry:
+        e = by_raw.get(name)
+        if e is None:
+            e = by_raw[name] = IngredientEntry(name)
+        return e
+
+    for id_, name, kw, desc, grade in ing:
+        if not name:
+            continue
+        e = _entry(name)
+        if e.id is None:
+            e.id, e.description = id_, desc
+        # 기존 조회와 동일: 같은 이름 중복 시 마지막 값 사용
+        e.grade = grade
+        if kw:
+            e.keyword = kw
+
+    official_names, ml_names = set(), set()
+    for name, grade, desc in official:
+        if not name:
+            continue
+        e = _entry(name)
+        e.official_grade, e.official_description = grade, desc
+        official_names.add(name)
+    for name, grade, desc in ml:
+        if not name:
+            continue
+        e = _entry(name)
+        e.ml_grade, e.ml_description = grade, desc
+        ml_names.add(name)
+
+    # KCIA: 정규화 이름 → 배합목적
+    kcia_purpose: Dict[str, Optional[str]] = {}
+    for norm, purp in kcia:
+        if norm:
+            kcia_purpose[norm] = purp
+
+    by_norm: Dict[str, IngredientEntry] = {}
+    for name, e in by_raw.items():
+        n = normalize_name(name)
+        if not n:
+            continue
+        if n in kcia_purpose:
+            e.in_kcia, e.purpose = True, kcia_purpose[n]
+        by_norm.setdefault(n, e)
+    for n, purp in kcia_purpose.items():
+        if n not in by_norm:
+            e = IngredientEntry(None)
+            e.in_kcia, e.purpose = True, purp
+            by_norm[n] = e
+
+    return IngredientKB(by_raw, by_norm, official_names, ml_names, signature, version)
+
+
+# ============================================
+# 프로세스 공용 스냅샷
+# ============================================
+_kb: Optional[IngredientKB] = None
+_lock = threading.Lock()
+_refresher: Optional[threading.Thread] = None
+
+
+def refresh_kb(force: bool = False) -> IngredientKB:
+    """테이블을 다시 읽어 내용이 바뀌었으면 새 스냅샷으로 교체. 현재 스냅샷 반환."""
+    global _kb
+    from db import engine  # 오프라인 스크립트(사전 직접 구성)에서는 DB 설정 없이도 import 가능하도록
+    t0 = time.time()
+    with engine.connect() as conn:
+        tables = _fetch_tables(conn)
+    signature = _signature(*tables)
+    with _lock:
+        if _kb is not None and not force and _kb.signature == signature:
+            return _kb
+        version = (_kb.version + 1) if _kb is not None else 1
+        _kb = _build(*tables, signature=signature, version=version)
+    print(f"[INGREDIENT_KB] v{_kb.version} loaded: raw={len(_kb.by_raw)}, norm={len(_kb.by_norm)}, "
+          f"{int((time.time() - t0) * 1000)}ms")
+    return _kb
+
+
+def get_kb() -> IngredientKB:
+    kb = _kb
+    if kb is None:
+        kb = refresh_kb()
+    return kb
+
+
+def _refresh_loop():
+    while True:
+        time.sleep(REFRESH_SEC)
+        try:
+            refresh_kb()
+        except Exception as e:
+            print(f"❌ 성분 사전 갱신 실패 (이전 버전 유지): {e}")
+
+
+def start_ingredient_kb():
+    """앱 시작 시 1회 로드 + 주기 갱신 스레드 시작 (로드 실패 시 첫 조회에서 재시도)"""
+    global _refresher
+    try:
+        refresh_kb()
+    except Exception as e:
+        print(f"❌ 성분 사전 초기 로드 실패: {e}")
+    if _refresher is None and REFRESH_SEC > 0:
+        _refresher = threading.Thread(target=_refresh_loop, name="ingredient-kb-refresh", daemon=True)
+        _refresher.start()
+
+
+def caution_lookup(names: List[str]) -> Dict[str, List[Dict[str, object]]]:
+    """공식 주의 성분 + (공식에 없는) ML 예측 주의 성분"""
+    kb = get_kb()
+    official, ml_list = [], []
+    seen, ml_seen = set(), set()
+    for ing in names:
+        e = kb.official_caution(ing.strip())
+        if e and e.korean_name not in seen:
+            seen.add(e.korean_name)
+            official.append({"korean_name": e.korean_name, "caution_grade": e.official_grade,
+                             "description": e.official_description})
+    official_names = {x["korean_name"] for x in official}
+    for ing in names:
+        if ing in official_names:
+            continue
+        e = kb.ml_caution(ing.strip())
+        if e and e.korean_name not in ml_seen:
+            ml_seen.add(e.korean_name)
+            ml_list.append({"korean_name": e.korean_name, "caution_grade": e.ml_grade,
+                            "description": e.ml_description})
+    return {"official": official, "ml_predicted": ml_list}
@@ -0,0 +1,91 @@
+# backend/services/ingredient_matcher.py
+# -*- coding: utf-8 -*-
+"""
+OCR 원문에서 성분명 추출 (n-gram 최장 일치).
+
+기존 방식은 `[가-힣a-zA-Z0-9\\-]+` 단어 하나씩만 사전과 비교해서
+"하이드롤라이즈드 콜라겐", "1,2-헥산다이올"처럼 여러 토큰에 걸친 이름을 놓쳤다.
+
+- OCR 텍스트를 단어(atom) 단위로 한 번 훑으면서, 각 위치에서 최대 MAX_NGRAM개 단어를
+  원문 그대로 이어 붙인 구간을 정규화해 성분 사전(by_norm)과 비교 → 가장 긴 일치 채택
+- 일치하면 그 구간 뒤로 건너뛰므로 한 성분이 부분 문자열로 중복 검출되지 않음
+- 사전 대상: KCIA(정규화 이름) ∪ ingredients(국문명 정규화)  — services/ingredient_kb.py 스냅샷
+
+성분 문자열 분리:
+- 카탈로그 p_ingredients는 기존대로 ','마다 분리 (점수/프로필 결과 유지)
+- OCR 추출 결과는 성분명 안의 콤마("1,2-헥산다이올")를 지키기 위해 OCR_JOIN_SEP(', ')로
+  이어 붙이고 같은 구분자로 분리 (성분명 쪽 콤마 뒤 공백은 추출 시 제거)
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from services.ingredient_kb import IngredientKB, get_kb, normalize_name
+
+_ATOM = re.compile(r'[가-힣a-zA-Z0-9\-]+')
+_WS = re.compile(r'\s+')
+_COMMA_WS = re.compile(r'\s*,\s*')
+MAX_NGRAM = 6   # 한 성분명이 걸칠 수 있는 최대 단어 수
+OCR_JOIN_SEP = ", "
+
+
+def split_ingredient_tokens(ingredients_str: str, sep: str = ",") -> List[str]:
+    """성분 문자열 → 원문 토큰 (카탈로그: ',', OCR 추출 결과: OCR_JOIN_SEP)"""
+    return [ing.strip().strip('"') for ing in ingredients_str.split(sep) if ing.strip()]
+
+
+def join_ocr_names(names: List[str]) -> str:
+    return OCR_JOIN_SEP.join(names)
+
+
+def _norm_span(span: str) -> Optional[str]:
+    # 줄바꿈/탭까지 공백으로 보고 제거 (normalize_name은 ' '만 제거)
+    return normalize_name(_WS.sub(' ', span))
+
+
+def match_spans(text: str, kb: Optional[IngredientKB] = None) -> List[Tuple[str, str, object]]:
+    """
+    OCR 텍스트 → [(원문 구간, 정규화 이름, 사전 항목)] (등장 순서, 겹침 없음)
+    """
+    kb = kb or get_kb()
+    by_norm = kb.by_norm
+    max_len = kb.max_norm_len
+    atoms = [(m.start(), m.end()) for m in _ATOM.finditer(text or "")]
+
+    out = []
+    i, n_atoms = 0, len(atoms)
+    while i < n_atoms:
+        start = atoms[i][0]
+        hit = None
+        for j in range(min(n_atoms, i + MAX_NGRAM) - 1, i - 1, -1):
+            span = text[start:atoms[j][1]]
+            if len(span) < 2:
+                continue
+            n = _norm_span(span)
+            if not n or len(n) > max_len:
+                continue
+            e = by_norm.get(n)
+            if e is not None and (e.in_kcia or e.id is not None):
+                hit = (j, span, n, e)
+                break
+        if hit:
+            j, span, n, e = hit
+            out.append((span, n, e))
+            i = j + 1
+        else:
+            i += 1
+    return out
+
+
+def extract_ingredient_names(text: str, kb: Optional[IngredientKB] = None) -> List[str]:
+    """
+    OCR 텍스트 → 성분명 목록 (중복 제거, 등장 순서).
+    ingredients 테이블에 있는 성분은 DB 표기(korean_name)로, KCIA에만 있는 성분은 OCR 원문 표기로 반환.
+    """
+    result, seen = [], set()
+    for span, n, e in match_spans(text, kb):
+        if n in seen:
+            continue
+        seen.add(n)
+        result.append(e.korean_name if e.id is not None else _COMMA_WS.sub(',', _WS.sub(' ', span)).strip())
+    return result
@@ -0,0 +1,144 @@
+# backend/services/intent_classifier.py
+# -*- coding: utf-8 -*-
+"""
+로컬 의도 분류기 (GENERAL vs PRODUCT_FIND).
+
+- 문자 n-gram(1~3) 해시 피처 + 로지스틱 회귀 (가중치 벡터 1개)
+- 학습은 scripts/train_intent_classifier.py에서 오프라인으로 수행
+  (로그의 intent_decided_by_chain 이벤트 = LLM 라우터 판정을 정답으로 사용)
+- 추론은 n-gram 해시 → 가중치 합 → sigmoid 뿐이라 1ms 미만
+- 모델 파일이 없으면 비활성화 (항상 LLM 라우터 사용)
+"""
+
+import os
+import math
+import re
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+N_FEATURES = 1 << 18          # 해시 버킷 수
+NGRAM_RANGE = (1, 3)
+
+# p(GENERAL) 가 이 값 이상이면 LLM 없이 GENERAL로 확정.
+# 그 아래(저신뢰 구간 포함)는 기존처럼 analyze_with_llm이 의도+파싱을 함께 결정한다.
+GENERAL_THRESHOLD = float(os.getenv("INTENT_GENERAL_THRESHOLD", "0.90"))
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "artifacts",
+    "intent_classifier.npz",
+)
+MODEL_PATH = os.getenv("INTENT_MODEL_PATH", DEFAULT_MODEL_PATH)
+
+LABELS = ("PRODUCT_FIND", "GENERAL")  # y=1 → GENERAL
+
+
+def _normalize(text: str) -> str:
+    s = unicodedata.normalize("NFKC", text or "").lower().strip()
+    return re.sub(r"\s+", " ", s)
+
+
+def featurize(text: str) -> Dict[int, float]:
+    """문자 n-gram 해시 → {bucket: tf} (L2 정규화)."""
+    s = f" {_normalize(text)} "
+    feats: Dict[int, float] = {}
+    lo, hi = NGRAM_RANGE
+    for n in range(lo, hi + 1):
+        for i in range(len(s) - n + 1):
+            g = s[i: i + n]
+            h = zlib.crc32(f"{n}:{g}".encode("utf-8")) % N_FEATURES
+            feats[h] = feats.get(h, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in feats.values())) or 1.0
+    return {k: v / norm for k, v in feats.items()}
+
+
+class IntentClassifier:
+    def __init__(self, weights: np.ndarray, bias: float, meta: Optional[Dict] = None):
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        z = np.load(path, allow_pickle=False)
+        meta = {k: z[k].item() for k in z.files if k not in ("weights", "bias")}
+        return cls(z["weights"], float(z["bias"]), meta)
+
+    def save(self, path: str, **meta):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=np.float32(self.bias), **meta)
+
+    def prob_general(self, text: str) -> float:
+        feats = featurize(text)
+        w = self.weights
+        z = self.bias + sum(w[k] * v for k, v in feats.items())
+        return 1.0 / (1.0 + math.exp(-float(z)))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        p = self.prob_general(text)
+        return ("GENERAL" if p >= 0.5 else "PRODUCT_FIND"), p
+
+
+def train_logistic(
+    samples: List[Tuple[str, int]],
+    epochs: int = 8,
+    lr: float = 0.5,
+    l2: float = 1e-6,
+    seed: int = 42,
+) -> IntentClassifier:
+    """SGD 로지스틱 회귀 (희소 피처). samples: [(query, y)], y=1 → GENERAL."""
+    rng = np.random.default_rng(seed)
+    w = np.zeros(N_FEATURES, dtype=np.float64)
+    b = 0.0
+    feats = [(featurize(q), y) for q, y in samples]
+    order = np.arange(len(feats))
+    for ep in range(epochs):
+        rng.shuffle(order)
+        step = lr / (1.0 + ep)
+        for idx in order:
+            f, y = feats[idx]
+            keys = np.fromiter(f.keys(), dtype=np.int64, count=len(f))
+            vals = np.fromiter(f.values(), dtype=np.float64, count=len(f))
+            z = b + float(w[keys] @ vals)
+            p = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+            g = p - y
+            w[keys] -= step * (g * vals + l2 * w[keys])
+            b -= step * g
+    return IntentClassifier(w.astype(np.float32), b)
+
+
+# ─────────────────────────────────────────────────────
+# 프로세스 전역 모델 (지연 로드)
+# ─────────────────────────────────────────────────────
+_MODEL: Optional[IntentClassifier] = None
+_LOADED = False
+
+
+def get_model() -> Optional[IntentClassifier]:
+    global _MODEL, _LOADED
+    if not _LOADED:
+        _LOADED = True
+        if os.path.exists(MODEL_PATH):
+            try:
+                _MODEL = IntentClassifier.load(MODEL_PATH)
+            except Exception:
+                _MODEL = None
+    return _MODEL
+
+
+def classify_local(user_query: str) -> Optional[Tuple[str, float]]:
+    """
+    로컬 분류 결과 (intent, p_general).
+    - 모델이 없으면 None
+    - GENERAL 확신 구간이면 ("GENERAL", p), 그 외에는 ("DEFER", p) → LLM 라우터 사용
+    """
+    model = get_model()
+    if model is None:
+        return None
+    p = model.prob_general(user_query)
+    if p >= GENERAL_THRESHOLD:
+        return "GENERAL", p
+    return "DEFER", p
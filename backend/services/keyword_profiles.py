@@ -0,0 +1,121 @@
+# backend/services/keyword_profiles.py
+# -*- coding: utf-8 -*-
+"""
+제품별 성분 keyword 프로필 일괄 생성 (product_keyword_profiles).
+
+- 프로필: 6개 keyword 매칭 수(압축 문자열), total_keyword_hits, 고유 매칭 성분 수,
+  keyword 매칭 [토큰 위치, ingredients.id] 목록, 신뢰등급
+- /api/analyze, /api/top-products는 프로필이 유효하면(p_ingredients 해시 + 프로필 지문(profile_sig) 일치)
+  성분 문자열 keyword 매칭을 건너뛴다. 유효하지 않으면 기존 매칭으로 자동 대체.
+- 증분 갱신: ing_hash / kb_sig가 저장값과 다른 제품만 다시 쓰고, 사라진 제품 행은 삭제
+
+사용: python scripts/refresh_keyword_profiles.py [--full]
+"""
+
+import json
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.analysis_cache import content_hash
+from services.ingredient_kb import refresh_kb
+from routers.analysis import (
+    ProductKeywordProfile,
+    build_keyword_profile,
+    profile_sig,
+    resolve_keyword_purpose_maps,
+    split_ingredient_tokens,
+)
+
+UPSERT_CHUNK = 1000
+
+_UPSERT_SQL = text("""
+    INSERT INTO product_keyword_profiles
+        (pid, kw_counts, total_keyword_hits, matched_count, matched_ids, reliability,
+         ing_hash, kb_sig, updated_at)
+    VALUES
+        (:pid, :kw_counts, :total_keyword_hits, :matched_count, :matched_ids, :reliability,
+         :ing_hash, :kb_sig, :updated_at)
+    ON DUPLICATE KEY UPDATE
+        kw_counts = VALUES(kw_counts), total_keyword_hits = VALUES(total_keyword_hits),
+        matched_count = VALUES(matched_count), matched_ids = VALUES(matched_ids),
+        reliability = VALUES(reliability), ing_hash = VALUES(ing_hash),
+        kb_sig = VALUES(kb_sig), updated_at = VALUES(updated_at)
+""")
+
+_DELETE_SQL = text("DELETE FROM product_keyword_profiles WHERE pid = :pid")
+
+
+def _load_products(db: Session) -> List[Tuple[int, str]]:
+    return db.execute(text("""
+        SELECT pid, p_ingredients
+        FROM product_data
+        WHERE LENGTH(TRIM(p_ingredients)) > 0
+    """)).fetchall()
+
+
+def refresh_keyword_profiles(db: Session, full: bool = False) -> dict:
+    """
+    product_keyword_profiles를 최신 상태로 맞춘다.
+    full=True면 지문 비교 없이 전체 재작성.
+    반환: 처리 통계
+    """
+    t0 = time.time()
+    ProductKeywordProfile.__table__.create(bind=db.get_bind(), checkfirst=True)
+
+    # 성분 keyword 변경을 놓치지 않도록 사전을 먼저 최신화
+    kb = refresh_kb()
+    kb_sig = profile_sig(kb)
+
+    existing = {
+        pid: (ing_hash, sig)
+        for pid, ing_hash, sig in db.execute(text(
+            "SELECT pid, ing_hash, kb_sig FROM product_keyword_profiles"
+        )).fetchall()
+    }
+
+    products = _load_products(db)
+    todo = []   # (pid, ing_hash, tokens)
+    for pid, ing_str in products:
+        ing_hash = content_hash(ing_str)
+        if full or existing.get(pid) != (ing_hash, kb_sig):
+            todo.append((pid, ing_hash, split_ingredient_tokens(ing_str)))
+
+    union_names = set()
+    for _, _, tokens in todo:
+        union_names.update(tokens)
+    keyword_map, _ = resolve_keyword_purpose_maps(union_names, None, kb)
+
+    now = datetime.now()
+    upserts = []
+    for pid, ing_hash, tokens in todo:
+        prof = build_keyword_profile(tokens, keyword_map, kb)
+        upserts.append({
+            "pid": pid,
+            **prof,
+            "matched_ids": json.dumps(prof["matched_ids"]),
+            "ing_hash": ing_hash,
+            "kb_sig": kb_sig,
+            "updated_at": now,
+        })
+
+    live = {pid for pid, _ in products}
+    stale = [{"pid": pid} for pid in existing.keys() - live]
+
+    for i in range(0, len(upserts), UPSERT_CHUNK):
+        db.execute(_UPSERT_SQL, upserts[i:i + UPSERT_CHUNK])
+    for i in range(0, len(stale), UPSERT_CHUNK):
+        db.execute(_DELETE_SQL, stale[i:i + UPSERT_CHUNK])
+    db.commit()
+
+    return {
+        "products": len(products),
+        "upserted": len(upserts),
+        "deleted": len(stale),
+        "kb_version": kb.version,
+        "full": full,
+        "elapsed_ms": int((time.time() - t0) * 1000),
+    }
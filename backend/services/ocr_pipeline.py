@@ -0,0 +1,133 @@
+# backend/services/ocr_pipeline.py
+# -*- coding: utf-8 -*-
+"""
+OCR 공용 파이프라인 (Google Vision).
+
+- Vision 클라이언트는 프로세스당 1개만 생성해 재사용 (gRPC 채널 풀 공유)
+- 블로킹 단계(Vision 호출 / 동기 SQLAlchemy)는 전용 ThreadPoolExecutor로 넘겨
+  이벤트 루프를 막지 않음
+- OCR 동시 처리 수 상한(세마포어) + 대기 시간 초과 시 503
+- 단계별 소요 시간(ms) 기록
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import find_dotenv
+from fastapi import HTTPException
+from google.cloud import vision
+
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", "4"))     # 동시에 처리하는 OCR 요청 수
+OCR_QUEUE_TIMEOUT_SEC = float(os.getenv("OCR_QUEUE_TIMEOUT_SEC", "15"))  # 슬롯 대기 최대 시간
+OCR_EXECUTOR_WORKERS = int(os.getenv("OCR_EXECUTOR_WORKERS", str(OCR_MAX_CONCURRENCY * 2)))
+
+_executor = ThreadPoolExecutor(max_workers=OCR_EXECUTOR_WORKERS, thread_name_prefix="ocr")
+_client: Optional[vision.ImageAnnotatorClient] = None
+_client_lock = threading.Lock()
+_semaphores: Dict[int, asyncio.Semaphore] = {}
+
+
+# ============================================
+# Vision 클라이언트 (싱글톤)
+# ============================================
+def _resolve_credentials_path() -> str:
+    path = (os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or "").strip()
+    if not path:
+        raise RuntimeError("GOOGLE_APPLICATION_CREDENTIALS가 설정되지 않았습니다.")
+    if os.path.isabs(path):
+        return path
+    # 상대경로: .env 위치 → backend 디렉터리 순으로 확인
+    candidates = []
+    dotenv_path = find_dotenv()
+    if dotenv_path:
+        candidates.append(os.path.join(os.path.dirname(dotenv_path), path))
+    candidates.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path))
+    for c in candidates:
+        if os.path.exists(c):
+            return c
+    raise RuntimeError(f"서비스키 파일이 없습니다: {path}")
+
+
+def get_vision_client() -> vision.ImageAnnotatorClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = vision.ImageAnnotatorClient.from_service_account_json(_resolve_credentials_path())
+    return _client
+
+
+def detect_text(image_bytes: bytes, document: bool = False) -> str:
+    """이미지 바이트 → OCR 전체 텍스트 (블로킹, executor에서 호출)"""
+    client = get_vision_client()
+    image = vision.Image(content=image_bytes)
+    if document:
+        resp = client.document_text_detection(image=image)
+    else:
+        resp = client.text_detection(image=image)
+    if resp.error.message:
+        raise RuntimeError(f"Vision API 오류: {resp.error.message}")
+    if document:
+        return resp.full_text_annotation.text or ""
+    texts = resp.text_annotations
+    return texts[0].description if texts else ""
+
+
+# ============================================
+# 비동기 실행 / 동시성 제한 / 단계별 시간
+# ============================================
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(id(loop))
+    if sem is None:
+        sem = _semaphores[id(loop)] = asyncio.Semaphore(OCR_MAX_CONCURRENCY)
+    return sem
+
+
+@asynccontextmanager
+async def ocr_slot(timings: Optional["StageTimer"] = None):
+    """OCR 동시 처리 슬롯 확보. 대기가 길어지면 503으로 빠르게 실패."""
+    sem = _semaphore()
+    t0 = time.perf_counter()
+    try:
+        await asyncio.wait_for(sem.acquire(), timeout=OCR_QUEUE_TIMEOUT_SEC)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="OCR 요청이 많아 잠시 후 다시 시도해주세요.")
+    if timings is not None:
+        timings.add("queue", (time.perf_counter() - t0) * 1000)
+    try:
+        yield
+    finally:
+        sem.release()
+
+
+class StageTimer:
+    """단계별 소요 시간(ms) 기록"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._t0 = time.perf_counter()
+
+    def add(self, stage: str, ms: float):
+        self.stages[stage] = round(self.stages.get(stage, 0.0) + ms, 1)
+
+    async def run(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        t = time.perf_counter()
+        try:
+            return await run_blocking(fn, *args, **kwargs)
+        finally:
+            self.add(stage, (time.perf_counter() - t) * 1000)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**self.stages, "total": round((time.perf_counter() - self._t0) * 1000, 1)}
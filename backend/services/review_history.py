@@ -0,0 +1,132 @@
+# backend/services/review_history.py
+# -*- coding: utf-8 -*-
+"""
+주간 리뷰 수 이력 물리화 (product_review_history_weekly_v → product_review_history_weekly).
+
+- 뷰는 조회마다 원본을 다시 집계하고 DATE(period_start) 조건은 인덱스를 못 탄다
+  → period_start(DATE) / product_pid / review_count만 실제 테이블로 적재해 트렌드 조회가 이 테이블만 읽는다.
+- PK (period_start, product_pid): 주차 단위 조회·DISTINCT 주차 목록
+  보조 인덱스 (product_pid, period_start, review_count): 제품별 시계열을 인덱스만으로 처리
+- 증분 적재: 테이블의 마지막 주차 이후 주차만 뷰에서 가져온다 (주차 단위 커밋, 재실행 안전)
+- 적재 후 catalog_facets periods를 무효화 → 트렌드 캐시/행렬이 다음 요청에서 새 주차를 반영
+- 테이블이 없거나 비어 있는 동안 트렌드 조회는 뷰를 그대로 읽는다 (catalog_facets.history_source)
+
+배포 절차 (필수): 테이블 생성 후 backfill 1회 → 이후 주간 배치로 incremental
+    python scripts/load_review_history.py backfill
+    python scripts/load_review_history.py verify
+
+사용: python scripts/load_review_history.py {incremental|backfill|verify}
+"""
+
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import ProductReviewHistoryWeekly
+from services import catalog_facets
+from services.catalog_facets import HISTORY_VIEW as SOURCE_VIEW
+from services.catalog_facets import TBL_HISTORY
+
+# 뷰의 period_start 타입(DATETIME일 수 있음)과 무관하게 [day, day+1) 범위로 읽는다
+_LOAD_WEEK_SQL = text(f"""
+    INSERT INTO {TBL_HISTORY} (period_start, product_pid, review_count, loaded_at)
+    SELECT DATE(v.period_start), v.product_pid, CAST(v.review_count AS SIGNED), NOW()
+    FROM {SOURCE_VIEW} AS v
+    WHERE v.period_start >= :d
+      AND v.period_start < :d_next
+    ON DUPLICATE KEY UPDATE
+        review_count = VALUES(review_count), loaded_at = VALUES(loaded_at)
+""")
+
+
+def ensure_table(db: Session):
+    ProductReviewHistoryWeekly.__table__.create(bind=db.get_bind(), checkfirst=True)
+
+
+def _as_date(v) -> date:
+    if isinstance(v, date):
+        return v if type(v) is date else v.date()
+    return date.fromisoformat(str(v)[:10])
+
+
+def source_weeks(db: Session, after: Optional[date] = None, until: Optional[date] = None) -> List[date]:
+    """뷰에 있는 주차 목록 (after 초과, until 이하)"""
+    where, params = [], {}
+    if after is not None:
+        where.append("period_start >= :after_next")
+        params["after_next"] = after + timedelta(days=1)
+    if until is not None:
+        where.append("period_start < :until_next")
+        params["until_next"] = until + timedelta(days=1)
+    rows = db.execute(text(f"""
+        SELECT DISTINCT DATE(period_start) AS d
+        FROM {SOURCE_VIEW}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY d
+    """), params).fetchall()
+    return [_as_date(r[0]) for r in rows if r[0] is not None]
+
+
+def loaded_latest(db: Session) -> Optional[date]:
+    v = db.execute(text(f"SELECT MAX(period_start) FROM {TBL_HISTORY}")).scalar()
+    return _as_date(v) if v is not None else None
+
+
+def load_weeks(db: Session, weeks: List[date]) -> Dict[str, Any]:
+    """주차별로 뷰 → 테이블 upsert (주차마다 커밋)"""
+    t0 = time.time()
+    done = []
+    for d in weeks:
+        t1 = time.time()
+        n = db.execute(_LOAD_WEEK_SQL, {"d": d, "d_next": d + timedelta(days=1)}).rowcount
+        db.commit()
+        done.append({"week": str(d), "rows": n, "ms": int((time.time() - t1) * 1000)})
+        print(f"[REVIEW_HISTORY] {d} 적재 ({n} rows)")
+    if done:
+        catalog_facets.invalidate("periods")
+    return {"weeks": done, "elapsed_ms": int((time.time() - t0) * 1000)}
+
+
+def load_new_weeks(db: Session) -> Dict[str, Any]:
+    """증분 적재: 테이블 마지막 주차 이후 주차만"""
+    ensure_table(db)
+    latest = loaded_latest(db)
+    stats = load_weeks(db, source_weeks(db, after=latest))
+    stats["previous_latest"] = str(latest) if latest else None
+    return stats
+
+
+def backfill(db: Session, since: Optional[date] = None, until: Optional[date] = None) -> Dict[str, Any]:
+    """뷰 전체(또는 기간) 재적재. 기존 행은 upsert로 덮어쓴다."""
+    ensure_table(db)
+    after = since - timedelta(days=1) if since is not None else None
+    return load_weeks(db, source_weeks(db, after=after, until=until))
+
+
+def verify(db: Session, last_weeks: Optional[int] = None) -> Dict[str, Any]:
+    """주차별 행 수 / review_count 합계를 뷰와 비교"""
+
+    def _agg(src: str, date_expr: str):
+        return {
+            _as_date(d): (int(n), int(s or 0))
+            for d, n, s in db.execute(text(f"""
+                SELECT {date_expr} AS d, COUNT(*), SUM(CAST(review_count AS SIGNED))
+                FROM {src}
+                GROUP BY d
+            """)).fetchall()
+            if d is not None
+        }
+
+    src = _agg(SOURCE_VIEW, "DATE(period_start)")
+    dst = _agg(TBL_HISTORY, "period_start")
+    weeks = sorted(set(src) | set(dst))
+    if last_weeks:
+        weeks = weeks[-last_weeks:]
+    mismatches = [
+        {"week": str(d), "view": src.get(d), "table": dst.get(d)}
+        for d in weeks if src.get(d) != dst.get(d)
+    ]
+    return {"checked_weeks": len(weeks), "mismatches": mismatches, "ok": not mismatches}
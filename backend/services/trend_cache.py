@@ -0,0 +1,111 @@
+# backend/services/trend_cache.py
+# -*- coding: utf-8 -*-
+"""
+트렌드 응답 캐시 (프로세스 공용).
+
+- 키: (엔드포인트, 정규화된 쿼리 파라미터), 값: 응답 본문 + 데이터 버전(최신 period_start)
+- 트렌드 데이터는 주 1회만 바뀌므로 같은 버전 안에서는 본문을 다시 계산하지 않는다.
+  버전이 바뀌면(새 주차 적재) 이전 버전 항목은 전부 버려진다.
+- ETag = (엔드포인트, 버전, 파라미터) → 클라이언트 재검증은 본문 계산 없이 304
+- 새 버전을 처음 본 시점에 기본 화면(ALLOWED_CATEGORIES × 기본 파라미터)을 백그라운드로 미리 계산
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.http_cache import make_etag
+
+RESPONSE_CACHE_MAX = int(os.getenv("TRENDS_RESPONSE_CACHE_MAX", "512"))
+MAX_AGE_SEC = int(os.getenv("TRENDS_CACHE_MAX_AGE", "60"))
+CACHE_CONTROL = f"public, max-age={MAX_AGE_SEC}"
+WARM_ON_NEW_VERSION = os.getenv("TRENDS_WARM_ON_NEW_VERSION", "1") == "1"
+
+ParamKey = Tuple[Tuple[str, Any], ...]
+
+_cache: "OrderedDict[Tuple[str, ParamKey], Tuple[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+_version: Optional[str] = None
+_hits = 0
+_misses = 0
+
+_warmed_version: Optional[str] = None
+_warm_lock = threading.Lock()
+
+
+def _norm_value(v: Any) -> Any:
+    if isinstance(v, bool) or v is None:
+        return v
+    if isinstance(v, float):
+        return repr(v)
+    if isinstance(v, (list, tuple)):
+        return tuple(_norm_value(x) for x in v)
+    return v if isinstance(v, int) else str(v)
+
+
+def param_key(params: Dict[str, Any]) -> ParamKey:
+    """쿼리 파라미터 정규화 (이름순, float는 repr) → 캐시 키 / ETag 재료"""
+    return tuple(sorted((k, _norm_value(v)) for k, v in params.items()))
+
+
+def etag_for(endpoint: str, version: str, key: ParamKey) -> str:
+    return make_etag("trends", endpoint, version, key)
+
+
+def get_or_build(endpoint: str, key: ParamKey, version: str, build: Callable[[], Any]) -> Any:
+    global _version, _hits, _misses
+    ck = (endpoint, key)
+    with _lock:
+        if version != _version:
+            _cache.clear()
+            _version = version
+        hit = _cache.get(ck)
+        if hit is not None and hit[0] == version:
+            _cache.move_to_end(ck)
+            _hits += 1
+            return hit[1]
+        _misses += 1
+
+    body = build()
+    with _lock:
+        if version == _version:
+            _cache[ck] = (version, body)
+            while len(_cache) > RESPONSE_CACHE_MAX:
+                _cache.popitem(last=False)
+    return body
+
+
+def warm_once(version: str, warm: Callable[[], None]):
+    """version을 처음 본 경우에만 warm()을 백그라운드 스레드로 실행"""
+    global _warmed_version
+    if not WARM_ON_NEW_VERSION or not version:
+        return
+    with _warm_lock:
+        if _warmed_version == version:
+            return
+        _warmed_version = version
+
+    def _run():
+        t0 = time.time()
+        try:
+            warm()
+            print(f"[TRENDS_CACHE] v={version} warm-up 완료 ({int((time.time() - t0) * 1000)}ms)")
+        except Exception as e:
+            print(f"❌ 트렌드 캐시 warm-up 실패: {e}")
+
+    threading.Thread(target=_run, name="trends-cache-warm", daemon=True).start()
+
+
+def clear():
+    global _version
+    with _lock:
+        _cache.clear()
+        _version = None
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {"version": _version, "entries": len(_cache), "hits": _hits, "misses": _misses,
+                "max_entries": RESPONSE_CACHE_MAX, "cache_control": CACHE_CONTROL}
@@ -0,0 +1,338 @@
+# backend/services/trend_matrix.py
+# -*- coding: utf-8 -*-
+"""
+주간 리뷰 수 (pid × week) 행렬 (프로세스 공용, in-memory).
+
+- 전체 주간 이력을 한 번 읽어 행렬로 보관: counts[p, w] (관측 없으면 0) + observed[p, w]
+  제품별 category / brand 코드를 같이 보관 → 카테고리 시계열, 스파크라인(sparklines) 등에서 재사용
+- 새 주차가 적재되면 그 주차 행만 읽어 열을 덧붙인다 (전체 재조회 없음).
+  기존 주차 목록 자체가 바뀐 경우(과거 주차 추가/삭제)에만 전체 재적재.
+- 행렬 인스턴스는 읽기 전용, 갱신은 새 인스턴스로 원자적 교체
+- 공유 스냅샷 파일(services/trend_store.py)이 있으면 DB 대신 그 mmap 배열을 그대로 사용
+
+category_timeseries 계산(기존 per-pid 루프와 같은 결과):
+- 창(weeks) 직전까지의 원본 값을 forward-fill해 첫 비교 기준으로 사용
+- 창 내부는 주차 열 단위로 전 제품을 한 번에 보정 (감소 carry-forward / 배율·점프 상한)
+  → 보정값이 다음 주 기준이 되는 재귀라 주차 방향만 순차, 제품 방향은 벡터 연산
+- 카테고리 합계/제품 수는 bincount
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services import catalog_facets, trend_store
+from services.catalog_facets import TBL_PRODUCT
+from services.trend_snapshot import effective_b
+
+RESULT_CACHE_MAX = 64
+
+
+class WeeklyMatrix:
+    """읽기 전용 (pid × week) 리뷰 수 행렬"""
+
+    def __init__(self, days: List[date], pids: np.ndarray, counts: np.ndarray, observed: np.ndarray,
+                 cat_codes: np.ndarray, categories: List[Any], brand_codes: np.ndarray, brands: List[Any],
+                 version: int):
+        self.days = days                    # 정렬된 주차 (date)
+        self.pids = pids                    # (P,) int64
+        self.counts = counts                # (P, W) int64
+        self.observed = observed            # (P, W) bool
+        self.cat_codes = cat_codes          # (P,) int64 → categories
+        self.categories = categories
+        self.brand_codes = brand_codes      # (P,) int64 → brands
+        self.brands = brands
+        self.version = version
+        self.periods: List[str] = []        # 적재 시점의 주차 목록 (catalog_facets periods)
+        self.built_at = time.time()
+        self.row_of = {int(p): i for i, p in enumerate(pids)}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.counts.shape
+
+    def latest_day(self) -> Optional[date]:
+        return self.days[-1] if self.days else None
+
+
+def _fetch(db: Session, after: Optional[date] = None):
+    where = "WHERE prh.period_start > :after" if after is not None else ""
+    q = text(f"""
+        SELECT prh.period_start       AS d,
+               prh.product_pid        AS pid,
+               pd.category            AS cat,
+               pd.brand               AS brand,
+               CAST(prh.review_count AS SIGNED) AS cnt
+        FROM {catalog_facets.history_source(db)} prh
+        JOIN {TBL_PRODUCT} pd ON pd.pid = prh.product_pid
+        {where}
+    """)
+    return db.execute(q, {"after": after} if after is not None else {}).fetchall()
+
+
+def _build(rows, base: Optional[WeeklyMatrix] = None) -> WeeklyMatrix:
+    """rows로 새 행렬 생성. base가 있으면 그 뒤에 새 주차 열(과 새 제품 행)을 덧붙인다."""
+    new_days = sorted({r[0] for r in rows})
+    if base is not None:
+        days = base.days + [d for d in new_days if d > base.days[-1]] if base.days else new_days
+        pid_list = [int(p) for p in base.pids]
+        row_of = dict(base.row_of)
+        cat_index = {c: i for i, c in enumerate(base.categories)}
+        brand_index = {b: i for i, b in enumerate(base.brands)}
+        cat_codes = list(base.cat_codes)
+        brand_codes = list(base.brand_codes)
+    else:
+        days = new_days
+        pid_list, row_of, cat_index, brand_index, cat_codes, brand_codes = [], {}, {}, {}, [], []
+
+    for _, pid, cat, brand, _ in rows:
+        pid = int(pid)
+        if pid not in row_of:
+            row_of[pid] = len(pid_list)
+            pid_list.append(pid)
+            cat_codes.append(cat_index.setdefault(cat, len(cat_index)))
+            brand_codes.append(brand_index.setdefault(brand, len(brand_index)))
+
+    P, W = len(pid_list), len(days)
+    counts = np.zeros((P, W), dtype=np.int64)
+    observed = np.zeros((P, W), dtype=bool)
+    W0 = 0
+    if base is not None:
+        P0, W0 = base.counts.shape
+        counts[:P0, :W0] = base.counts
+        observed[:P0, :W0] = base.observed
+
+    col_of = {d: i for i, d in enumerate(days)}
+    if rows:
+        r_idx = np.fromiter((row_of[int(r[1])] for r in rows), dtype=np.int64, count=len(rows))
+        c_idx = np.fromiter((col_of[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+        vals = np.fromiter((int(r[4] or 0) for r in rows), dtype=np.int64, count=len(rows))
+        counts[r_idx, c_idx] = vals
+        observed[r_idx, c_idx] = True
+
+    return WeeklyMatrix(
+        days=days,
+        pids=np.array(pid_list, dtype=np.int64),
+        counts=counts,
+        observed=observed,
+        cat_codes=np.array(cat_codes, dtype=np.int64),
+        categories=list(cat_index),
+        brand_codes=np.array(brand_codes, dtype=np.int64),
+        brands=list(brand_index),
+        version=(base.version + 1) if base is not None else 1,
+    )
+
+
+# ============================================
+# 프로세스 공용 행렬
+# ============================================
+_matrix: Optional[WeeklyMatrix] = None
+_lock = threading.Lock()
+_results: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def _set_matrix(m: WeeklyMatrix, periods: List[str], how: str, t0: float):
+    global _matrix
+    m.periods = list(periods)
+    _matrix = m
+    with _results_lock:
+        _results.clear()
+    P, W = m.shape
+    print(f"[TREND_MATRIX] v{m.version} {how}: pids={P}, weeks={W}, {int((time.time() - t0) * 1000)}ms")
+
+
+def reload_matrix(db: Session) -> WeeklyMatrix:
+    """전체 이력 재적재"""
+    _, periods = catalog_facets.get_periods(db)
+    with _lock:
+        t0 = time.time()
+        m = _build(_fetch(db))
+        if _matrix is not None:
+            m.version = _matrix.version + 1
+        _set_matrix(m, periods, "reloaded", t0)
+        return m
+
+
+def _from_store(store: trend_store.TrendStore, version: int) -> WeeklyMatrix:
+    """mmap 스냅샷 배열을 그대로 쓰는 행렬 (복사 없음)"""
+    return WeeklyMatrix(
+        days=store.days, pids=store.pids, counts=store.counts, observed=store.observed,
+        cat_codes=store.cat_codes, categories=store.categories,
+        brand_codes=store.brand_codes, brands=store.brands, version=version,
+    )
+
+
+def get_matrix(db: Session) -> WeeklyMatrix:
+    """
+    최신 행렬. 주차 목록(catalog_facets periods)과 비교해
+    - 공유 스냅샷 파일(trend_store)이 같은 주차 목록이면 그 mmap 배열 사용
+    - 뒤에 새 주차만 늘었으면 그 주차 행만 읽어 열 추가
+    - 그 외 변화면 전체 재적재
+    """
+    _, periods = catalog_facets.get_periods(db)
+    m = _matrix
+    if m is not None and m.periods == periods:
+        return m
+    with _lock:
+        m = _matrix
+        if m is not None and m.periods == periods:
+            return m
+        store = trend_store.current()
+        if store is not None and store.periods == periods:
+            t0 = time.time()
+            new = _from_store(store, (m.version + 1) if m is not None else 1)
+            _set_matrix(new, periods, f"mapped {store.name}", t0)
+            return new
+        if m is not None:
+            have = m.periods
+            if have and periods[:len(have)] == have:
+                t0 = time.time()
+                new = _build(_fetch(db, after=date.fromisoformat(have[-1])), base=m)
+                _set_matrix(new, periods, f"extended +{len(periods) - len(have)} week(s)", t0)
+                return new
+    return reload_matrix(db)
+
+
+# ============================================
+# 카테고리 시계열
+# ============================================
+def category_timeseries(m: WeeklyMatrix, categories: List[str], weeks: int,
+                        filter_outliers: bool, allow_negative: bool, max_ratio: float, max_jump: int,
+                        normalize: str) -> Dict[str, Any]:
+    key = (m.version, tuple(categories), weeks, filter_outliers, allow_negative, max_ratio, max_jump, normalize)
+    with _results_lock:
+        hit = _results.get(key)
+        if hit is not None:
+            _results.move_to_end(key)
+            return hit
+
+    result = _compute_category_timeseries(m, categories, weeks, filter_outliers, allow_negative,
+                                          max_ratio, max_jump, normalize)
+    with _results_lock:
+        _results[key] = result
+        while len(_results) > RESULT_CACHE_MAX:
+            _results.popitem(last=False)
+    return result
+
+
+def _compute_category_timeseries(m: WeeklyMatrix, categories: List[str], weeks: int,
+                                 filter_outliers: bool, allow_negative: bool, max_ratio: float,
+                                 max_jump: int, normalize: str) -> Dict[str, Any]:
+    empty = {"series": [], "categories": categories}
+    cat_pos = {c: i for i, c in enumerate(categories)}
+    # 행렬 카테고리 코드 → 요청 카테고리 순번 (-1: 대상 아님)
+    remap = np.array([cat_pos.get(c, -1) for c in m.categories], dtype=np.int64)
+    if not len(m.pids) or not len(remap):
+        return empty
+    cat = remap[m.cat_codes]
+    rows = cat >= 0
+    cat = cat[rows]
+    counts = m.counts[rows]
+    observed = m.observed[rows]
+
+    # 대상 카테고리 제품이 관측된 주차만 축으로 사용
+    cols = np.nonzero(observed.any(axis=0))[0]
+    if not len(cols):
+        return empty
+    counts = counts[:, cols]
+    observed = observed[:, cols]
+    days = [m.days[i] for i in cols]
+    W = len(days)
+    start = max(0, W - weeks)
+    C = len(categories)
+
+    # 창 직전까지 원본 값 forward-fill → 첫 주 비교 기준
+    if start > 0:
+        last = np.where(observed[:, :start], np.arange(start), -1).max(axis=1)
+        has_prev = last >= 0
+        prev = np.where(has_prev, counts[np.arange(len(cat)), np.maximum(last, 0)], 0)
+    else:
+        has_prev = np.zeros(len(cat), dtype=bool)
+        prev = np.zeros(len(cat), dtype=np.int64)
+
+    sums = np.zeros((W - start, C), dtype=np.int64)
+    ns = np.zeros((W - start, C), dtype=np.int64)
+    for k, t in enumerate(range(start, W)):
+        obs = observed[:, t]
+        b = counts[:, t]
+        a = np.where(has_prev, prev, b)
+        eff = np.where(has_prev, effective_b(a, b, filter_outliers, allow_negative, max_ratio, max_jump),
+                       np.maximum(0, b))
+        sums[k] = np.bincount(cat[obs], weights=np.maximum(0, eff[obs]), minlength=C).astype(np.int64)
+        ns[k] = np.bincount(cat[obs], minlength=C)
+        prev = np.where(obs, eff, prev)   # 보정값이 다음 주 기준
+        has_prev |= obs
+
+    if normalize == "avg":
+        metric = sums / np.maximum(1, ns)
+    else:
+        metric = sums.astype(np.float64)
+    base_vals = np.maximum(1e-9, metric[0])
+
+    series = []
+    for k, t in enumerate(range(start, W)):
+        row = {"date": str(days[t])}
+        for c, name in enumerate(categories):
+            v = float(metric[k, c])
+            base = float(base_vals[c])
+            idx = round((v / base) * 100.0, 1) if base > 0 else 100.0
+            # 주의: 프런트 호환을 위해 키 이름은 유지하되 값만 토글 반영
+            row[name] = {"sum": (v if normalize == "sum" else round(v, 4)), "index": idx}
+        series.append(row)
+
+    return {
+        "series": series,
+        "categories": categories,
+        "normalize": normalize,  # 참고용 메타
+    }
+
+
+# ============================================
+# 스파크라인 (카드 썸네일)
+# ============================================
+def sparklines(m: WeeklyMatrix, pids: List[int], window: int, delta: bool = False) -> Dict[str, Any]:
+    """
+    최근 window 주차 공용 축 + pid별 정수 배열 (컬럼형).
+    - 관측 없는 주차는 0, 누적값 비감소 보정 (product_mini_ts와 같은 규칙)
+    - 행렬에 없는 pid는 0 배열
+    - delta=True면 [첫 값, 이후 주차별 증가분] (비감소라 증가분 >= 0)
+    """
+    W = len(m.days)
+    start = max(0, W - window)
+    days = [str(d) for d in m.days[start:]]
+    out = np.zeros((len(pids), W - start), dtype=np.int64)
+    if pids and W:
+        rows = np.fromiter((m.row_of.get(int(p), -1) for p in pids), dtype=np.int64, count=len(pids))
+        known = rows >= 0
+        r = rows[known]
+        vals = np.where(m.observed[r, start:], m.counts[r, start:], 0)
+        out[known] = np.maximum.accumulate(vals, axis=1) if vals.size else vals
+    if delta and out.shape[1] > 1:
+        out[:, 1:] = np.diff(out, axis=1)
+    return {
+        "weeks": days,
+        "pids": [int(p) for p in pids],
+        "series": out.tolist(),
+        "encoding": "delta" if delta else "raw",
+    }
+
+
+def stats() -> Dict[str, Any]:
+    m = _matrix
+    with _results_lock:
+        cached = len(_results)
+    if m is None:
+        return {"loaded": False, "cached_results": cached}
+    P, W = m.shape
+    return {
+        "loaded": True, "version": m.version, "pids": P, "weeks": W,
+        "latest": str(m.latest_day()) if m.days else None,
+        "bytes": int(m.counts.nbytes + m.observed.nbytes), "cached_results": cached,
+    }
@@ -0,0 +1,352 @@
+# backend/services/trend_snapshot.py
+# -*- coding: utf-8 -*-
+"""
+트렌드 A/B 주간 스냅샷 엔진.
+
+leaderboard / category_summary / brand_positioning / brand_contributors는 모두
+product_data × 주간 이력(A주, B주) 조인 결과에 같은 outlier 보정을 적용한 뒤 집계만 다르다.
+→ (category, a_date, b_date)별로 조인을 한 번만 실행해 제품 단위 배열로 보관하고,
+  각 엔드포인트는 이 배열에서 NumPy 마스크/그룹 합계로 결과를 만든다.
+
+- 스냅샷에는 min_base / outlier 파라미터를 적용하지 않은 원본(B주 이력이 있는 전 제품)을 담고,
+  파라미터는 요청마다 벡터 연산으로 적용 → 파라미터가 달라도 같은 스냅샷 재사용
+- 캐시 키에 최신 period_start(데이터 버전)를 포함 → 새 주차 적재 시 자연스럽게 무효화
+- 같은 버전의 공유 스냅샷 파일(services/trend_store.py)이 있으면 조인 대신 그 배열에서 행 구성
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services import catalog_facets, trend_store
+from services.catalog_facets import TBL_PRODUCT
+from services.fit_score_np import round_builtin
+
+TBL_CHAIN = "product_data_chain"   # pid, rag_text
+SNAPSHOT_CACHE_MAX = 32
+
+KHOT = 300.0
+ALPHA = 0.35
+
+
+class ABSnapshot:
+    """한 카테고리의 (A주, B주) 제품 단위 배열 (읽기 전용)"""
+
+    __slots__ = (
+        "category", "a_date", "b_date", "version", "built_at",
+        "pid", "a_raw", "a", "b", "b_null",
+        "brand_codes", "brands",
+        "name", "brand", "image_url", "product_url", "price_krw", "rag_text",
+    )
+
+    def __init__(self, category: str, a_date: Optional[date], b_date: date, version: str, rows):
+        self.category = category
+        self.a_date = a_date
+        self.b_date = b_date
+        self.version = version
+        self.built_at = time.time()
+
+        n = len(rows)
+        self.pid = np.fromiter((int(r[0]) for r in rows), dtype=np.int64, count=n)
+        self.name = [r[1] for r in rows]
+        self.brand = [r[2] for r in rows]
+        self.image_url = [r[3] for r in rows]
+        self.product_url = [r[4] for r in rows]
+        self.price_krw = [r[5] for r in rows]
+        self.rag_text = [r[6] for r in rows]
+        # a: COALESCE(A주, product_data.review_count, 0) / b: B주 (NULL이면 0)
+        self.a_raw = np.fromiter((int(r[7] or 0) for r in rows), dtype=np.int64, count=n)
+        self.b_null = np.fromiter((r[8] is None for r in rows), dtype=bool, count=n)
+        b_raw = np.fromiter((int(r[8] or 0) for r in rows), dtype=np.int64, count=n)
+        self.a = np.maximum(self.a_raw, 0)
+        self.b = np.maximum(b_raw, 0)
+
+        # 브랜드 코드 (첫 등장 순서) — 그룹 합계용
+        index: Dict[Any, int] = {}
+        self.brand_codes = np.fromiter((index.setdefault(br, len(index)) for br in self.brand),
+                                       dtype=np.int64, count=n)
+        self.brands = list(index)
+
+    def __len__(self):
+        return len(self.pid)
+
+    def base_mask(self, min_base: int) -> np.ndarray:
+        return self.a_raw >= min_base
+
+
+# ============================================
+# 스냅샷 캐시
+# ============================================
+_cache: "OrderedDict[Tuple, ABSnapshot]" = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "build_ms": 0.0}
+
+
+def _fetch_rows(db: Session, category: str, a_date: Optional[date], b_date: date):
+    history = catalog_facets.history_source(db)
+    q = text(f"""
+        SELECT
+            pd.pid, pd.product_name, pd.brand,
+            pd.image_url, pd.product_url, pd.price_krw,
+            COALESCE(pdc.rag_text, '') AS rag_text,
+            CAST(COALESCE(a.review_count, pd.review_count, 0) AS SIGNED) AS a_cnt,
+            CAST(b.review_count AS SIGNED) AS b_cnt
+        FROM {TBL_PRODUCT} AS pd
+        LEFT JOIN {history} AS a
+               ON a.product_pid = pd.pid
+              AND a.period_start = :a_date
+        JOIN {history} AS b
+               ON b.product_pid = pd.pid
+              AND b.period_start = :b_date
+        LEFT JOIN {TBL_CHAIN} AS pdc
+               ON pdc.pid = pd.pid
+        WHERE pd.category = :cat
+    """)
+    return db.execute(q, {"a_date": a_date, "b_date": b_date, "cat": category}).fetchall()
+
+
+def get_snapshot(db: Session, category: str, a_date: Optional[date], b_date: date, version: str) -> ABSnapshot:
+    """
+    (category, a_date, b_date) 스냅샷. version(최신 period_start)이 바뀌면 이전 스냅샷은 버려진다.
+    """
+    key = (category, a_date, b_date)
+    with _cache_lock:
+        snap = _cache.get(key)
+        if snap is not None and snap.version == version:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return snap
+    t0 = time.perf_counter()
+    rows = None
+    store = trend_store.current()
+    if store is not None and store.periods and store.periods[-1] == version:
+        rows = store.ab_rows(category, a_date, b_date)   # 공유 스냅샷 파일 (DB 조인 없음)
+    if rows is None:
+        rows = _fetch_rows(db, category, a_date, b_date)
+    snap = ABSnapshot(category, a_date, b_date, version, rows)
+    with _cache_lock:
+        _stats["misses"] += 1
+        _stats["build_ms"] += (time.perf_counter() - t0) * 1000
+        # 버전이 바뀌었으면 이전 버전 스냅샷 전체 폐기
+        for k in [k for k, v in _cache.items() if v.version != version]:
+            del _cache[k]
+        _cache[key] = snap
+        while len(_cache) > SNAPSHOT_CACHE_MAX:
+            _cache.popitem(last=False)
+    return snap
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _cache_lock:
+        return {**_stats, "build_ms": round(_stats["build_ms"], 1), "size": len(_cache)}
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ============================================
+# outlier 보정 (벡터화)
+# ============================================
+def _over_ratio(a: np.ndarray, b: np.ndarray, max_ratio: float) -> np.ndarray:
+    """A > 0 이고 B / A > max_ratio (기존과 같은 나눗셈 비교)"""
+    return (a > 0) & ((b / np.where(a > 0, a, 1)) > max_ratio)
+
+
+def effective_b(a: np.ndarray, b: np.ndarray, filter_outliers: bool, allow_negative: bool,
+                max_ratio: float, max_jump: int) -> np.ndarray:
+    """
+    합계용 B값 보정 (category_summary / brand_* 공통)
+    - 감소 → A로 carry-forward, 배율 초과 → int(A × max_ratio), 절대 점프 초과 → A + max_jump
+    """
+    if not filter_outliers:
+        return b if allow_negative else np.maximum(b, a)
+    over_ratio = _over_ratio(a, b, max_ratio)
+    capped = np.where(over_ratio, np.trunc(a * max_ratio).astype(np.int64), b)
+    jump = np.abs(capped - a) > max_jump
+    capped = np.where(jump, np.where(capped >= a, a + max_jump, a), capped)
+    if allow_negative:
+        return capped
+    return np.where(b - a < 0, a, capped)
+
+
+def leaderboard_mask(a: np.ndarray, b: np.ndarray, filter_outliers: bool, allow_negative: bool,
+                     max_ratio: float, max_jump: int) -> np.ndarray:
+    """카드 목록용: outlier 제품은 보정 대신 제외"""
+    use = np.ones(len(a), dtype=bool)
+    if not filter_outliers:
+        return use
+    delta = b - a
+    if not allow_negative:
+        use &= delta >= 0
+    use &= ~_over_ratio(a, b, max_ratio)
+    use &= np.abs(delta) <= max_jump
+    return use
+
+
+# ============================================
+# 엔드포인트별 집계
+# ============================================
+def leaderboard(snap: ABSnapshot, sort_norm: str, limit: int, min_base: int,
+                filter_outliers: bool, allow_negative: bool, max_ratio: float, max_jump: int) -> Tuple[List[dict], int]:
+    """반환: (상위 limit개 item, 필터 통과 제품 수)"""
+    mask = snap.base_mask(min_base) & ~snap.b_null
+    mask &= leaderboard_mask(snap.a, snap.b, filter_outliers, allow_negative, max_ratio, max_jump)
+    idx = np.nonzero(mask)[0]
+    a = snap.a[idx].astype(np.float64)
+    b = snap.b[idx].astype(np.float64)
+    delta = snap.b[idx] - snap.a[idx]
+
+    pct_score = np.where((a > 0) | (b > 0), np.log1p(b) - np.log1p(a), 0.0)
+    hot_score = delta / (a + KHOT) ** ALPHA
+    hot_r = round_builtin(hot_score, 6)
+    pct_r = round_builtin(pct_score, 6)
+    pid = snap.pid[idx]
+
+    # 기존 정렬 키 (모두 내림차순)
+    if sort_norm == "hot":
+        order = np.lexsort((pid, pct_r, snap.b[idx], hot_r))[::-1]
+    elif sort_norm == "pct":
+        order = np.lexsort((pid, snap.b[idx], delta, pct_r))[::-1]
+    else:  # most
+        order = np.lexsort((pid, pct_r, delta, b))[::-1]
+    rank = {"hot": hot_r, "pct": pct_r}.get(sort_norm, b)
+
+    items: List[Dict[str, Any]] = []
+    for o in order[:limit]:
+        i = int(idx[o])
+        a_val, b_val = int(snap.a[i]), int(snap.b[i])
+        pct_percent = (((b_val / a_val) - 1.0) * 100.0) if a_val > 0 else (100.0 if b_val > 0 else 0.0)
+        index_val = ((b_val / a_val) * 100.0) if a_val > 0 else 100.0
+        items.append({
+            "pid": int(snap.pid[i]),
+            "product_name": snap.name[i],
+            "brand": snap.brand[i],
+            "image_url": snap.image_url[i],
+            "product_url": snap.product_url[i],
+            "price_krw": snap.price_krw[i],
+            "rag_text": snap.rag_text[i] or "요즘 후기에서 자주 보이는 제품이에요.",
+            "a_count": a_val,
+            "b_count": b_val,
+            "delta": b_val - a_val,
+            "hot_score": float(hot_r[o]),
+            "pct_score": float(pct_r[o]),
+            "most_score": float(b_val),
+            "pct": round(pct_percent, 1),
+            "index": round(index_val, 1),
+            "rank_score": float(rank[o]),
+        })
+    return items, len(idx)
+
+
+def category_summary(snap: ABSnapshot, min_base: int, filter_outliers: bool, allow_negative: bool,
+                     max_ratio: float, max_jump: int) -> Dict[str, Any]:
+    mask = snap.base_mask(min_base)
+    a = snap.a[mask]
+    b_eff = effective_b(a, snap.b[mask], filter_outliers, allow_negative, max_ratio, max_jump)
+    n = int(mask.sum())
+    return {"a_sum": int(a.sum()), "b_sum": int(b_eff.sum()), "a_n": n, "b_n": n}
+
+
+def brand_sums(snap: ABSnapshot, min_base: int, filter_outliers: bool, allow_negative: bool,
+               max_ratio: float, max_jump: int):
+    """
+    브랜드별 (A 합계, 보정 B 합계) — 브랜드 코드 bincount.
+    반환: (mask된 제품 index, 보정 B, 브랜드 코드 목록(첫 등장 순), A 합계, B 합계)
+    """
+    idx = np.nonzero(snap.base_mask(min_base))[0]
+    a = snap.a[idx]
+    b_eff = effective_b(a, snap.b[idx], filter_outliers, allow_negative, max_ratio, max_jump)
+    codes = snap.brand_codes[idx]
+    n_brands = len(snap.brands)
+    a_sum = np.bincount(codes, weights=a, minlength=n_brands).astype(np.int64)
+    b_sum = np.bincount(codes, weights=b_eff, minlength=n_brands).astype(np.int64)
+    # 기존 dict 집계와 같은 순서: 필터 통과 행에서의 첫 등장 순
+    present, first = np.unique(codes, return_index=True)
+    brand_order = present[np.argsort(first, kind="stable")]
+    return idx, b_eff, brand_order, a_sum, b_sum
+
+
+def top_k_lex(keys: List[np.ndarray], k: int) -> np.ndarray:
+    """
+    keys(우선순위 순, 모두 오름차순) 기준 앞 k개 위치, 동점은 위치 순 (= 안정 정렬 후 [:k]).
+    1순위 키 argpartition으로 k번째 값을 구해 그 이하 후보만 정렬 → 전체 정렬 없음
+    """
+    n = len(keys[0]) if keys else 0
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        kth = keys[0][np.argpartition(keys[0], k - 1)[k - 1]]
+        cand = np.nonzero(keys[0] <= kth)[0]
+    else:
+        cand = np.arange(n)
+    order = np.lexsort([cand] + [key[cand] for key in reversed(keys)])
+    return cand[order[:k]]
+
+
+def brand_positioning(snap: ABSnapshot, min_base: int, filter_outliers: bool, allow_negative: bool,
+                      max_ratio: float, max_jump: int, topk: int) -> List[dict]:
+    _, _, brand_order, a_sum, b_sum = brand_sums(snap, min_base, filter_outliers, allow_negative, max_ratio, max_jump)
+    base = a_sum[brand_order]
+    cur = b_sum[brand_order]
+    keep = ~((base <= 0) & (cur <= 0))
+    codes, base, cur = brand_order[keep], base[keep], cur[keep]
+    delta = cur - base
+    # sort(key=(delta, current), reverse=True)[:topk] — 동점은 첫 등장 순 유지
+    order = top_k_lex([-delta, -cur], topk)
+    return [
+        {"brand": snap.brands[int(codes[o])], "base_sum": int(base[o]),
+         "current_sum": int(cur[o]), "delta_sum": int(delta[o])}
+        for o in order
+    ]
+
+
+def brand_contributors(snap: ABSnapshot, min_base: int, filter_outliers: bool, allow_negative: bool,
+                       max_ratio: float, max_jump: int, topk: int) -> Tuple[List[dict], List[dict]]:
+    idx, b_eff, brand_order, a_sum, b_sum = brand_sums(
+        snap, min_base, filter_outliers, allow_negative, max_ratio, max_jump
+    )
+    base = a_sum[brand_order]
+    cur = b_sum[brand_order]
+    delta = cur - base
+
+    # top: (delta, curr_sum) 내림차순 / bottom: delta 오름차순, curr_sum 내림차순 (동점은 첫 등장 순)
+    top_pos = top_k_lex([-delta, -cur], topk)
+    bottom_pos = top_k_lex([delta, -cur], topk)
+    selected = brand_order[np.union1d(top_pos, bottom_pos)]
+
+    # 선택된 브랜드의 대표 제품만: |Δ| 최대, 동점이면 먼저 나온 제품
+    codes = snap.brand_codes[idx]
+    top_of = {}
+    rows = np.nonzero(np.isin(codes, selected))[0]
+    if len(rows):
+        d_eff = b_eff[rows] - snap.a[idx[rows]]
+        c = codes[rows]
+        order = np.lexsort((rows, -np.abs(d_eff), c))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = c[order][1:] != c[order][:-1]
+        for o in order[first]:
+            i = idx[rows[o]]
+            top_of[int(c[o])] = {"pid": int(snap.pid[i]), "name": snap.name[i], "delta": int(d_eff[o])}
+
+    def _item(pos) -> dict:
+        code = int(brand_order[pos])
+        a_s, b_s = int(base[pos]), int(cur[pos])
+        pct = ((b_s / a_s) - 1.0) * 100.0 if a_s > 0 else (100.0 if b_s > 0 else 0.0)
+        return {
+            "brand": snap.brands[code],
+            "base_sum": a_s,
+            "curr_sum": b_s,
+            "delta": b_s - a_s,
+            "pct": round(pct, 1),
+            "top_product": top_of.get(code),
+        }
+
+    return [_item(p) for p in top_pos], [_item(p) for p in bottom_pos]
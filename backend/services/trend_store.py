@@ -0,0 +1,289 @@
+# backend/services/trend_store.py
+# -*- coding: utf-8 -*-
+"""
+트렌드 컬럼형 스냅샷 파일 (워커 간 공유, 메모리 맵).
+
+gunicorn 워커마다 주간 이력 행렬/제품 표시 정보를 DB에서 따로 읽어 들이지 않도록
+export CLI(scripts/export_trends_store.py)가 한 번 만들어 둔 NumPy 파일을 읽기 전용 mmap으로 연다.
+→ 같은 파일의 페이지 캐시를 모든 워커가 공유 (물리 메모리 1벌)
+
+디렉터리 구조 (TRENDS_STORE_DIR):
+    CURRENT                  현재 버전 디렉터리 이름 (os.replace로 원자적 교체)
+    <version>/meta.json      days, periods, categories, brands, 행 수
+    <version>/*.npy          pids, counts, observed, count_null, cat_codes, brand_codes,
+                             review_count(+_null), price_krw(NaN=NULL)
+    <version>/<field>.data.npy / .offsets.npy / .null.npy
+                             문자열 컬럼 (utf-8 바이트 연결 + 오프셋, Arrow 방식)
+
+- 행 순서 = 행렬 행 순서 (pid별 1행). 문자열도 mmap 상태로 필요한 행만 디코드
+- 워커는 STORE_CHECK_SEC 간격으로 CURRENT를 확인해 바뀌었으면 새 버전을 열어 참조만 교체
+  (이전 버전 파일은 삭제돼도 열린 mmap은 유지됨)
+- 스냅샷이 없거나 DB 주차 목록과 맞지 않으면 호출 측이 기존 DB 경로로 대체
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.catalog_facets import TBL_PRODUCT
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "artifacts", "trends_store")
+STORE_DIR = os.getenv("TRENDS_STORE_DIR", DEFAULT_STORE_DIR)
+STORE_CHECK_SEC = float(os.getenv("TRENDS_STORE_CHECK_SEC", "30"))
+KEEP_VERSIONS = 3
+
+TBL_CHAIN = "product_data_chain"   # pid, rag_text
+STRING_FIELDS = ("name", "brand", "image_url", "product_url", "rag_text")
+
+
+class StringColumn:
+    """utf-8 바이트 연결 + 오프셋 문자열 컬럼 (mmap, 행 단위 디코드)"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, null: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+        self.null = null
+
+    def __len__(self) -> int:
+        return len(self.null)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.null[i]:
+            return None
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def take(self, idx) -> List[Optional[str]]:
+        return [self[int(i)] for i in idx]
+
+
+def _write_strings(path: str, field: str, values: List[Optional[str]]):
+    encoded = [b"" if v is None else str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(os.path.join(path, f"{field}.data.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(os.path.join(path, f"{field}.offsets.npy"), offsets)
+    np.save(os.path.join(path, f"{field}.null.npy"), np.array([v is None for v in values], dtype=bool))
+
+
+class TrendStore:
+    """한 버전의 스냅샷 (읽기 전용 mmap)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.days = [date.fromisoformat(d) for d in meta["days"]]
+        self.periods: List[str] = meta["periods"]
+        self.categories: List[Any] = meta["categories"]
+        self.brands: List[Any] = meta["brands"]
+        self.exported_at = meta.get("exported_at")
+
+        def _load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.pids = _load("pids")
+        self.counts = _load("counts")
+        self.observed = _load("observed")
+        self.count_null = _load("count_null")
+        self.cat_codes = _load("cat_codes")
+        self.brand_codes = _load("brand_codes")
+        self.review_count = _load("review_count")
+        self.review_count_null = _load("review_count_null")
+        self.price_krw = _load("price_krw")
+        self.strings = {
+            f: StringColumn(_load(f"{f}.data"), _load(f"{f}.offsets"), _load(f"{f}.null"))
+            for f in STRING_FIELDS
+        }
+        self.col_of = {d: i for i, d in enumerate(self.days)}
+        self.opened_at = time.time()
+
+    def ab_rows(self, category: str, a_date: Optional[date], b_date: date) -> Optional[list]:
+        """
+        trend_snapshot._fetch_rows와 같은 행 (B주 이력이 있는 category 제품).
+        b_date(또는 a_date)가 스냅샷에 없으면 None → DB 경로 사용
+        """
+        b_col = self.col_of.get(b_date)
+        a_col = self.col_of.get(a_date) if a_date is not None else None
+        if b_col is None or (a_date is not None and a_col is None):
+            return None
+        try:
+            c = self.categories.index(category)
+        except ValueError:
+            return []
+        idx = np.nonzero((np.asarray(self.cat_codes) == c) & np.asarray(self.observed[:, b_col]))[0]
+
+        # a: COALESCE(A주, product_data.review_count, 0)
+        fallback = np.where(self.review_count_null[idx], 0, self.review_count[idx])
+        if a_col is None:
+            a_cnt = fallback
+        else:
+            has_a = self.observed[idx, a_col] & ~self.count_null[idx, a_col]
+            a_cnt = np.where(has_a, self.counts[idx, a_col], fallback)
+        b_cnt = self.counts[idx, b_col]
+        b_null = self.count_null[idx, b_col]
+
+        cols = {f: self.strings[f].take(idx) for f in STRING_FIELDS}
+        price = self.price_krw[idx]
+        return [
+            (
+                int(self.pids[i]), cols["name"][k], cols["brand"][k],
+                cols["image_url"][k], cols["product_url"][k],
+                None if np.isnan(price[k]) else (int(price[k]) if float(price[k]).is_integer() else float(price[k])),
+                cols["rag_text"][k] or "",
+                int(a_cnt[k]), None if b_null[k] else int(b_cnt[k]),
+            )
+            for k, i in enumerate(idx)
+        ]
+
+
+# ============================================
+# 현재 버전 (프로세스 공용 참조)
+# ============================================
+_current: Optional[TrendStore] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _read_pointer() -> Optional[str]:
+    try:
+        with open(os.path.join(STORE_DIR, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current() -> Optional[TrendStore]:
+    """현재 스냅샷 (없으면 None). CURRENT 확인은 STORE_CHECK_SEC 간격."""
+    global _current, _checked_at
+    if time.time() - _checked_at < STORE_CHECK_SEC:
+        return _current
+    with _lock:
+        if time.time() - _checked_at < STORE_CHECK_SEC:
+            return _current
+        _checked_at = time.time()
+        name = _read_pointer()
+        if name is None:
+            _current = None
+        elif _current is None or _current.name != name:
+            try:
+                _current = TrendStore(os.path.join(STORE_DIR, name))
+                print(f"[TREND_STORE] {name} 열림: pids={len(_current.pids)}, weeks={len(_current.days)}")
+            except Exception as e:
+                print(f"❌ 트렌드 스냅샷 열기 실패 ({name}), 이전 버전 유지: {e}")
+        return _current
+
+
+# ============================================
+# export (scripts/export_trends_store.py)
+# ============================================
+def _fetch_display(db: Session):
+    return db.execute(text(f"""
+        SELECT pd.pid, pd.product_name, pd.brand, pd.image_url, pd.product_url, pd.price_krw,
+               CAST(pd.review_count AS SIGNED) AS review_count,
+               pdc.rag_text
+        FROM {TBL_PRODUCT} AS pd
+        LEFT JOIN {TBL_CHAIN} AS pdc
+               ON pdc.pid = pd.pid
+    """)).fetchall()
+
+
+def export(db: Session, keep: int = KEEP_VERSIONS) -> Dict[str, Any]:
+    """DB에서 행렬 + 표시 정보를 읽어 새 버전 디렉터리로 쓰고 CURRENT를 원자적으로 교체"""
+    from services import catalog_facets, trend_matrix
+
+    t0 = time.time()
+    catalog_facets.invalidate("periods")
+    _, periods = catalog_facets.get_periods(db)
+    rows = trend_matrix._fetch(db)
+    m = trend_matrix._build(rows)
+    P, W = m.shape
+
+    count_null = np.zeros((P, W), dtype=bool)
+    col_of = {d: i for i, d in enumerate(m.days)}
+    for d, pid, _, _, cnt in rows:
+        if cnt is None:
+            count_null[m.row_of[int(pid)], col_of[d]] = True
+
+    display = {int(r[0]): r for r in _fetch_display(db)}
+    drows = [display.get(int(p)) for p in m.pids]
+
+    def _col(i):
+        return [r[i] if r is not None else None for r in drows]
+
+    review_count = _col(6)
+    price = _col(5)
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    name = f"{m.days[-1].strftime('%Y%m%d') if m.days else 'empty'}-{int(t0)}"
+    tmp = os.path.join(STORE_DIR, f".{name}.tmp")
+    os.makedirs(tmp, exist_ok=False)
+
+    np.save(os.path.join(tmp, "pids.npy"), m.pids)
+    np.save(os.path.join(tmp, "counts.npy"), m.counts)
+    np.save(os.path.join(tmp, "observed.npy"), m.observed)
+    np.save(os.path.join(tmp, "count_null.npy"), count_null)
+    np.save(os.path.join(tmp, "cat_codes.npy"), m.cat_codes)
+    np.save(os.path.join(tmp, "brand_codes.npy"), m.brand_codes)
+    np.save(os.path.join(tmp, "review_count.npy"), np.array([int(v or 0) for v in review_count], dtype=np.int64))
+    np.save(os.path.join(tmp, "review_count_null.npy"), np.array([v is None for v in review_count], dtype=bool))
+    np.save(os.path.join(tmp, "price_krw.npy"),
+            np.array([np.nan if v is None else float(v) for v in price], dtype=np.float64))
+    for i, field in ((1, "name"), (2, "brand"), (3, "image_url"), (4, "product_url"), (7, "rag_text")):
+        _write_strings(tmp, field, _col(i))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "days": [str(d) for d in m.days],
+            "periods": periods,
+            "categories": m.categories,
+            "brands": m.brands,
+            "pids": P,
+            "weeks": W,
+            "exported_at": time.time(),
+        }, f, ensure_ascii=False)
+
+    final = os.path.join(STORE_DIR, name)
+    os.rename(tmp, final)
+    pointer_tmp = os.path.join(STORE_DIR, "CURRENT.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(STORE_DIR, "CURRENT"))
+
+    removed = prune(keep)
+    size = sum(os.path.getsize(os.path.join(final, fn)) for fn in os.listdir(final))
+    return {
+        "version": name, "pids": P, "weeks": W, "bytes": size, "removed": removed,
+        "elapsed_ms": int((time.time() - t0) * 1000),
+    }
+
+
+def prune(keep: int = KEEP_VERSIONS) -> List[str]:
+    """CURRENT 외에 최근 keep-1개만 남기고 이전 버전 디렉터리 삭제"""
+    cur = _read_pointer()
+    versions = sorted(
+        (d for d in os.listdir(STORE_DIR)
+         if not d.startswith(".") and os.path.isdir(os.path.join(STORE_DIR, d))),
+        key=lambda d: os.path.getmtime(os.path.join(STORE_DIR, d)),
+    )
+    old = [d for d in versions if d != cur][:max(0, len(versions) - max(1, keep))]
+    for d in old:
+        shutil.rmtree(os.path.join(STORE_DIR, d), ignore_errors=True)
+    return old
+
+
+def stats() -> Dict[str, Any]:
+    s = _current
+    if s is None:
+        return {"loaded": False, "dir": STORE_DIR}
+    return {"loaded": True, "dir": STORE_DIR, "version": s.name, "pids": len(s.pids), "weeks": len(s.days),
+            "latest": s.periods[-1] if s.periods else None, "opened_at": s.opened_at}
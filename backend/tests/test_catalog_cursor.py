@@ -0,0 +1,41 @@
+# backend/tests/test_catalog_cursor.py
+# -*- coding: utf-8 -*-
+"""카테고리 제품 목록 cursor: 형식이 틀린 cursor는 모두 ValueError (라우터에서 400)"""
+
+import base64
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.catalog_facets import decode_cursor, encode_cursor  # noqa: E402
+
+
+def _raw(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor("수분 크림, 50ml", 123)) == ("수분 크림, 50ml", 123)
+
+
+@pytest.mark.parametrize("payload", [
+    5, None, "abc", {"a": 1, "b": 2}, [], ["x"], ["x", 1, 2],
+    ["x", None], ["x", "12"], ["x", 1.5], ["x", True], [1, 2],
+])
+def test_bad_payload_shape(payload):
+    with pytest.raises(ValueError):
+        decode_cursor(_raw(payload))
+
+
+@pytest.mark.parametrize("cursor", [
+    "!!!", "a",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode("ascii"),     # UTF-8 아님
+    base64.urlsafe_b64encode(b"[x, 1]").decode("ascii"),        # JSON 아님
+])
+def test_not_base64_json(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,52 @@
+# backend/tests/test_ingredient_kb.py
+# -*- coding: utf-8 -*-
+"""성분 사전 원문 조회: keyword/등급은 정확 일치, 주의 성분만 콜레이션처럼 대소문자/끝 공백 무시"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ingredient_kb  # noqa: E402
+
+
+def _kb():
+    ing_rows = [
+        (1, "Niacinamide", "brightening", None, "safe"),
+        (2, "정제수", "moisturizing", None, None),
+        (3, "retinol ", "anti-aging", None, "caution"),   # DB 값 끝 공백
+        (4, "ADENOSINE", "anti-aging", None, None),
+        (5, "adenosine", "soothing", None, None),
+    ]
+    official = [("Fragrance", "high", "향료"), ("FRAGRANCE", "low", None)]
+    ml = [("Phenoxyethanol", "mid", None)]
+    return ingredient_kb._build(ing_rows, [], official, ml, signature="test", version=0)
+
+
+def test_raw_lookup_is_exact():
+    # keyword/등급은 기존에도 DB 표기 키 dict를 원문 토큰으로 정확 조회 → 결과(점수) 동일성 유지
+    kb = _kb()
+    assert kb.keyword("Niacinamide") == "brightening"
+    assert kb.keyword("niacinamide") is None
+    assert kb.keyword("Niacinamide ") is None
+    assert kb.grade("retinol ") == "caution"
+    assert kb.grade("retinol") is None
+    assert kb.has_ingredient("정제수")
+    assert not kb.has_ingredient("정제수 ")
+    assert kb.keyword("adenosine") == "soothing"
+    assert kb.keyword("ADENOSINE") == "anti-aging"
+    assert kb.keyword("Adenosine") is None
+
+
+def test_keyword_map_is_exact():
+    kb = _kb()
+    assert kb.keyword_map(["Niacinamide", "niacinamide", "정제수", "없는성분"]) == {
+        "Niacinamide": "brightening", "정제수": "moisturizing"}
+
+
+def test_caution_ignores_case():
+    kb = _kb()
+    assert kb.official_caution("fragrance").korean_name == "Fragrance"
+    assert kb.official_caution("FRAGRANCE").korean_name == "FRAGRANCE"   # 정확 일치 우선
+    assert kb.ml_caution("phenoxyethanol ").korean_name == "Phenoxyethanol"
+    assert kb.official_caution("phenoxyethanol") is None
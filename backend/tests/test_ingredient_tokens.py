@@ -0,0 +1,43 @@
+# backend/tests/test_ingredient_tokens.py
+# -*- coding: utf-8 -*-
+"""성분 문자열 분리: 카탈로그(',' 분리 유지) vs OCR 추출 결과(성분명 안의 콤마 보존)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ingredient_kb  # noqa: E402
+from services.ingredient_matcher import (  # noqa: E402
+    OCR_JOIN_SEP,
+    extract_ingredient_names,
+    join_ocr_names,
+    split_ingredient_tokens,
+)
+
+
+def _kb(names, kcia_only=()):
+    ing_rows = [(i + 1, n, None, None, None) for i, n in enumerate(names)]
+    kcia_rows = [(ingredient_kb.normalize_name(n), None) for n in kcia_only]
+    return ingredient_kb._build(ing_rows, kcia_rows, [], [], signature="test", version=0)
+
+
+def test_catalog_string_splits_on_every_comma():
+    # 기존 split(',')와 동일해야 카탈로그 점수/키워드 프로필이 바뀌지 않음
+    s = "정제수,폴리쿼터늄-7,1,2-헥산다이올,향료"
+    assert split_ingredient_tokens(s) == ["정제수", "폴리쿼터늄-7", "1", "2-헥산다이올", "향료"]
+    assert split_ingredient_tokens(s) == [t.strip() for t in s.split(",") if t.strip()]
+
+
+def test_ocr_result_keeps_locant_comma():
+    kb = _kb(["정제수", "폴리쿼터늄-7", "1,2-헥산다이올", "향료"])
+    names = extract_ingredient_names("전성분: 정제수, 폴리쿼터늄-7, 1,2-헥산다이올, 향료", kb)
+    assert names == ["정제수", "폴리쿼터늄-7", "1,2-헥산다이올", "향료"]
+    assert split_ingredient_tokens(join_ocr_names(names), OCR_JOIN_SEP) == names
+
+
+def test_ocr_kcia_only_name_drops_space_after_comma():
+    kb = _kb(["정제수"], kcia_only=["1,2-헥산다이올"])
+    names = extract_ingredient_names("정제수, 1, 2-헥산다이올", kb)
+    assert names == ["정제수", "1,2-헥산다이올"]
+    assert split_ingredient_tokens(join_ocr_names(names), OCR_JOIN_SEP) == names
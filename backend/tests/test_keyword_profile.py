@@ -0,0 +1,56 @@
+# backend/tests/test_keyword_profile.py
+# -*- coding: utf-8 -*-
+"""저장 keyword 프로필 복원 결과 == 성분 문자열 직접 매칭 결과"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routers.analysis import (  # noqa: E402
+    build_keyword_profile,
+    match_ingredients_with_maps,
+    matches_from_keyword_profile,
+    split_ingredient_tokens,
+)
+from services import ingredient_kb  # noqa: E402
+from services.ingredient_kb import normalize_name  # noqa: E402
+
+
+def _kb():
+    ing_rows = [
+        (1, "Niacinamide", "brightening", None, None),
+        (2, "정제수", "moisturizing", None, None),
+        (3, "글리세린", "moisturizing", None, None),
+    ]
+    kcia_rows = [(normalize_name("Niacinamide"), "미백"), (normalize_name("정제수"), "용제")]
+    return ingredient_kb._build(ing_rows, kcia_rows, [], [], signature="test", version=0)
+
+
+def _both_paths(ingredients_str: str):
+    kb = _kb()
+    tokens = split_ingredient_tokens(ingredients_str)
+    keyword_map = kb.keyword_map(tokens)
+    purpose_map = kb.purpose_map({normalize_name(t) for t in tokens if normalize_name(t)})
+    live_matched, _, live_unmatched, _ = match_ingredients_with_maps(tokens, keyword_map, purpose_map)
+
+    prof = build_keyword_profile(tokens, keyword_map, kb)
+    profile = SimpleNamespace(matched_ids=prof["matched_ids"])
+    prof_matched, prof_unmatched = matches_from_keyword_profile(profile, ingredients_str, kb)
+    return (live_matched, live_unmatched), (prof_matched, prof_unmatched)
+
+
+def test_profile_matches_live_path_when_token_case_differs():
+    # "niacinamide"는 DB 표기("Niacinamide")와 대소문자만 다름 → 두 경로 모두 미분류 1번만
+    live, prof = _both_paths("정제수,niacinamide,Niacinamide,글리세린,없는성분,정제수")
+    assert prof == live
+    matched, unmatched = prof
+    assert [d["성분명"] for d in matched] == ["정제수", "Niacinamide", "글리세린", "정제수"]
+    assert [d["성분명"] for d in unmatched] == ["niacinamide", "없는성분"]
+
+
+def test_profile_keeps_token_spelling_and_purpose():
+    live, prof = _both_paths("Niacinamide,정제수")
+    assert prof == live
+    assert prof[0][0] == {"성분명": "Niacinamide", "배합목적": "미백", "효능": live[0][0]["효능"]}